@@ -0,0 +1,117 @@
+"""Micro-batching for /ai/parse.
+
+Concurrent parse calls are collected for up to AI_BATCH_WINDOW_MS, or until
+AI_BATCH_MAX_SIZE distinct texts are waiting, and sent to Gemini as one
+get_batch_prompt() call. The JSON array that comes back is split per text; a
+text whose part of the answer is missing or malformed is re-sent on its own.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from typing import Optional
+from app.core import gemini
+from app.core.config import settings
+from app.core.constants import get_batch_prompt, get_prompt
+from app.core.metrics import AI_BATCH_FALLBACKS, AI_BATCH_SIZE
+
+RESULT_KEYS = ("tasks", "events", "notes", "subtasks")
+
+
+def valid_result(item) -> bool:
+    """The shape /ai/parse promises and persist_parsed() expects: an object
+    whose result keys, where present, hold lists."""
+    return (
+        isinstance(item, dict)
+        and any(key in item for key in RESULT_KEYS)
+        and all(isinstance(item.get(key, []), list) for key in RESULT_KEYS)
+    )
+
+
+async def parse_one(text: str) -> tuple:
+    """(parsed dict or None, raw model output) for a single-text prompt."""
+    raw = await gemini.generate(get_prompt(SimpleNamespace(text=text)))
+    try:
+        parsed = json.loads(raw)
+    except (TypeError, ValueError):  # TypeError: no text at all (blocked or empty answer)
+        return None, raw
+    return (parsed, raw) if valid_result(parsed) else (None, raw)
+
+
+async def parse_many(texts: list) -> list:
+    """parse_one() results for each text from one Gemini call. Texts the batch
+    answer doesn't cover are retried on their own; a retry that fails leaves its
+    exception in the list."""
+    AI_BATCH_SIZE.observe((), len(texts))
+    if len(texts) == 1:
+        return [await parse_one(texts[0])]
+
+    raw = await gemini.generate(get_batch_prompt(texts))
+    try:
+        items = json.loads(raw)
+    except (TypeError, ValueError):
+        items = None
+    if not isinstance(items, list) or len(items) != len(texts):
+        items = [None] * len(texts)  # can't tell which result belongs to which text
+    results = [(item, json.dumps(item)) if valid_result(item) else None for item in items]
+
+    retry = [i for i, result in enumerate(results) if result is None]
+    if retry:
+        AI_BATCH_FALLBACKS.inc((), len(retry))
+    while retry:
+        # In waves that fit the free limiter slots: it rejects rather than queues
+        free = max(1, gemini.limiter.limit - gemini.limiter.in_flight)
+        wave, retry = retry[:free], retry[free:]
+        retried = await asyncio.gather(*(parse_one(texts[i]) for i in wave), return_exceptions=True)
+        for i, result in zip(wave, retried):
+            results[i] = result
+    return results
+
+
+class ParseBatcher:
+    """Coalesces concurrent parse() calls into parse_many() batches. Identical
+    texts waiting together share one slot."""
+
+    def __init__(self, window: float, max_size: int):
+        self.window = window
+        self.max_size = max_size
+        self._pending = {}  # text -> futures waiting on it
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._sending = set()  # keeps the batch tasks referenced
+
+    async def parse(self, text: str) -> tuple:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(text, []).append(future)
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: dict):
+        texts = list(batch)
+        try:
+            results = await parse_many(texts)
+        except Exception as exc:  # the batch call itself: every waiter gets it (429, 503, ...)
+            results = [exc] * len(texts)
+        for text, result in zip(texts, results):
+            for future in batch[text]:
+                if future.done():  # the request went away
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+batcher = ParseBatcher(settings.AI_BATCH_WINDOW_MS / 1000, settings.AI_BATCH_MAX_SIZE)
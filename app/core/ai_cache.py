@@ -0,0 +1,150 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Optional
+from app.core.config import settings
+from app.core.constants import get_prompt
+from app.core.metrics import CACHE_ENTRIES, CACHE_LOOKUPS
+
+# Changes whenever the prompt template does, so old results stop matching.
+PROMPT_VERSION = hashlib.sha256(get_prompt(SimpleNamespace(text="")).encode()).hexdigest()[:12]
+
+# With AI_CACHE_PATH, hit times are written in one transaction this often, and
+# expired / least recently used rows are pruned from the file this often.
+FLUSH_SECONDS = 5.0
+PRUNE_SECONDS = 60.0
+
+log = logging.getLogger("app.ai_cache")
+
+
+def normalize_text(text: str) -> str:
+    # Case is kept on purpose: titles are returned as written.
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class ParseCache:
+    """LRU + TTL cache for /ai/parse results, optionally backed by a SQLite file.
+
+    Values are stored as JSON text and decoded on every hit, so callers always
+    get their own copy. The file is only touched from one worker thread, which
+    owns the connection: reads on a memory miss are awaited, writes are queued.
+    A failing file (e.g. locked by another worker past the busy timeout) is
+    logged and treated as a miss, never raised to the route. Hits, misses and
+    size are in /metrics (cache="ai_parse").
+    """
+
+    def __init__(self, max_size: int, ttl: float, path: Optional[str] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, json text)
+        self._path = path
+        self._db = None  # opened on the disk thread
+        self._disk = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-cache") if path else None
+        self._touched = {}  # key -> last hit time, not written yet
+        self._flushed_at = self._pruned_at = time.time()
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(f"{PROMPT_VERSION}\0{normalize_text(text)}".encode()).hexdigest()
+
+    async def get(self, text: str) -> Optional[dict]:
+        key, now = self.key(text), time.time()
+        entry = self._entries.get(key)
+        if entry is None and self._disk is not None:
+            entry = await asyncio.get_running_loop().run_in_executor(self._disk, self._read, key)
+            if entry is not None:
+                self._remember(key, entry)
+
+        if entry is None or entry[0] <= now:
+            if entry is not None:
+                self._forget(key)
+            CACHE_LOOKUPS.inc(("ai_parse", "miss"))
+            return None
+
+        self._entries.move_to_end(key)
+        if self._disk is not None:
+            self._touched[key] = now
+            self._maybe_flush(now)
+        CACHE_LOOKUPS.inc(("ai_parse", "hit"))
+        return json.loads(entry[1])
+
+    def set(self, text: str, result: dict):
+        key, now = self.key(text), time.time()
+        entry = (now + self.ttl, json.dumps(result))
+        self._remember(key, entry)
+        if self._disk is not None:
+            self._touched.pop(key, None)
+            self._submit("INSERT OR REPLACE INTO parse_cache VALUES (?, ?, ?, ?)", [(key, entry[1], entry[0], now)])
+            self._maybe_flush(now)
+
+    def clear(self):
+        """Empties the cache; waits for the file, so not for use on the event loop."""
+        self._entries.clear()
+        CACHE_ENTRIES.set(("ai_parse",), 0)
+        if self._disk is not None:
+            self._touched.clear()
+            self._disk.submit(self._write, "DELETE FROM parse_cache", [()]).result()
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        CACHE_ENTRIES.set(("ai_parse",), len(self._entries))
+
+    def _forget(self, key):
+        self._entries.pop(key, None)
+        CACHE_ENTRIES.set(("ai_parse",), len(self._entries))
+        if self._disk is not None:
+            self._touched.pop(key, None)
+            self._submit("DELETE FROM parse_cache WHERE key = ?", [(key,)])
+
+    def _maybe_flush(self, now: float):
+        if now - self._flushed_at < FLUSH_SECONDS:
+            return
+        self._flushed_at = now
+        if self._touched:
+            touched, self._touched = self._touched, {}
+            self._submit("UPDATE parse_cache SET used_at = ? WHERE key = ?", [(used_at, key) for key, used_at in touched.items()])
+        if now - self._pruned_at >= PRUNE_SECONDS:
+            self._pruned_at = now
+            self._submit("DELETE FROM parse_cache WHERE expires_at <= ? OR key NOT IN "
+                         "(SELECT key FROM parse_cache ORDER BY used_at DESC LIMIT ?)", [(now, self.max_size)])
+
+    # The rest runs on the disk thread
+
+    def _submit(self, sql: str, rows: list):
+        self._disk.submit(self._write, sql, rows)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(self._path, timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS parse_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL)")
+        return self._db
+
+    def _read(self, key: str):
+        try:
+            return self._connection().execute("SELECT expires_at, value FROM parse_cache WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            log.warning("AI cache read failed", exc_info=True)
+            return None
+
+    def _write(self, sql: str, rows: list):
+        try:
+            with self._connection() as db:  # one transaction
+                db.execute("BEGIN")
+                db.executemany(sql, rows)
+        except sqlite3.Error:
+            log.warning("AI cache write failed", exc_info=True)
+
+
+parse_cache = ParseCache(settings.AI_CACHE_SIZE, settings.AI_CACHE_TTL_SECONDS, settings.AI_CACHE_PATH or None)
@@ -0,0 +1,153 @@
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+from app.core.times import naive_utc
+from app.models.event import Event
+from app.models.note import Note
+from app.models.task import Task, Subtask
+from app.schemas.event import EventCreate
+from app.schemas.note import NoteCreate
+from app.schemas.todo import TaskCreate, SubTaskCreate
+
+
+def _lookup_date(value) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _stored(data: dict, *fields) -> dict:
+    # Stored times are naive UTC, as in the task and event routes
+    for field in fields:
+        if data.get(field) is not None:
+            data[field] = naive_utc(data[field])
+    return data
+
+
+def _title_key(title) -> str:
+    return " ".join(str(title or "").split()).casefold()
+
+
+class _TitleIndex:
+    """title -> [(date, row)], filled from this batch first and then from the DB."""
+
+    def __init__(self):
+        self._rows = {}
+
+    def add(self, title, when, row):
+        self._rows.setdefault(_title_key(title), []).append((when, row))
+
+    def find(self, title, when: Optional[date]):
+        candidates = self._rows.get(_title_key(title), [])
+        for candidate_date, row in candidates:
+            if when is None or candidate_date == when:
+                return row
+        return None
+
+
+def _lookup(raw: dict, key: str, date_key: str) -> Optional[tuple]:
+    """(title, date) of an item's task_lookup/event_lookup; None when it is
+    missing or not an object with a title."""
+    lookup = raw.get(key)
+    if not isinstance(lookup, dict) or not isinstance(lookup.get("title"), str) or not lookup["title"].strip():
+        return None
+    return lookup["title"], _lookup_date(lookup.get(date_key))
+
+
+def _matching_rows(db: Session, model, column, user_id: int, lookups: list) -> list:
+    """The user's rows whose title matches one of the (title, date) lookups,
+    ordered by `column`. Titles are compared with _title_key here, not in SQL,
+    whose lower() only folds ASCII; when every lookup has a date only those
+    days are read."""
+    if not lookups:
+        return []
+    keys = {_title_key(title) for title, _ in lookups}
+    days = {when for _, when in lookups}
+    stmt = select(model.id, model.title).where(model.user_id == user_id)
+    if None not in days:
+        stmt = stmt.where(or_(*(
+            and_(column >= datetime.combine(day, time.min), column < datetime.combine(day + timedelta(days=1), time.min))
+            for day in days
+        )))
+    ids = [row.id for row in db.execute(stmt) if _title_key(row.title) in keys]
+    if not ids:
+        return []
+    return db.scalars(select(model).where(model.id.in_(ids)).order_by(column, model.id)).all()
+
+
+def _validate(items, schema, kind: str, errors: list):
+    valid = []
+    for index, item in enumerate(items or []):
+        try:
+            valid.append((schema.model_validate(item), item))
+        except ValidationError as exc:
+            errors.append({"type": kind, "index": index, "errors": exc.errors(include_url=False, include_context=False)})
+    return valid
+
+
+def persist_parsed(db: Session, user_id: int, parsed: dict) -> dict:
+    """Validate an /ai/parse result, resolve its lookups and insert everything
+    in one transaction. Returns the new IDs per type. Raises 422 (and writes
+    nothing) if any item is invalid or a subtask's parent task can't be found."""
+    errors = []
+    tasks = _validate(parsed.get("tasks"), TaskCreate, "task", errors)
+    events = _validate(parsed.get("events"), EventCreate, "event", errors)
+    notes = _validate(parsed.get("notes"), NoteCreate, "note", errors)
+    subtasks = _validate(parsed.get("subtasks"), SubTaskCreate, "subtask", errors)
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+
+    new_tasks = [Task(**_stored(task.model_dump(), "due_date"), user_id=user_id) for task, _ in tasks]
+    new_events = [Event(**_stored(event.model_dump(), "start_time", "end_time"), user_id=user_id) for event, _ in events]
+
+    task_index, event_index = _TitleIndex(), _TitleIndex()
+    for row in new_tasks:
+        task_index.add(row.title, row.due_date.date() if row.due_date else None, row)
+    for row in new_events:
+        event_index.add(row.title, row.start_time.date(), row)
+
+    # Lookups that don't match this batch are resolved with one query per table
+    task_lookups = [_lookup(raw, "task_lookup", "due_date") for _, raw in subtasks]
+    event_lookups = [_lookup(raw, "event_lookup", "date") for _, raw in notes]
+    missing_tasks = [l for l in task_lookups if l and not task_index.find(*l)]
+    missing_events = [l for l in event_lookups if l and not event_index.find(*l)]
+    for row in _matching_rows(db, Task, Task.due_date, user_id, missing_tasks):
+        task_index.add(row.title, row.due_date.date() if row.due_date else None, row)
+    for row in _matching_rows(db, Event, Event.start_time, user_id, missing_events):
+        event_index.add(row.title, row.start_time.date(), row)
+
+    new_notes = []
+    for (note, _), lookup in zip(notes, event_lookups):
+        row = Note(**note.model_dump(), user_id=user_id)
+        if lookup:
+            event = event_index.find(*lookup)
+            if event is not None:
+                row.event = event
+        new_notes.append(row)
+
+    new_subtasks = []
+    for index, ((subtask, raw), lookup) in enumerate(zip(subtasks, task_lookups)):
+        task = task_index.find(*lookup) if lookup else None
+        if task is None:
+            errors.append({"type": "subtask", "index": index, "errors": [{"msg": "Parent task not found.", "input": raw.get("task_lookup")}]})
+            continue
+        new_subtasks.append(Subtask(title=subtask.title, is_completed=subtask.is_completed, task=task))
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+
+    db.add_all(new_tasks + new_events + new_notes + new_subtasks)
+    db.flush()
+    created = {
+        "tasks": [row.id for row in new_tasks],
+        "events": [row.id for row in new_events],
+        "notes": [row.id for row in new_notes],
+        "subtasks": [row.id for row in new_subtasks],
+    }
+    db.commit()
+    return created
@@ -12,4 +12,56 @@ class Settings:
     GOOGLE_API_KEY: str = os.getenv("GOOGLE_API_KEY")
     DATABASE_URL: str = os.getenv("DATABASE_URL")
 
-settings = Settings()
\ No newline at end of file
+    # Connection pool (MySQL / PostgreSQL)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # SQLite
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_CACHE_SIZE_KB: int = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+    # Gemini / AI
+    GEMINI_MODEL: str = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+    AI_TIMEOUT_SECONDS: float = float(os.getenv("AI_TIMEOUT_SECONDS", "20"))
+    AI_MAX_CONCURRENCY: int = int(os.getenv("AI_MAX_CONCURRENCY", "8"))
+    # Local fake client for development and load tests (no network, no API key)
+    AI_FAKE_CLIENT: bool = os.getenv("AI_FAKE_CLIENT", "false").lower() in ("1", "true", "yes")
+    AI_FAKE_LATENCY_SECONDS: float = float(os.getenv("AI_FAKE_LATENCY_SECONDS", "0.5"))
+    # /ai/parse result cache; set AI_CACHE_PATH to a file to keep it across restarts
+    AI_CACHE_SIZE: int = int(os.getenv("AI_CACHE_SIZE", "1024"))
+    AI_CACHE_TTL_SECONDS: float = float(os.getenv("AI_CACHE_TTL_SECONDS", "3600"))
+    AI_CACHE_PATH: str = os.getenv("AI_CACHE_PATH", "")
+    # Micro-batching: concurrent /ai/parse calls are collected for up to
+    # AI_BATCH_WINDOW_MS (or AI_BATCH_MAX_SIZE texts) and sent as one prompt
+    AI_BATCH_ENABLED: bool = os.getenv("AI_BATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+    AI_BATCH_WINDOW_MS: float = float(os.getenv("AI_BATCH_WINDOW_MS", "5"))
+    AI_BATCH_MAX_SIZE: int = int(os.getenv("AI_BATCH_MAX_SIZE", "16"))
+    # Texts per /ai/parse-batch request
+    AI_PARSE_BATCH_LIMIT: int = int(os.getenv("AI_PARSE_BATCH_LIMIT", "100"))
+
+    # /stats per-user cache; writes invalidate it, the TTL bounds time-based counts (overdue, this week)
+    STATS_CACHE_SIZE: int = int(os.getenv("STATS_CACHE_SIZE", "4096"))
+    STATS_CACHE_TTL_SECONDS: float = float(os.getenv("STATS_CACHE_TTL_SECONDS", "30"))
+
+    # Request metrics (/metrics, Server-Timing) and the slow query log; SLOW_QUERY_MS=0 turns the log off
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+    SERVER_TIMING_ENABLED: bool = os.getenv("SERVER_TIMING_ENABLED", "true").lower() in ("1", "true", "yes")
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+    # Due-date reminders (app/core/reminders.py): enable in one process only. The sink
+    # is log, queue (in-memory, for a consumer in the same process) or webhook
+    REMINDERS_ENABLED: bool = os.getenv("REMINDERS_ENABLED", "false").lower() in ("1", "true", "yes")
+    REMINDER_SINK: str = os.getenv("REMINDER_SINK", "log")
+    REMINDER_WEBHOOK_URL: str = os.getenv("REMINDER_WEBHOOK_URL", "")
+    REMINDER_LEAD_MINUTES: float = float(os.getenv("REMINDER_LEAD_MINUTES", "15"))
+    # Reminders kept in memory per kind, and how often writes are picked up
+    REMINDER_BATCH_SIZE: int = int(os.getenv("REMINDER_BATCH_SIZE", "1000"))
+    REMINDER_SYNC_SECONDS: float = float(os.getenv("REMINDER_SYNC_SECONDS", "2"))
+
+    # Schema changes run once via `python -m app.db.migrations`; workers only
+    # check the version at startup. Set to migrate on startup instead (single worker, dev).
+    AUTO_MIGRATE: bool = os.getenv("AUTO_MIGRATE", "false").lower() in ("1", "true", "yes")
+
+settings = Settings()
@@ -1,3 +1,6 @@
+from types import SimpleNamespace
+
+
 def get_prompt(req) -> str:
     prompt = f"""
     You are a task parsing assistant for a todo-app.
@@ -58,3 +61,18 @@ def get_prompt(req) -> str:
     \"\"\"{req.text}\"\"\"
     """
     return prompt
+
+
+def get_batch_prompt(texts) -> str:
+    """The get_prompt() instructions for several independent user texts at once;
+    the answer is a JSON array with one result object per text, in order."""
+    instructions = get_prompt(SimpleNamespace(text="")).rsplit("User text:", 1)[0]
+    numbered = "\n".join(f'    [{i}] """{text}"""' for i, text in enumerate(texts))
+    prompt = f"""{instructions}BATCH:
+    - Below are {len(texts)} separate user texts, numbered from 0. Parse each one on its own.
+    - Return a JSON array of exactly {len(texts)} objects in the format above; element i is the result for text [i].
+
+    User texts:
+{numbered}
+    """
+    return prompt
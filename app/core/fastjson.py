@@ -0,0 +1,41 @@
+"""JSON encoding for responses built from plain dicts (see app.db.projections).
+
+Produces the same bytes FastAPI does for a response_model: compact
+separators, non-ASCII left as is, datetimes as pydantic writes them (ISO 8601,
+"Z" for UTC). Uses orjson when it is installed, the json module otherwise.
+"""
+import json
+from datetime import date, datetime, timedelta
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        text = value.isoformat()
+        return text[:-6] + "Z" if value.utcoffset() == timedelta(0) else text
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse for content that is already in response shape; no
+    validation happens on this path."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+from typing import Iterable, List, Tuple
+
+
+def busy_intervals(intervals: Iterable[Tuple[datetime, datetime]], window_start: datetime, window_end: datetime) -> List[list]:
+    """Merges (start, end) pairs, sorted by start, into [start, end, events]
+    busy blocks clipped to [window_start, window_end). One pass: a block grows
+    while the next interval starts before (or exactly when) it ends."""
+    blocks = []
+    current = None
+    for start, end in intervals:
+        start, end = max(start, window_start), min(end, window_end)
+        if start >= end:
+            continue
+        if current is not None and start <= current[1]:
+            if end > current[1]:
+                current[1] = end
+            current[2] += 1
+        else:
+            current = [start, end, 1]
+            blocks.append(current)
+    return blocks
+
+
+def free_slots(busy: List[list], window_start: datetime, window_end: datetime, min_length: timedelta) -> List[tuple]:
+    """(start, end) gaps of at least min_length between the busy blocks."""
+    slots = []
+    cursor = window_start
+    for start, end, _ in busy:
+        if start - cursor >= min_length and start > cursor:
+            slots.append((cursor, start))
+        cursor = end
+    if window_end - cursor >= min_length and window_end > cursor:
+        slots.append((cursor, window_end))
+    return slots
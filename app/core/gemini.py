@@ -0,0 +1,161 @@
+import asyncio
+import json
+import re
+import sys
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Optional
+from fastapi import HTTPException
+from app.core.config import settings
+from app.core.metrics import external_call
+
+
+class FakeGeminiClient:
+    """Offline stand-in for genai.Client (only the async surface the app uses).
+
+    Answers after a fixed delay with a valid parse result that echoes the user
+    text back as a single task (an array of them for a batch prompt), so
+    /ai/parse can be load-tested locally. With empty=True every answer has
+    text None, as Gemini's does when it blocks or returns nothing; with
+    `answer` set every answer is that text instead.
+    """
+
+    def __init__(self, latency: float = 0.5, chunk_chars: int = 64, empty: bool = False, answer: Optional[str] = None):
+        self.latency = latency
+        self.chunk_chars = chunk_chars
+        self.empty = empty
+        self.answer = answer
+        self.calls = 0
+        self.aio = SimpleNamespace(models=SimpleNamespace(
+            generate_content=self.generate_content, generate_content_stream=self.generate_content_stream))
+
+    @staticmethod
+    def user_text(prompt: str) -> str:
+        match = re.search(r'"""(.*)"""', prompt, re.DOTALL)
+        return match.group(1).strip() if match else prompt.strip()
+
+    @staticmethod
+    def result(text: str) -> dict:
+        sentences = [s for s in re.split(r"(?<=[.!?])\s+|\n+", text) if s] or [text]
+        return {
+            "tasks": [{"title": sentence[:255], "description": None, "priority_id": 2, "status_id": 1,
+                       "recurrence_type_id": 1, "due_date": None, "color_code": "#3498db", "recurrence_end_date": None}
+                      for sentence in sentences],
+            "events": [],
+            "notes": [],
+            "subtasks": [],
+        }
+
+    async def generate_content(self, *, model: str, contents, config=None):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.empty or self.answer is not None:
+            return SimpleNamespace(text=self.answer)
+        if "User texts:" in contents:
+            texts = re.findall(r'^    \[\d+\] """(.*?)"""$', contents, re.MULTILINE | re.DOTALL)
+            return SimpleNamespace(text=json.dumps([self.result(text.strip()) for text in texts]))
+        return SimpleNamespace(text=json.dumps(self.result(self.user_text(contents))))
+
+    async def generate_content_stream(self, *, model: str, contents, config=None):
+        """The same answer (pretty-printed, as the model writes it) in chunk_chars
+        pieces, with the latency spread over them."""
+        self.calls += 1
+        text = self.answer if self.answer is not None else json.dumps(self.result(self.user_text(contents)), indent=2)
+        pieces = [None] if self.empty else [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+
+        async def chunks():
+            for piece in pieces:
+                await asyncio.sleep(self.latency / len(pieces))
+                yield SimpleNamespace(text=piece)
+        return chunks()
+
+
+class ConcurrencyLimiter:
+    """Caps in-flight AI calls. When every slot is taken, callers are rejected
+    with 429 right away instead of queueing behind slow upstream calls."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self.limit - self._semaphore._value
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._semaphore.locked():
+            raise HTTPException(status_code=429, detail="Too many AI requests, try again shortly.", headers={"Retry-After": "1"})
+        async with self._semaphore:
+            yield
+
+
+# Built on first use: importing the google-genai SDK costs more than the rest
+# of the app's imports, and most workers may never see an AI request.
+# Assign a client here to replace it (tests, benchmarks).
+client = None
+
+
+def get_client():
+    global client
+    if client is None:
+        if settings.AI_FAKE_CLIENT:
+            client = FakeGeminiClient(latency=settings.AI_FAKE_LATENCY_SECONDS)
+        else:
+            from google import genai
+            client = genai.Client(api_key=settings.GOOGLE_API_KEY)
+    return client
+
+
+def _api_errors() -> tuple:
+    # The SDK's errors can only have been raised if the SDK is loaded
+    errors = sys.modules.get("google.genai.errors")
+    return (errors.APIError,) if errors is not None else ()
+
+
+limiter = ConcurrencyLimiter(settings.AI_MAX_CONCURRENCY)
+
+
+async def generate(prompt: str) -> str:
+    """Runs one Gemini call on the event loop, bounded by the limiter and a timeout."""
+    async with limiter.slot():
+        try:
+            with external_call("gemini"):
+                response = await asyncio.wait_for(
+                    get_client().aio.models.generate_content(model=settings.GEMINI_MODEL, contents=prompt),
+                    timeout=settings.AI_TIMEOUT_SECONDS,
+                )
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="AI service timed out.", headers={"Retry-After": "1"})
+        except _api_errors() as exc:
+            raise HTTPException(status_code=503, detail=f"AI service unavailable: {exc.message}")
+    return response.text
+
+
+async def generate_stream(prompt: str):
+    """Yields the answer's text as Gemini streams it. Same limiter and errors as
+    generate(); AI_TIMEOUT_SECONDS bounds the whole answer."""
+    async with limiter.slot():
+        with external_call("gemini"):
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + settings.AI_TIMEOUT_SECONDS
+            stream = None
+            try:
+                stream = await asyncio.wait_for(
+                    get_client().aio.models.generate_content_stream(model=settings.GEMINI_MODEL, contents=prompt),
+                    timeout=settings.AI_TIMEOUT_SECONDS,
+                )
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(anext(stream), timeout=max(deadline - loop.time(), 0))
+                    except StopAsyncIteration:
+                        break
+                    if chunk.text:  # the last chunk may carry only metadata
+                        yield chunk.text
+            except asyncio.TimeoutError:
+                raise HTTPException(status_code=503, detail="AI service timed out.", headers={"Retry-After": "1"})
+            except _api_errors() as exc:
+                raise HTTPException(status_code=503, detail=f"AI service unavailable: {exc.message}")
+            finally:
+                if stream is not None and hasattr(stream, "aclose"):
+                    await stream.aclose()
@@ -0,0 +1,124 @@
+"""Incremental parsing of the model's parse result as it streams in.
+
+The result is one JSON object whose tasks/events/notes/subtasks values are
+arrays of objects. ResultStreamParser scans each chunk once, keeping only
+nesting and string state plus the text of the item it is inside, and hands
+back every item as soon as its closing brace arrives. Text before the first
+"{" (a stray ```json fence) and after the object is ignored.
+"""
+import json
+import re
+
+SECTIONS = ("tasks", "events", "notes", "subtasks")
+_STRING_STOP = re.compile(r'["\\]')
+_STRUCTURE = re.compile(r'["{}\[\]]')
+
+
+class ResultStreamParser:
+    def __init__(self, sections=SECTIONS, max_item_chars: int = 65536):
+        self.sections = set(sections)
+        self.max_item_chars = max_item_chars
+        self.started = False  # saw the opening "{"
+        self.done = False  # ... and its closing "}"
+        self.errors = []  # (section, message) for items that were dropped
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key = None  # last string read directly in the top-level object
+        self._key_parts = None  # pieces of that string while it is being read
+        self._section = None  # result array being read, if any
+        self._item = None  # pieces of the item being read
+        self._item_size = 0
+        self._oversized = False
+
+    def feed(self, chunk: str) -> list:
+        """(section, item) for every item completed in this chunk."""
+        items = []
+        i, n = 0, len(chunk)
+        key_start = 0 if self._key_parts is not None else None
+        item_start = 0 if self._item is not None else None
+
+        while i < n and not self.done:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    i += 1
+                    continue
+                match = _STRING_STOP.search(chunk, i)
+                if match is None:
+                    break
+                i = match.end()
+                if match.group() == "\\":
+                    self._escape = True
+                    continue
+                self._in_string = False
+                if key_start is not None:
+                    self._key_parts.append(chunk[key_start:i - 1])
+                    self._key = _decode_string("".join(self._key_parts))
+                    self._key_parts = key_start = None
+                continue
+
+            if not self.started:
+                start = chunk.find("{", i)
+                if start == -1:
+                    break
+                self.started, self._depth, i = True, 1, start + 1
+                continue
+
+            match = _STRUCTURE.search(chunk, i)
+            if match is None:
+                break
+            c, i = match.group(), match.end()
+            if c == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    self._key_parts, key_start = [], i
+            elif c in "{[":
+                self._depth += 1
+                if self._depth == 2:
+                    self._section = self._key if c == "[" and self._key in self.sections else None
+                elif self._depth == 3 and c == "{" and self._section is not None:
+                    self._item, self._item_size, item_start = [], 0, i - 1
+            else:
+                self._depth -= 1
+                if self._depth == 2 and (self._item is not None or self._oversized):
+                    if self._oversized:
+                        self._oversized = False
+                        self.errors.append((self._section, f"item longer than {self.max_item_chars} characters"))
+                    else:
+                        self._item.append(chunk[item_start:i])
+                        text, self._item, item_start = "".join(self._item), None, None
+                        try:
+                            items.append((self._section, json.loads(text)))
+                        except ValueError as exc:
+                            self.errors.append((self._section, f"invalid item: {exc}"))
+                elif self._depth == 1:
+                    self._section = None
+                elif self._depth == 0:
+                    self.done = True
+
+        if key_start is not None:
+            self._key_parts.append(chunk[key_start:])
+        if item_start is not None:
+            piece = chunk[item_start:]
+            self._item_size += len(piece)
+            if self._item_size > self.max_item_chars:
+                self._item, self._oversized = None, True
+            else:
+                self._item.append(piece)
+        return items
+
+    def close(self) -> list:
+        """Errors, including one for output that stopped before the object closed."""
+        if not self.done:
+            where = f" inside {self._section}" if self._section else ""
+            self.errors.append((self._section, f"output ended before the JSON was complete{where}"))
+            self._item = self._key_parts = None
+        return self.errors
+
+
+def _decode_string(raw: str):
+    try:
+        return json.loads(f'"{raw}"')
+    except ValueError:
+        return None
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import threading
+from types import MappingProxyType
+from typing import Optional
+from sqlalchemy import select
+from app.db.database import engine
+from app.models.lookups import PriorityLevel, TaskStatus, RecurrenceType
+
+# Rows every database should have. Ids match the ones the AI prompt and
+# app.core.recurrence use.
+SEED = {
+    PriorityLevel: [
+        {"id": 1, "code": "LOW", "label": "Low Priority", "sort_order": 3},
+        {"id": 2, "code": "MEDIUM", "label": "Medium Priority", "sort_order": 2},
+        {"id": 3, "code": "HIGH", "label": "High Priority", "sort_order": 1},
+    ],
+    TaskStatus: [
+        {"id": 1, "code": "PENDING", "label": "Pending", "is_final": False},
+        {"id": 2, "code": "COMPLETED", "label": "Completed", "is_final": True},
+    ],
+    RecurrenceType: [
+        {"id": 1, "code": "NONE", "label": "Does not repeat"},
+        {"id": 2, "code": "DAILY", "label": "Daily"},
+        {"id": 3, "code": "WEEKLY", "label": "Weekly"},
+        {"id": 4, "code": "WEEKDAYS", "label": "Every weekday"},
+        {"id": 5, "code": "WEEKENDS", "label": "Every weekend"},
+    ],
+}
+
+# Response key -> (model, columns)
+TABLES = {
+    "priorities": (PriorityLevel, ("id", "code", "label", "sort_order")),
+    "statuses": (TaskStatus, ("id", "code", "label", "is_final")),
+    "recurrence_types": (RecurrenceType, ("id", "code", "label")),
+}
+
+
+class LookupSnapshot:
+    """Read-only view of the lookup tables at one point in time."""
+
+    def __init__(self, tables: dict):
+        # name -> id -> read-only row dict
+        self._by_id = MappingProxyType({
+            name: MappingProxyType({row["id"]: MappingProxyType(row) for row in rows})
+            for name, rows in tables.items()
+        })
+        self._by_code = MappingProxyType({
+            name: MappingProxyType({row["code"]: row["id"] for row in rows})
+            for name, rows in tables.items()
+        })
+        self.body = json.dumps(tables, separators=(",", ":")).encode()
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:16]}"'
+
+    def rows(self, name: str):
+        return self._by_id[name]
+
+    def has(self, name: str, id: int) -> bool:
+        return id in self._by_id[name]
+
+    def id_for(self, name: str, code: str) -> Optional[int]:
+        return self._by_code[name].get(code)
+
+    def label(self, name: str, id: int) -> Optional[str]:
+        row = self._by_id[name].get(id)
+        return row["label"] if row is not None else None
+
+
+class LookupCache:
+    """Holds the current LookupSnapshot.
+
+    Loaded once at startup. Anything that changes the lookup tables must call
+    invalidate(); the next snapshot() then reloads them.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def load(self, bind) -> LookupSnapshot:
+        """Reads the tables through the given engine and swaps the snapshot in."""
+        tables = {}
+        with bind.connect() as conn:
+            for name, (model, columns) in TABLES.items():
+                stmt = select(*(getattr(model, c) for c in columns)).order_by(model.id)
+                tables[name] = [dict(row._mapping) for row in conn.execute(stmt)]
+        self._snapshot = LookupSnapshot(tables)
+        return self._snapshot
+
+    def invalidate(self):
+        self._snapshot = None
+
+    def snapshot(self) -> LookupSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None:
+                    snapshot = self.load(engine)
+        return snapshot
+
+
+lookup_cache = LookupCache()
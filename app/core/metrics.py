@@ -0,0 +1,292 @@
+"""Request instrumentation, exposed at /metrics (Prometheus text format) and
+in a Server-Timing header on every response.
+
+Per request, MetricsMiddleware keeps a RequestTimings in a context variable;
+it follows the request into async routes, the threadpool that runs sync
+routes and SQLAlchemy's async greenlets. The engine hooks (instrument_engine)
+add each statement's time to it and log statements slower than
+SLOW_QUERY_MS; external_call() does the same for upstream calls (Gemini).
+TimedRoute notes when the endpoint returns, so the time from there to the
+response start (response validation and serialization) is reported on its own.
+"""
+import asyncio
+import functools
+import inspect
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from app.core.config import settings
+
+slow_query_log = logging.getLogger("app.sql.slow")
+
+# Set False to turn all of it off (the middleware then only passes requests through)
+enabled = settings.METRICS_ENABLED
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, rendered in Prometheus text format."""
+
+    def __init__(self, name: str, help: str, labels: tuple, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  # label values -> [count per bucket (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, values: tuple, amount: float):
+        index = bisect_left(self.buckets, amount)
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += amount
+
+    def render(self, lines: list):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} histogram")
+        with self._lock:
+            series = [(values, list(counts), total) for values, (counts, total) in self._series.items()]
+        for values, counts, total in sorted(series):
+            labels = _labels(self.labels, values)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels}{"," if labels else ""}le="{bound}"}} {cumulative}')
+            lines.append(f"{_series(self.name + '_sum', labels)} {total}")
+            lines.append(f"{_series(self.name + '_count', labels)} {cumulative}")
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, values: tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def render(self, lines: list):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} {self.type}")
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            lines.append(f"{_series(self.name, _labels(self.labels, label_values))} {value}")
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, values: tuple = (), amount: float = 0):
+        with self._lock:
+            self._values[values] = amount
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _series(name: str, labels: str) -> str:
+    return f"{name}{{{labels}}}" if labels else name
+
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Time from request to end of response body.", ("method", "route", "status"))
+REQUEST_SQL_SECONDS = Histogram("http_request_sql_duration_seconds", "SQL time per request.", ("method", "route"))
+REQUEST_QUERIES = Histogram("http_request_sql_queries", "SQL statements per request.", ("method", "route"), QUERY_COUNT_BUCKETS)
+REQUEST_SERIALIZE_SECONDS = Histogram(
+    "http_request_serialize_duration_seconds", "Endpoint return to response start (response validation and encoding).", ("method", "route"))
+EXTERNAL_SECONDS = Histogram("external_call_duration_seconds", "Upstream call latency.", ("service", "outcome"))
+SLOW_QUERIES = Counter("sql_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS.")
+AI_BATCH_SIZE = Histogram("ai_parse_batch_size", "Texts per Gemini parse call.", (), (1, 2, 4, 8, 16, 32, 64))
+AI_BATCH_FALLBACKS = Counter("ai_parse_batch_fallbacks_total", "Batched texts re-sent on their own after an invalid batch answer.")
+REMINDERS_SENT = Counter("reminders_sent_total", "Reminders handed to the reminder sink.", ("kind",))
+REMINDER_SINK_ERRORS = Counter("reminder_sink_errors_total", "Reminder batches the sink failed to take (dropped).")
+CACHE_LOOKUPS = Counter("cache_lookups_total", "In-process cache lookups.", ("cache", "result"))
+CACHE_ENTRIES = Gauge("cache_entries", "Entries held by an in-process cache.", ("cache",))
+METRICS = (REQUEST_SECONDS, REQUEST_SQL_SECONDS, REQUEST_QUERIES, REQUEST_SERIALIZE_SECONDS, EXTERNAL_SECONDS, SLOW_QUERIES,
+           AI_BATCH_SIZE, AI_BATCH_FALLBACKS, REMINDERS_SENT, REMINDER_SINK_ERRORS, CACHE_LOOKUPS, CACHE_ENTRIES)
+
+
+def render() -> bytes:
+    lines = []
+    for metric in METRICS:
+        metric.render(lines)
+    return ("\n".join(lines) + "\n").encode()
+
+
+class RequestTimings:
+    __slots__ = ("queries", "sql_seconds", "external", "endpoint_done")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.external = {}  # service -> seconds
+        self.endpoint_done = None  # perf_counter() when the endpoint returned
+
+    def server_timing(self, total: float, serialize: float) -> str:
+        parts = [f'db;dur={self.sql_seconds * 1000:.2f};desc="{self.queries} queries"']
+        parts += [f"{service};dur={seconds * 1000:.2f}" for service, seconds in self.external.items()]
+        if serialize is not None:
+            parts.append(f"serialize;dur={serialize * 1000:.2f}")
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+current = ContextVar("request_timings", default=None)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (streaming bodies pass straight through)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not enabled:
+            return await self.app(scope, receive, send)
+
+        timings = RequestTimings()
+        token = current.set(timings)
+        start = time.perf_counter()
+        status = 500
+        serialize = None
+
+        async def send_with_timing(message):
+            nonlocal status, serialize
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                now = time.perf_counter()
+                if timings.endpoint_done is not None:
+                    serialize = now - timings.endpoint_done
+                if settings.SERVER_TIMING_ENABLED:
+                    MutableHeaders(scope=message).append("Server-Timing", timings.server_timing(now - start, serialize))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current.reset(token)
+            labels = (scope["method"], route_template(scope))
+            REQUEST_SECONDS.observe(labels + (status,), time.perf_counter() - start)
+            REQUEST_SQL_SECONDS.observe(labels, timings.sql_seconds)
+            REQUEST_QUERIES.observe(labels, timings.queries)
+            if serialize is not None:
+                REQUEST_SERIALIZE_SECONDS.observe(labels, serialize)
+
+
+def route_template(scope) -> str:
+    """The matched route's path template, e.g. /tasks/{task_id}, so ids don't
+    multiply the series. An included router's route only knows its own part of
+    the path; the rest is the (static) include prefix, which ends where the
+    route's pattern starts to match."""
+    route = scope.get("route")
+    regex = getattr(route, "path_regex", None)
+    if regex is None:
+        return "unmatched"
+    path = scope["path"]
+    start = 0
+    while start != -1:
+        if regex.match(path[start:]):
+            return path[:start] + route.path
+        start = path.find("/", start + 1)
+    return route.path
+
+
+def _timed_endpoint(endpoint):
+    def done():
+        timings = current.get()
+        if timings is not None:
+            timings.endpoint_done = time.perf_counter()
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def timed(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                done()
+    elif inspect.isasyncgenfunction(endpoint) or inspect.isgeneratorfunction(endpoint):
+        return endpoint  # streamed; there is no separate serialization step
+    else:
+        @functools.wraps(endpoint)
+        def timed(*args, **kwargs):
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                done()
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that records when its endpoint returns (see module docstring)."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+
+@contextmanager
+def external_call(service: str):
+    """Times the block as a call to `service`; the outcome label is ok, timeout or error."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    except (asyncio.TimeoutError, TimeoutError):
+        outcome = "timeout"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        if enabled:
+            EXTERNAL_SECONDS.observe((service, outcome), elapsed)
+            timings = current.get()
+            if timings is not None:
+                timings.external[service] = timings.external.get(service, 0.0) + elapsed
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    timings = current.get()
+    if timings is not None:
+        timings.queries += 1
+        timings.sql_seconds += elapsed
+    if settings.SLOW_QUERY_MS and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        SLOW_QUERIES.inc()
+        # Statement only: parameters can hold user data
+        slow_query_log.warning("%.1f ms%s: %s", elapsed * 1000, " (many)" if executemany else "",
+                               re.sub(r"\s+", " ", statement)[:2000])
+
+
+def instrument_engine(engine):
+    """Adds the timing hooks to a (sync) Engine; for an AsyncEngine pass its .sync_engine."""
+    if enabled:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,71 @@
+import heapq
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Iterator, Optional, Tuple
+
+# recurrence_types.id values (see app/core/enums.py and get_prompt)
+NONE = 1
+DAILY = 2
+WEEKLY = 3
+WEEKDAYS = 4
+WEEKENDS = 5
+
+_STEP_DAYS = {DAILY: 1, WEEKLY: 7}
+_ALLOWED_WEEKDAYS = {WEEKDAYS: frozenset(range(0, 5)), WEEKENDS: frozenset((5, 6))}
+
+
+def occurrences(
+    due_date: datetime,
+    recurrence_type_id: int,
+    recurrence_end_date: Optional[date],
+    window_start: datetime,
+    window_end: datetime,
+) -> Iterator[datetime]:
+    """Yield the occurrences of a task that fall in [window_start, window_end).
+
+    The series starts at due_date. The first occurrence inside the window is
+    computed directly, so the cost depends on the window, not on how long the
+    series has been running.
+    """
+    if due_date is None:
+        return
+    last = window_end
+    if recurrence_end_date is not None:
+        # recurrence_end_date is inclusive
+        last = min(last, datetime.combine(recurrence_end_date + timedelta(days=1), time.min))
+
+    if recurrence_type_id not in _STEP_DAYS and recurrence_type_id not in _ALLOWED_WEEKDAYS:
+        if window_start <= due_date < window_end:
+            yield due_date
+        return
+
+    # First candidate day on or after window_start, at the series' time of day
+    skipped_days = 0
+    if due_date < window_start:
+        skipped_days = -((due_date - window_start) // timedelta(days=1))
+
+    step = _STEP_DAYS.get(recurrence_type_id)
+    if step is not None:
+        skipped_days = -(-skipped_days // step) * step
+        current = due_date + timedelta(days=skipped_days)
+        while current < last:
+            yield current
+            current += timedelta(days=step)
+        return
+
+    allowed = _ALLOWED_WEEKDAYS[recurrence_type_id]
+    current = due_date + timedelta(days=skipped_days)
+    while current < last:
+        if current.weekday() in allowed:
+            yield current
+        current += timedelta(days=1)
+
+
+def merge_occurrences(series: Iterable[Tuple[object, Iterator[datetime]]]) -> Iterator[Tuple[datetime, object]]:
+    """Lazily merge per-item occurrence streams into one stream ordered by date."""
+    def tagged(index, item, stream):
+        for when in stream:
+            yield when, index, item
+
+    streams = [tagged(index, item, stream) for index, (item, stream) in enumerate(series)]
+    for when, _, item in heapq.merge(*streams):
+        yield when, item
@@ -0,0 +1,335 @@
+"""Due-date reminders from an in-process scheduler.
+
+ReminderScheduler keeps the next upcoming reminders (open tasks at their
+due_date, events at their start_time, REMINDER_LEAD_MINUTES early) in a
+min-heap and sleeps until the first one. The heap is filled by keyset scans of
+the due_date and start_time indexes: each kind has a cursor, every reminder up
+to it is in the heap, and when fewer than half of REMINDER_BATCH_SIZE are left
+the next batch after it is read. Memory and every query are bounded by the
+batch size however many reminders are pending, and no query starts over from
+the beginning of a table.
+
+Writes reach it through the collection versions (app.db.versioning): a task
+or event write in any worker stamps the user's collection_versions row. Every
+REMINDER_SYNC_SECONDS the rows stamped since the last sync are read (a range
+on their updated_at index) and those users' reminders up to the cursor are
+reloaded from the (user_id, due_date) / (user_id, start_time) indexes; later
+ones come with the scan. A sent reminder is not sent again unless an edit
+moves it later.
+
+Reminders that came due while no scheduler ran are not sent late. Enable it in
+one process only (REMINDERS_ENABLED): each scheduler sends every reminder.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+from sqlalchemy import and_, func, or_, select, true
+from starlette.concurrency import run_in_threadpool
+from app.core import fastjson, metrics
+from app.core.config import settings
+from app.core.lookups import lookup_cache
+from app.core.metrics import REMINDER_SINK_ERRORS, REMINDERS_SENT
+from app.models.event import Event
+from app.models.sync import CollectionVersion
+from app.models.task import Task
+
+log = logging.getLogger("app.reminders")
+
+# kind -> (model, reminder time column, collection whose version its writes bump)
+KINDS = {
+    "task": (Task, Task.due_date, "tasks"),
+    "event": (Event, Event.start_time, "events"),
+}
+_KIND_OF = {collection: kind for kind, (_, _, collection) in KINDS.items()}
+
+# Stamps this much older than the newest one seen are read again: a write can
+# commit after a sync that ran while its transaction was open
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class Reminder(NamedTuple):
+    kind: str
+    id: int
+    user_id: int
+    title: str
+    due_at: datetime
+    remind_at: datetime
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class LogSink:
+    """Writes each reminder to the app.reminders log."""
+
+    async def send(self, reminders: list):
+        for r in reminders:
+            log.info("reminder: %s %s of user %s, %r at %s", r.kind, r.id, r.user_id, r.title, r.due_at.isoformat())
+
+
+class QueueSink:
+    """Puts reminders on an asyncio.Queue for a consumer in the same process.
+    When the queue is full new reminders are dropped (and counted)."""
+
+    def __init__(self, maxsize: int = 10000):
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    async def send(self, reminders: list):
+        for r in reminders:
+            try:
+                self.queue.put_nowait(r)
+            except asyncio.QueueFull:
+                self.dropped += 1
+
+
+class WebhookSink:
+    """POSTs each batch to `url` as a JSON list, from the threadpool. No retries:
+    a batch that fails is logged and dropped."""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    async def send(self, reminders: list):
+        await run_in_threadpool(self._post, fastjson.dumps([r._asdict() for r in reminders]))
+
+    def _post(self, body: bytes):
+        import urllib.request  # only when a webhook is configured; it pulls in http.client
+
+        request = urllib.request.Request(self.url, data=body, method="POST", headers={"Content-Type": "application/json"})
+        with metrics.external_call("webhook"), urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+def make_sink(name: str = None):
+    name = name or settings.REMINDER_SINK
+    if name == "log":
+        return LogSink()
+    if name == "queue":
+        return QueueSink()
+    if name == "webhook":
+        if not settings.REMINDER_WEBHOOK_URL:
+            raise ValueError("REMINDER_SINK=webhook needs REMINDER_WEBHOOK_URL.")
+        return WebhookSink(settings.REMINDER_WEBHOOK_URL)
+    raise ValueError(f"Unknown REMINDER_SINK {name!r} (log, queue or webhook).")
+
+
+def _after(column, id_column, key):
+    # (column, id) > key; the column bound alone keeps it an index range
+    return and_(column >= key[0], or_(column > key[0], id_column > key[1]))
+
+
+def _up_to(column, id_column, key):
+    # (column, id) <= key
+    return and_(column <= key[0], or_(column < key[0], id_column <= key[1]))
+
+
+class ReminderScheduler:
+    def __init__(self, engine, sink, lead: timedelta = None, batch_size: int = None, sync_seconds: float = None, clock=utcnow):
+        self.engine = engine
+        self.sink = sink
+        self.lead = timedelta(minutes=settings.REMINDER_LEAD_MINUTES) if lead is None else lead
+        self.batch_size = batch_size or settings.REMINDER_BATCH_SIZE
+        self.sync_seconds = settings.REMINDER_SYNC_SECONDS if sync_seconds is None else sync_seconds
+        self.clock = clock
+        self.sent = 0
+        self.queries = 0
+        self._heap = []  # [remind_at, seq, Reminder]; the Reminder is None once cancelled
+        self._seq = itertools.count()
+        self._entries = {}  # (kind, id) -> its live heap entry
+        self._by_user = defaultdict(set)  # (user_id, kind) -> ids with a live entry
+        self._pending = dict.fromkeys(KINDS, 0)
+        self._cursor = {}  # kind -> (time, id): every reminder up to it has been read
+        self._exhausted = dict.fromkeys(KINDS, False)  # ... and nothing is after it
+        self._versions = {}  # (user_id, collection) -> (version, updated_at) seen by the last syncs
+        self._watermark = None
+        self._next_sync = 0.0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        while True:
+            try:
+                delay = await self.tick()
+            except Exception:
+                log.exception("reminder scheduler step failed")
+                delay = max(self.sync_seconds, 1.0)
+            await asyncio.sleep(delay)
+
+    async def tick(self) -> float:
+        """One round: send what is due, sync writes when it is time, refill.
+        Returns the seconds until the next round is needed."""
+        loop = asyncio.get_running_loop()
+        now = self.clock()
+        if self._watermark is None:
+            self._watermark = await run_in_threadpool(self._latest_stamp)
+            for kind in KINDS:
+                self._cursor[kind] = (now + self.lead, 0)
+
+        due = self._pop_due(now)
+        if due:
+            await self._send(due)
+        if loop.time() >= self._next_sync:
+            await self._sync(now)
+            self._next_sync = loop.time() + self.sync_seconds
+        for kind in KINDS:
+            if not self._exhausted[kind] and self._pending[kind] < self.batch_size // 2:
+                limit = self.batch_size - self._pending[kind]
+                rows = await run_in_threadpool(self._scan, kind, self._cursor[kind], limit)
+                self._add(kind, rows)
+                if len(rows) < limit:
+                    self._exhausted[kind] = True
+                else:
+                    self._cursor[kind] = (rows[-1].due_at, rows[-1].id)
+
+        delay = self._next_sync - loop.time()
+        if self._heap:
+            delay = min(delay, (self._heap[0][0] - self.clock()).total_seconds())
+        return max(delay, 0.0)
+
+    def stats(self) -> dict:
+        return {
+            "pending": dict(self._pending),
+            "heap_size": len(self._heap),
+            "sent": self.sent,
+            "queries": self.queries,
+            "next": self._heap[0][0] if self._heap else None,
+        }
+
+    # Heap
+
+    def _add(self, kind: str, rows):
+        for row in rows:
+            key = (kind, row.id)
+            if key in self._entries:
+                self._cancel(key)
+            reminder = Reminder(kind, row.id, row.user_id, row.title, row.due_at, row.due_at - self.lead)
+            entry = [reminder.remind_at, next(self._seq), reminder]
+            heapq.heappush(self._heap, entry)
+            self._entries[key] = entry
+            self._by_user[(row.user_id, kind)].add(row.id)
+            self._pending[kind] += 1
+
+    def _cancel(self, key):
+        entry = self._entries.pop(key)
+        reminder, entry[2] = entry[2], None
+        self._forget(reminder)
+        # Cancelled entries stay in the heap until popped; rebuild once they are most of it
+        if len(self._heap) > 2 * len(self._entries) + self.batch_size:
+            self._heap = [e for e in self._heap if e[2] is not None]
+            heapq.heapify(self._heap)
+
+    def _forget(self, reminder: Reminder):
+        ids = self._by_user[(reminder.user_id, reminder.kind)]
+        ids.discard(reminder.id)
+        if not ids:
+            del self._by_user[(reminder.user_id, reminder.kind)]
+        self._pending[reminder.kind] -= 1
+
+    def _pop_due(self, now: datetime) -> list:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            reminder = heapq.heappop(self._heap)[2]
+            if reminder is not None:
+                del self._entries[(reminder.kind, reminder.id)]
+                self._forget(reminder)
+                due.append(reminder)
+        return due
+
+    async def _send(self, reminders: list):
+        try:
+            await self.sink.send(reminders)
+        except Exception:
+            REMINDER_SINK_ERRORS.inc()
+            log.exception("reminder sink failed; %d reminders dropped", len(reminders))
+            return
+        self.sent += len(reminders)
+        for kind, count in Counter(r.kind for r in reminders).items():
+            REMINDERS_SENT.inc((kind,), count)
+
+    async def _sync(self, now: datetime):
+        since = self._watermark - SYNC_OVERLAP
+        stamps = await run_in_threadpool(self._read_stamps, since)
+        changed = []
+        for user_id, collection, version, stamped in stamps:
+            key = (user_id, collection)
+            if self._versions.get(key, (None,))[0] != version:
+                changed.append((user_id, _KIND_OF[collection]))
+            self._versions[key] = (version, stamped)
+            self._watermark = max(self._watermark, stamped)
+        for key in [k for k, (_, stamped) in self._versions.items() if stamped < since]:
+            del self._versions[key]
+        if not changed:
+            return
+
+        limits = {kind: None if self._exhausted[kind] else self._cursor[kind] for kind in KINDS}
+        reloaded = await run_in_threadpool(self._user_rows, changed, now + self.lead, limits)
+        for (user_id, kind), rows in zip(changed, reloaded):
+            for row_id in list(self._by_user.get((user_id, kind), ())):
+                self._cancel((kind, row_id))
+            self._add(kind, rows)
+            if len(rows) == self.batch_size:
+                # Not all of this user's were read: move the cursor back to the last one
+                last = (rows[-1].due_at, rows[-1].id)
+                if self._exhausted[kind] or last < self._cursor[kind]:
+                    self._cursor[kind], self._exhausted[kind] = last, False
+
+    # Queries (run in the threadpool)
+
+    def _select(self, kind: str):
+        model, column, _ = KINDS[kind]
+        stmt = select(model.id, model.user_id, model.title, column.label("due_at"))
+        if kind == "task":
+            final_ids = [row["id"] for row in lookup_cache.snapshot().rows("statuses").values() if row["is_final"]]
+            stmt = stmt.where(Task.status_id.notin_(final_ids) if final_ids else true())
+        return stmt.order_by(column, model.id)
+
+    def _latest_stamp(self) -> datetime:
+        with self.engine.connect() as conn:
+            self.queries += 1
+            return conn.execute(select(func.max(CollectionVersion.updated_at))).scalar() or self.clock()
+
+    def _scan(self, kind: str, cursor: tuple, limit: int) -> list:
+        model, column, _ = KINDS[kind]
+        with self.engine.connect() as conn:
+            self.queries += 1
+            return conn.execute(self._select(kind).where(_after(column, model.id, cursor)).limit(limit)).all()
+
+    def _read_stamps(self, since: datetime) -> list:
+        stmt = select(CollectionVersion.user_id, CollectionVersion.collection, CollectionVersion.version,
+                      CollectionVersion.updated_at).where(
+            CollectionVersion.updated_at >= since, CollectionVersion.collection.in_(list(_KIND_OF)))
+        with self.engine.connect() as conn:
+            self.queries += 1
+            return conn.execute(stmt).all()
+
+    def _user_rows(self, changed: list, after: datetime, limits: dict) -> list:
+        """For each (user_id, kind): the user's reminders due after `after` and,
+        unless the kind's limit is None, up to that (time, id)."""
+        results = []
+        with self.engine.connect() as conn:
+            for user_id, kind in changed:
+                model, column, _ = KINDS[kind]
+                stmt = self._select(kind).where(model.user_id == user_id, column > after)
+                if limits[kind] is not None:
+                    stmt = stmt.where(_up_to(column, model.id, limits[kind]))
+                self.queries += 1
+                results.append(conn.execute(stmt.limit(self.batch_size)).all())
+        return results
@@ -0,0 +1,51 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
+from app.core.config import settings
+from app.core.metrics import CACHE_ENTRIES, CACHE_LOOKUPS
+
+
+class StatsCache:
+    """Per-user LRU + TTL cache of encoded /stats bodies.
+
+    An entry is only used while its key still matches: the route keys entries
+    on the user's task and event collection versions, which every write bumps
+    (app.db.versioning), so a write in any worker invalidates them, and on the
+    minute of `now`, which decides what is overdue and which week it is.
+    Hits, misses and size are in /metrics (cache="stats").
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # user_id -> (expires_at, key, body, etag)
+
+    def get(self, user_id: int, key) -> Optional[tuple]:
+        """(body, etag) if there is a live entry for `key`."""
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] <= time.monotonic() or entry[1] != key:
+            CACHE_LOOKUPS.inc(("stats", "miss"))
+            return None
+        self._entries.move_to_end(user_id)
+        CACHE_LOOKUPS.inc(("stats", "hit"))
+        return entry[2], entry[3]
+
+    def set(self, user_id: int, key, body: bytes) -> tuple:
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        self._entries[user_id] = (time.monotonic() + self.ttl, key, body, etag)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        CACHE_ENTRIES.set(("stats",), len(self._entries))
+        return body, etag
+
+    def invalidate(self, user_id: Optional[int] = None):
+        if user_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(user_id, None)
+        CACHE_ENTRIES.set(("stats",), len(self._entries))
+
+
+stats_cache = StatsCache(settings.STATS_CACHE_SIZE, settings.STATS_CACHE_TTL_SECONDS)
@@ -0,0 +1,10 @@
+from datetime import datetime, timezone
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Stored times are naive UTC. Aware input (e.g. "...Z" from toISOString())
+    is converted to UTC and made naive to compare with them; naive input is
+    taken as is."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
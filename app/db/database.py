@@ -1,15 +1,81 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.metrics import instrument_engine
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-# MySQL Database engine:
-# engine = create_engine(SQLALCHEMY_DATABASE_URL)
 
-# SQLite Database engine:
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL: readers don't block the writer; NORMAL is durable across app crashes
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def build_engine(url: str):
+    """Creates an engine tuned for the URL's dialect (SQLite file/memory or a server DB)."""
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000},
+        )
+        if make_url(url).database not in (None, "", ":memory:"):
+            event.listen(engine, "connect", _sqlite_pragmas)
+    else:
+        # MySQL / PostgreSQL
+        engine = create_engine(
+            url,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+    instrument_engine(engine)
+    return engine
+
+
+# Async drivers used for the AsyncSession stack
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def build_async_engine(url: str):
+    """Async counterpart of build_engine(), same tuning, async driver."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    async_url = url.set(drivername=ASYNC_DRIVERS.get(backend, url.drivername))
+    if backend == "sqlite":
+        engine = create_async_engine(async_url, connect_args={"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000})
+        if url.database not in (None, "", ":memory:"):
+            event.listen(engine.sync_engine, "connect", _sqlite_pragmas)
+    else:
+        engine = create_async_engine(
+            async_url,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
+engine = build_engine(SQLALCHEMY_DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -20,4 +86,24 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# Created on first use so the async driver is only imported when needed.
+async_engine = None
+AsyncSessionLocal = None
+
+
+def init_async_engine():
+    global async_engine, AsyncSessionLocal
+    if async_engine is None:
+        async_engine = build_async_engine(SQLALCHEMY_DATABASE_URL)
+        # No expiry on commit: attributes can't lazy-load outside an await
+        AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return async_engine
+
+
+async def get_async_db():
+    init_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,178 @@
+"""Index coverage check for the router queries.
+
+Drives every DB-backed route and the reminder scheduler against a throwaway
+SQLite database, runs EXPLAIN QUERY PLAN on each statement they issued and
+exits non-zero if any of them falls back to a full table scan or SQLAlchemy
+warned about an implicit cross join (a FROM element without a join condition;
+SQLite may still plan it on an index, reading every row the other filters
+leave).
+
+    python -m app.db.explain_check
+"""
+import os
+import re
+import sys
+import tempfile
+import warnings
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.exc import SAWarning
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.reminders import QueueSink, ReminderScheduler
+from app.db.database import build_async_engine, build_engine, get_async_db, get_db
+from app.db.migrations import migrate
+
+FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)(\S+)(?: AS \S+)?$")
+# Subqueries in FROM. Scanning one reads the subquery's output, whose own plan lines are checked too.
+DERIVED = re.compile(r"^(?:CO-ROUTINE|MATERIALIZE) (\S+)$")
+
+
+def exercise_routes(client: TestClient):
+    user_id = client.post("/auth/register", json={"username": "explain", "email": "explain@example.com", "password": "x"}).json()["id"]
+    client.post("/auth/login", json={"email": "explain@example.com", "password": "x"})
+    q = {"user_id": user_id}
+
+    category_id = client.post("/categories/", params=q, json={"name": "School"}).json()["id"]
+    client.get("/categories/", params=q)
+    client.get("/categories/", params={**q, "limit": 1})
+    client.get(f"/categories/{category_id}", params=q)
+    client.put(f"/categories/{category_id}", params=q, json={"name": "Work"})
+
+    task_ids = [
+        client.post("/tasks/", params=q, json={"title": f"Task {i}", "category_id": category_id, "due_date": f"2025-01-0{i + 1}T10:00:00"}).json()["id"]
+        for i in range(3)
+    ]
+    subtask_id = client.post(f"/tasks/{task_ids[0]}/subtasks/", params=q, json={"title": "Step"}).json()["id"]
+    client.get("/tasks/", params=q)
+    page = client.get("/tasks/", params={**q, "limit": 1, "status_id": 1, "priority_id": 2, "category_id": category_id, "due_from": "2025-01-01T00:00:00", "due_to": "2025-02-01T00:00:00"})
+    client.get("/tasks/", params={**q, "limit": 1, "cursor": page.headers.get("X-Next-Cursor")})
+    client.get("/tasks/agenda", params={**q, "from": "2025-01-01T00:00:00", "to": "2025-01-08T00:00:00"})
+    client.get(f"/tasks/{task_ids[0]}", params=q)
+    client.put(f"/tasks/{task_ids[0]}", params=q, json={"status_id": 2})
+    client.put(f"/tasks/subtasks/{subtask_id}", params=q, json={"is_completed": True})
+    client.delete(f"/tasks/subtasks/{subtask_id}", params=q)
+
+    batch_ids = [r["id"] for r in client.post("/tasks/batch", params=q, json=[{"title": "Batch 1"}, {"title": "Batch 2"}]).json()["results"]]
+    client.patch("/tasks/batch", params=q, json=[{"id": batch_ids[0], "status_id": 2}, {"id": batch_ids[1], "title": "Renamed"}])
+    batch_subtasks = [r["id"] for r in client.post("/tasks/subtasks/batch", params=q, json=[{"task_id": i, "title": "Step"} for i in batch_ids]).json()["results"]]
+    client.patch("/tasks/subtasks/batch", params=q, json=[{"id": i, "is_completed": True} for i in batch_subtasks])
+    client.post("/tasks/subtasks/batch/delete", params=q, json={"ids": batch_subtasks[:1]})
+    client.post("/tasks/batch/delete", params=q, json={"ids": batch_ids})
+
+    event_id = client.post("/events/", params=q, json={"title": "Quiz", "start_time": "2025-02-01T09:00:00", "end_time": "2025-02-01T10:00:00"}).json()["id"]
+    page = client.get("/events/", params={**q, "limit": 1, "start_from": "2025-01-01T00:00:00", "start_to": "2025-03-01T00:00:00"})
+    client.get("/events/", params={**q, "limit": 1, "cursor": page.headers.get("X-Next-Cursor") or ""})
+    client.get("/events/range", params={**q, "from": "2025-02-01T00:00:00", "to": "2025-02-02T00:00:00"})
+    client.get(f"/events/{event_id}", params=q)
+    client.put(f"/events/{event_id}", params=q, json={"location": "B101"})
+    client.post("/events/", params={**q, "check_conflicts": True}, json={"title": "Lab", "start_time": "2025-02-01T09:30:00", "end_time": "2025-02-01T11:00:00"})
+    client.put(f"/events/{event_id}", params={**q, "check_conflicts": True}, json={"end_time": "2025-02-01T10:30:00"})
+    client.get("/events/free-busy", params={**q, "from": "2025-02-01T00:00:00", "to": "2025-02-08T00:00:00"})
+
+    note_id = client.post("/notes/", params=q, json={"title": "Topics", "content": "Pointers", "event_id": event_id, "category_id": category_id}).json()["id"]
+    client.get("/notes/", params={**q, "event_id": event_id, "category_id": category_id, "limit": 1})
+    client.get(f"/notes/{note_id}", params=q)
+    client.put(f"/notes/{note_id}", params=q, json={"content": "Pointers, Structs"})
+    client.get("/search/", params={**q, "q": "pointers"})
+    client.get("/search/", params={**q, "q": "struct", "kinds": "notes"})
+    client.get("/stats/", params={**q, "now": "2025-01-03T12:00:00"})
+    export = client.get("/workspace/export", params=q).content
+    client.post("/workspace/import", params=q, content=export)
+
+    client.delete(f"/tasks/{task_ids[1]}", params=q)
+    client.delete(f"/events/{event_id}")
+    client.delete(f"/categories/{category_id}", params=q)
+    client.delete(f"/notes/{note_id}")
+
+    for collection in ("tasks", "events", "notes"):
+        etag = client.get(f"/{collection}/", params=q).headers.get("ETag", "")
+        client.get(f"/{collection}/", params=q, headers={"If-None-Match": etag})
+        client.get(f"/{collection}/changes", params={**q, "since": 1})
+
+
+def exercise_reminders(client: TestClient, engine):
+    """The reminder scheduler's scans, write sync and per-user reloads."""
+    user_id = client.post("/auth/register", json={"username": "remind", "email": "remind@example.com", "password": "x"}).json()["id"]
+    q = {"user_id": user_id}
+    task_ids = [client.post("/tasks/", params=q, json={"title": f"Due {i}", "due_date": f"2025-03-0{i + 1}T10:00:00"}).json()["id"] for i in range(3)]
+    client.post("/events/", params=q, json={"title": "Exam", "start_time": "2025-03-02T09:00:00", "end_time": "2025-03-02T11:00:00"})
+    scheduler = ReminderScheduler(engine, QueueSink(), batch_size=2, sync_seconds=0, clock=lambda: datetime(2025, 3, 1))
+    client.portal.call(scheduler.tick)
+    client.put(f"/tasks/{task_ids[0]}", params=q, json={"due_date": "2025-03-05T10:00:00"})
+    client.portal.call(scheduler.tick)
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'explain.db')}"
+        engine = build_engine(url)
+        async_engine = build_async_engine(url)
+        migrate(engine)
+        TestingSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        AsyncTestingSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+        def override_get_db():
+            db = TestingSession()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        async def override_get_async_db():
+            async with AsyncTestingSession() as db:
+                yield db
+
+        statements = {}
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                statements.setdefault(statement, parameters)
+
+        engines = (engine, async_engine.sync_engine)
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        app.state.engine = engine  # the lifespan checks and loads this one
+        try:
+            with TestClient(app) as client:
+                # After startup, whose lookup table loads read every row on purpose
+                for e in engines:
+                    event.listen(e, "before_cursor_execute", record)
+                with warnings.catch_warnings(record=True) as caught:
+                    warnings.simplefilter("always", SAWarning)
+                    exercise_routes(client)
+                    exercise_reminders(client, engine)
+                client.portal.call(async_engine.dispose)
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            app.dependency_overrides.pop(get_async_db, None)
+            del app.state.engine
+        for e in engines:
+            event.remove(e, "before_cursor_execute", record)
+
+        failures = []
+        with engine.connect() as conn:
+            raw = conn.connection.dbapi_connection
+            for statement, parameters in statements.items():
+                plan = [row[-1] for row in raw.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+                derived = {m.group(1) for m in map(DERIVED.match, plan) if m}
+                scans = [detail for detail in plan if (m := FULL_SCAN.match(detail)) and m.group(1) not in derived]
+                if scans:
+                    failures.append((statement, plan))
+        engine.dispose()
+
+    cross_joins = sorted({str(w.message) for w in caught if "cartesian product" in str(w.message)})
+    print(f"Checked {len(statements)} statements.")
+    for statement, plan in failures:
+        print(f"\nFULL TABLE SCAN:\n{statement}")
+        for detail in plan:
+            print(f"  {detail}")
+    for message in cross_joins:
+        print(f"\nCROSS JOIN:\n{message}")
+    return 1 if failures or cross_joins else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, func, insert, inspect, literal, select, text, update
+from app.core.lookups import SEED
+from app.db.database import Base
+from app.db.search import search_backend
+from app.models import user, task, category, event, note, lookups, sync  # noqa: F401 (register tables)
+from app.models.event import Event, duration_bucket
+from app.models.note import Note
+from app.models.sync import CollectionVersion
+from app.models.task import Task, Subtask
+
+# Applied versions are tracked in their own metadata so Base.metadata.create_all
+# never touches this table.
+migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("applied_at", DateTime, server_default=func.now()),
+)
+
+
+def _initial_schema(conn):
+    Base.metadata.create_all(bind=conn)
+
+
+def _per_user_indexes(conn):
+    # Tables created before the indexes were declared on the models don't get
+    # them from create_all, so create whatever is missing. Indexes on columns a
+    # later step adds are left to that step.
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for index in table.indexes:
+            if {c.name for c in index.columns} <= existing:
+                index.create(bind=conn, checkfirst=True)
+
+
+def _event_duration_buckets(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns("events")}
+    if "duration_bucket" not in columns:
+        conn.execute(text("ALTER TABLE events ADD COLUMN duration_bucket SMALLINT NOT NULL DEFAULT 0"))
+
+    rows = conn.execute(select(Event.id, Event.start_time, Event.end_time)).all()
+    updates = [{"event_id": r.id, "bucket": duration_bucket(r.start_time, r.end_time)} for r in rows]
+    if updates:
+        conn.execute(text("UPDATE events SET duration_bucket = :bucket WHERE id = :event_id"), updates)
+    _per_user_indexes(conn)
+
+
+def _seed_lookups(conn):
+    for model, rows in SEED.items():
+        existing = set(conn.execute(select(model.id)).scalars())
+        missing = [row for row in rows if row["id"] not in existing]
+        if missing:
+            conn.execute(model.__table__.insert(), missing)
+
+
+def _sync_versions(conn):
+    # New tables only; existing ones are left alone by create_all
+    Base.metadata.create_all(bind=conn)
+    inspector = inspect(conn)
+    for model in (Task, Event, Note):
+        table = model.__table__
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        if "version" not in existing:
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN version INTEGER NOT NULL DEFAULT 0"))
+        if "updated_at" not in existing:
+            column_type = table.c.updated_at.type.compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN updated_at {column_type}"))
+
+        # Existing rows become version 1 so a since=0 delta returns them
+        # (updated_at is set explicitly, otherwise its onupdate would stamp now())
+        known = [c for c in (table.c.updated_at, table.c.get("created_at")) if c is not None]
+        conn.execute(update(table).where(table.c.version == 0).values(version=1, updated_at=func.coalesce(*known, func.now())))
+        users_with_rows = select(table.c.user_id, literal(table.name), literal(1)).distinct().where(
+            ~select(CollectionVersion.user_id).where(
+                CollectionVersion.user_id == table.c.user_id, CollectionVersion.collection == table.name
+            ).exists()
+        )
+        conn.execute(insert(CollectionVersion.__table__).from_select(["user_id", "collection", "version"], users_with_rows))
+    _per_user_indexes(conn)
+
+
+def _full_text_search(conn):
+    search_backend(conn.dialect.name).create_index(conn)
+
+
+def _stats_indexes(conn):
+    _per_user_indexes(conn)
+    # Superseded by ix_subtasks_task_id_is_completed
+    if "ix_subtasks_task_id" in {i["name"] for i in inspect(conn).get_indexes("subtasks")}:
+        Index("ix_subtasks_task_id", Subtask.__table__.c.task_id).drop(bind=conn)
+
+
+# Append only. Each step runs in its own transaction, in order.
+MIGRATIONS = [
+    (1, "initial schema", _initial_schema),
+    (2, "per-user composite indexes", _per_user_indexes),
+    (3, "event duration buckets", _event_duration_buckets),
+    (4, "recurring task index", _per_user_indexes),
+    (5, "seed lookup tables", _seed_lookups),
+    (6, "sync versions and tombstones", _sync_versions),
+    (7, "full-text search index", _full_text_search),
+    (8, "dashboard stats indexes", _stats_indexes),
+    (9, "reminder scheduler indexes", _per_user_indexes),
+]
+
+
+def current_version(conn) -> int:
+    return conn.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+
+
+def pending_migrations(engine) -> list:
+    """(version, name) of the steps migrate() would apply; read-only."""
+    with engine.connect() as conn:
+        applied = current_version(conn) if inspect(conn).has_table(schema_migrations.name) else 0
+    return [(version, name) for version, name, _ in MIGRATIONS if version > applied]
+
+
+def migrate(engine) -> list:
+    """Applies the missing steps and returns their (version, name)."""
+    migration_metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        applied = current_version(conn)
+
+    done = []
+    for version, name, step in MIGRATIONS:
+        if version <= applied:
+            continue
+        with engine.begin() as conn:
+            step(conn)
+            conn.execute(schema_migrations.insert().values(version=version, name=name))
+        done.append((version, name))
+    return done
+
+
+if __name__ == "__main__":
+    # One-off schema step, run before starting (or restarting) the workers:
+    #     python -m app.db.migrations
+    from app.db.database import engine
+
+    applied = migrate(engine)
+    for version, name in applied:
+        print(f"applied {version}: {name}")
+    print(f"schema at version {MIGRATIONS[-1][0]}" + ("" if applied else " (nothing to do)"))
@@ -0,0 +1,109 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Optional
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_, false
+from app.core.times import naive_utc
+
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values) -> str:
+    raw = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(raw).encode()).decode()
+
+
+def decode_cursor(cursor: str, columns) -> list:
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(raw, list) or len(raw) != len(columns):
+            raise ValueError
+        values = []
+        for column, value in zip(columns, raw):
+            # Each value must have its column's type, or the comparison in
+            # _after() runs on mismatched values and returns a wrong page
+            python_type = column.type.python_type
+            if value is None:
+                if not column.nullable:
+                    raise ValueError
+            elif python_type is datetime:
+                value = naive_utc(datetime.fromisoformat(value))
+            elif python_type is date:
+                value = date.fromisoformat(value)
+            elif not isinstance(value, python_type) or isinstance(value, bool):
+                raise ValueError
+            values.append(value)
+        return values
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def _order_clauses(columns):
+    # Nullable columns sort NULLs last on every backend: (col IS NULL, col)
+    clauses = []
+    for column in columns:
+        if column.nullable:
+            clauses.append(column.is_(None))
+        clauses.append(column)
+    return clauses
+
+
+def _after(columns, values):
+    # Row comparison "(columns) > (values)" in the same order as _order_clauses.
+    if not columns:
+        return false()
+    column, value, rest = columns[0], values[0], _after(columns[1:], values[1:])
+    if column.nullable:
+        if value is None:
+            return and_(column.is_(None), rest)
+        return or_(column.is_(None), column > value, and_(column == value, rest))
+    return or_(column > value, and_(column == value, rest))
+
+
+def paginate(stmt, columns, cursor=None, limit=None):
+    """Keyset pagination for a select(). The last column must be unique (usually
+    the primary key). Fetches one extra row so page_rows() can tell whether
+    another page exists; without a limit the whole ordered result is returned.
+    """
+    stmt = stmt.order_by(*_order_clauses(columns))
+    if cursor:
+        stmt = stmt.where(_after(columns, decode_cursor(cursor, columns)))
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    return stmt
+
+
+def decode_offset(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(raw, list) or len(raw) != 1 or not isinstance(raw[0], int) or raw[0] < 0:
+            raise ValueError
+        return raw[0]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def offset_page(rows, response: Response, offset: int, limit: int):
+    """page_rows() for results without a unique sort key (e.g. ranked search):
+    the X-Next-Cursor value carries the offset of the next page. Expects
+    limit + 1 rows."""
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([offset + limit])
+    return rows
+
+
+def page_rows(rows, response: Response, columns, limit=None):
+    """Trims the extra row fetched by paginate() and, if there is a next page,
+    sends its cursor in the X-Next-Cursor header."""
+    rows = list(rows)
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(last, c.key) for c in columns])
+    return rows
@@ -0,0 +1,73 @@
+"""Response rows straight from column tuples.
+
+A Projection selects the columns a response schema reads and turns each
+result row into a dict with the schema's fields, in the schema's order. List
+routes use it with FastJSONResponse to skip ORM hydration and
+from_attributes validation.
+"""
+from sqlalchemy import select
+from app.models.category import Category
+from app.models.event import Event
+from app.models.note import Note
+from app.models.task import Task, Subtask
+from app.schemas.category import CategoryResponse
+from app.schemas.event import EventResponse
+from app.schemas.note import NoteResponse
+from app.schemas.todo import SubTaskResponse, TaskResponse
+
+class Projection:
+    def __init__(self, model, schema, prefix: str = ""):
+        self._template = dict.fromkeys(schema.model_fields)
+        # Fields that aren't columns (nested objects) stay None in the template
+        self.names = [name for name in self._template if name in model.__table__.c]
+        self.columns = [getattr(model, name).label(prefix + name) for name in self.names]
+
+    def row(self, values) -> dict:
+        out = self._template.copy()
+        out.update(zip(self.names, values))
+        return out
+
+    def rows(self, rows) -> list:
+        return [self.row(values) for values in rows]
+
+
+TASK = Projection(Task, TaskResponse)
+CATEGORY = Projection(Category, CategoryResponse, "category__")
+SUBTASK = Projection(Subtask, SubTaskResponse)
+EVENT = Projection(Event, EventResponse)
+NOTE = Projection(Note, NoteResponse)
+
+
+def task_row_select():
+    """select() of the TASK columns followed by the CATEGORY columns (NULLs for
+    tasks without a category); feed the rows to task_rows()."""
+    return select(*TASK.columns, *CATEGORY.columns).select_from(Task).outerjoin(Category, Task.category_id == Category.id)
+
+
+async def task_rows(db, rows, stmt) -> list:
+    """TaskResponse dicts, subtasks included, for `rows` fetched with `stmt`
+    (a task_row_select() with its filters and paging)."""
+    width = len(TASK.columns)
+    category_id = width + CATEGORY.names.index("id")
+    by_id = {}
+    for values in rows:
+        task = TASK.row(values)
+        if values[category_id] is not None:
+            task["category"] = CATEGORY.row(values[width:])
+        task["subtasks"] = []
+        by_id[task["id"]] = task
+
+    if by_id:
+        # One query for the whole page; the derived table keeps LIMIT legal
+        # inside IN on MySQL
+        page = stmt.with_only_columns(Task.id).subquery()
+        result = await db.execute(
+            select(Subtask.task_id, *SUBTASK.columns)
+            .where(Subtask.task_id.in_(select(page.c.id)))
+            .order_by(Subtask.task_id, Subtask.id)
+        )
+        for values in result:
+            task = by_id.get(values[0])
+            if task is not None:  # the extra row paginate() fetched
+                task["subtasks"].append(SUBTASK.row(values[1:]))
+    return list(by_id.values())
@@ -0,0 +1,270 @@
+"""Full-text search over notes (title, content) and tasks (title, description).
+
+One backend per dialect:
+
+* SQLite: FTS5 external-content tables (notes_fts, tasks_fts) kept in sync by
+  triggers. The owner's user_id is an indexed column, so the index itself
+  narrows matches down to one user.
+* PostgreSQL: GIN indexes on a weighted to_tsvector() expression, ranked with
+  ts_rank(), snippets from ts_headline().
+* Anything else: LIKE matching without an index.
+
+All words must match; the last one also matches as a prefix, for search as
+you type. The SQLite and LIKE backends only fetch the RANK_WINDOW newest
+matches per kind and rank those here. bm25() would count every document
+containing each word, across all users, on every query. Older matches are
+left out; search() says when that happened so the route can tell the client.
+
+Snippets mark matches with \\x02/\\x03; highlight() escapes the text and turns
+those into <mark> tags.
+"""
+import html
+import re
+import unicodedata
+from typing import List, Tuple
+from sqlalchemy import text
+
+SEARCH_KINDS = ("notes", "tasks")
+
+# kind -> (table, title column, body column)
+SOURCES = {
+    "notes": ("notes", "title", "content"),
+    "tasks": ("tasks", "title", "description"),
+}
+
+RANK_WINDOW = 200
+TRUNCATED_HEADER = "X-Search-Truncated"
+TITLE_WEIGHT = 2.0
+K1, B = 1.2, 0.75
+MARK_START, MARK_END = "\x02", "\x03"
+SNIPPET_WORDS = 12
+
+_WORD = re.compile(r"\w+")
+
+
+class _Fold(dict):
+    # code point -> one lower-case character without diacritics. One character
+    # per character, so offsets in the folded text are offsets in the original.
+    def __missing__(self, code):
+        folded = unicodedata.normalize("NFKD", chr(code))[:1].lower()[:1] or chr(code)
+        self[code] = folded
+        return folded
+
+
+_FOLD = _Fold()
+
+
+def fold(value: str) -> str:
+    return value.lower() if value.isascii() else value.translate(_FOLD)
+
+
+def terms(query: str) -> List[Tuple[str, bool]]:
+    """(word, is_prefix) pairs; only the last word is a prefix."""
+    words = _WORD.findall(fold(query))[:16]
+    return [(word, i == len(words) - 1) for i, word in enumerate(words)]
+
+
+def highlight(snippet: str) -> str:
+    return html.escape(snippet or "").replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+
+
+def _patterns(words) -> List["re.Pattern"]:
+    # Literal first, word-start check as a lookbehind: lets re scan for the
+    # literal instead of trying \b at every position
+    return [re.compile(rf"{re.escape(w)}(?<!\w{re.escape(w)})" + (r"\w*" if prefix else r"\b")) for w, prefix in words]
+
+
+def _score(patterns, fields, avg_lengths) -> float:
+    """BM25 without the IDF part (every hit contains every word anyway) over
+    folded (title, body); 0 if some word matches in neither."""
+    score = 0.0
+    for pattern in patterns:
+        found = False
+        for weight, value, avg in zip((TITLE_WEIGHT, 1.0), fields, avg_lengths):
+            tf = len(pattern.findall(value))
+            if tf:
+                found = True
+                norm = K1 * (1 - B + B * len(value.split()) / avg)
+                score += weight * tf * (K1 + 1) / (tf + norm)
+        if not found:
+            return 0.0
+    return score
+
+
+def _snippet(value, patterns) -> str:
+    """About SNIPPET_WORDS words of `value` around its first match, or ""."""
+    value = value or ""
+    folded = fold(value)
+    spans = [m.span() for m in _WORD.finditer(folded)]
+    marked = {i for i, (start, end) in enumerate(spans)
+              if any(p.fullmatch(folded, start, end) for p in patterns)}
+    if not marked:
+        return ""
+    first = max(0, min(marked) - SNIPPET_WORDS // 4)
+    last = min(len(spans), first + SNIPPET_WORDS)
+    parts, position = [], spans[first][0]
+    for i in range(first, last):
+        start, end = spans[i]
+        word = value[start:end]
+        parts.append(value[position:start] + (f"{MARK_START}{word}{MARK_END}" if i in marked else word))
+        position = end
+    return ("…" if first else "") + "".join(parts) + ("…" if last < len(spans) else "")
+
+
+class SearchBackend:
+    def create_index(self, conn):
+        pass
+
+    async def search(self, db, user_id: int, kinds, words, limit: int, offset: int) -> Tuple[list, bool]:
+        """(hits as dicts (kind, id, title, snippet, score), best first; whether
+        some matches were not ranked)."""
+        raise NotImplementedError
+
+
+class WindowedSearch(SearchBackend):
+    """Fetches up to RANK_WINDOW matches per kind, newest first, and ranks
+    them in Python. Subclasses supply the candidate query."""
+
+    def candidates(self, kind: str, user_id: int, words) -> Tuple[str, dict]:
+        """SQL selecting id, title, body plus its parameters; :user_id and
+        :window are bound by the caller."""
+        raise NotImplementedError
+
+    async def fetch(self, db, kind: str, user_id: int, words) -> list:
+        """Up to RANK_WINDOW + 1 rows; the extra one shows there are more."""
+        sql, params = self.candidates(kind, user_id, words)
+        return (await db.execute(text(sql), {**params, "user_id": user_id, "window": RANK_WINDOW + 1})).all()
+
+    async def search(self, db, user_id: int, kinds, words, limit: int, offset: int) -> Tuple[list, bool]:
+        rows, truncated = [], False
+        for kind in kinds:
+            result = await self.fetch(db, kind, user_id, words)
+            truncated |= len(result) > RANK_WINDOW
+            rows += [(kind, row, (fold(row.title or ""), fold(row.body or ""))) for row in result[:RANK_WINDOW]]
+        if not rows:
+            return [], truncated
+
+        patterns = _patterns(words)
+        avg_lengths = [max(1.0, sum(len(r[2][i].split()) for r in rows) / len(rows)) for i in (0, 1)]
+        scored = ((_score(patterns, fields, avg_lengths), kind, row) for kind, row, fields in rows)
+        # A zero score is a LIKE substring match that isn't a word match
+        ranked = sorted((hit for hit in scored if hit[0]), key=lambda hit: (-hit[0], hit[1], -hit[2].id))
+        return [
+            {"kind": kind, "id": row.id, "title": row.title, "score": round(score, 4),
+             "snippet": highlight(_snippet(row.body, patterns) or _snippet(row.title, patterns))}
+            for score, kind, row in ranked[offset:offset + limit]
+        ], truncated
+
+
+class LikeSearch(WindowedSearch):
+    """Fallback: scans the user's rows with LIKE."""
+
+    def candidates(self, kind: str, user_id: int, words):
+        table, title, body = SOURCES[kind]
+        matches = " AND ".join(
+            f"(lower(coalesce(t.{title}, '')) LIKE :term{i} ESCAPE '!' "
+            f"OR lower(coalesce(t.{body}, '')) LIKE :term{i} ESCAPE '!')"
+            for i in range(len(words))
+        )
+        sql = (f"SELECT t.id AS id, t.{title} AS title, t.{body} AS body FROM {table} t "
+               f"WHERE t.user_id = :user_id AND {matches} ORDER BY t.id DESC LIMIT :window")
+        escaped = (w.replace("!", "!!").replace("%", "!%").replace("_", "!_") for w, _ in words)
+        return sql, {f"term{i}": f"%{w}%" for i, w in enumerate(escaped)}
+
+
+class SqliteSearch(WindowedSearch):
+    PREFIX_INDEX = (2, 3)
+
+    def create_index(self, conn):
+        for table, title, body in SOURCES.values():
+            fts = f"{table}_fts"
+            cols = f"{title}, {body}, user_id"
+            new = f"new.{title}, new.{body}, new.user_id"
+            old = f"old.{title}, old.{body}, old.user_id"
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table}', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2', prefix='{' '.join(map(str, self.PREFIX_INDEX))}')"
+            ))
+            conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+                              f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END"))
+            conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+                              f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END"))
+            conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+                              f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+                              f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END"))
+            conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+    def candidates(self, kind: str, user_id: int, words):
+        table, title, body = SOURCES[kind]
+        fts = f"{table}_fts"
+        phrases = " ".join(f'"{w}"*' if prefix else f'"{w}"' for w, prefix in words)
+        # CROSS JOIN keeps the FTS table as the outer loop
+        sql = (f"SELECT t.id AS id, t.{title} AS title, t.{body} AS body "
+               f"FROM {fts} CROSS JOIN {table} t ON t.id = {fts}.rowid "
+               f"WHERE {fts} MATCH :query AND t.user_id = :user_id ORDER BY {fts}.rowid DESC LIMIT :window")
+        return sql, {"query": f'user_id:"{int(user_id)}" AND ({phrases})'}
+
+    async def fetch(self, db, kind: str, user_id: int, words) -> list:
+        last, prefix = words[-1]
+        if not prefix or len(last) <= max(self.PREFIX_INDEX):
+            return await super().fetch(db, kind, user_id, words)
+        # Longer prefixes have no prefix index and FTS5 merges the doclists of
+        # every matching term, which is slow for common words. Exact matches
+        # usually fill the window on their own.
+        rows = await super().fetch(db, kind, user_id, words[:-1] + [(last, False)])
+        if len(rows) <= RANK_WINDOW:
+            rows = await super().fetch(db, kind, user_id, words)
+        return rows
+
+
+class PostgresSearch(SearchBackend):
+    @staticmethod
+    def _document(title: str, body: str) -> str:
+        # Must stay identical to the indexed expression
+        return (f"setweight(to_tsvector('simple', coalesce({title}, '')), 'A') || "
+                f"setweight(to_tsvector('simple', coalesce({body}, '')), 'B')")
+
+    def create_index(self, conn):
+        for table, title, body in SOURCES.values():
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_fts ON {table} USING GIN (({self._document(title, body)}))"))
+
+    def _select(self, kind: str) -> str:
+        table, title, body = SOURCES[kind]
+        document = self._document(f"t.{title}", f"t.{body}")
+        return (f"SELECT '{kind}' AS kind, t.id AS id, t.{title} AS title, "
+                f"ts_headline('simple', coalesce(t.{body}, t.{title}, ''), q, :headline) AS snippet, "
+                f"ts_rank({document}, q) AS score "
+                f"FROM {table} t, to_tsquery('simple', :query) q WHERE ({document}) @@ q AND t.user_id = :user_id")
+
+    async def search(self, db, user_id: int, kinds, words, limit: int, offset: int) -> Tuple[list, bool]:
+        union = " UNION ALL ".join(self._select(kind) for kind in kinds)
+        rows = await db.execute(
+            text(f"SELECT * FROM ({union}) hits ORDER BY score DESC, kind, id DESC LIMIT :limit OFFSET :offset"),
+            {
+                "query": " & ".join(f"{w}:*" if prefix else w for w, prefix in words),
+                "headline": f"StartSel={MARK_START}, StopSel={MARK_END}, MaxWords={SNIPPET_WORDS * 2}, MinWords={SNIPPET_WORDS}",
+                "user_id": user_id, "limit": limit, "offset": offset,
+            },
+        )
+        return [
+            {"kind": row.kind, "id": row.id, "title": row.title,
+             "snippet": highlight(row.snippet), "score": round(float(row.score), 4)}
+            for row in rows
+        ], False
+
+
+_BACKENDS = {"sqlite": SqliteSearch(), "postgresql": PostgresSearch()}
+_FALLBACK = LikeSearch()
+
+
+def search_backend(dialect_name: str) -> SearchBackend:
+    return _BACKENDS.get(dialect_name, _FALLBACK)
+
+
+async def search(db, user_id: int, query: str, kinds, limit: int, offset: int = 0) -> Tuple[list, bool]:
+    """(ranked hits as dicts (kind, id, title, snippet, score), best first;
+    whether matches beyond RANK_WINDOW per kind were left out)."""
+    words = terms(query)
+    if not words:
+        return [], False
+    return await search_backend(db.bind.dialect.name).search(db, user_id, kinds, words, limit, offset)
@@ -0,0 +1,189 @@
+"""Per-user collection versions for conditional GET and delta sync.
+
+Every write to a user's tasks, events or notes bumps that collection's
+version in collection_versions and stamps the rows it changed with the new
+value; deleted rows leave a tombstone. List routes compare If-None-Match
+against the version alone, and /changes?since=N returns rows and tombstones
+newer than N.
+
+ORM writes are tracked by the before_flush hook below. Routes that write with
+core insert/update/delete statements call bump_version()/record_changes()
+themselves.
+"""
+from collections import defaultdict
+from email.utils import format_datetime
+from datetime import timezone
+from typing import Optional
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import event, func, insert, or_, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.category import Category
+from app.models.event import Event
+from app.models.note import Note
+from app.models.sync import CollectionVersion, Tombstone
+from app.models.task import Task, Subtask
+
+VERSION_HEADER = "X-Collection-Version"
+
+COLLECTIONS = {"tasks": Task, "events": Event, "notes": Note}
+_TRACKED = {model: name for name, model in COLLECTIONS.items()}
+
+
+def _version_key(user_id: int, collection: str):
+    return (CollectionVersion.user_id == user_id) & (CollectionVersion.collection == collection)
+
+
+def bump_version(session: Session, user_id: int, collection: str) -> int:
+    """Increments the collection version inside the session's transaction and returns it."""
+    conn = session.connection()
+    table = CollectionVersion.__table__
+    values = {"user_id": user_id, "collection": collection, "version": 1, "updated_at": func.now()}
+    bumped = {"version": table.c.version + 1, "updated_at": func.now()}
+
+    # Upsert where the dialect has one, so two first writes can't race on the insert
+    dialect = conn.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        conn.execute(dialect_insert(table).values(values).on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.collection], set_=bumped))
+    elif dialect == "mysql":
+        conn.execute(mysql.insert(table).values(values).on_duplicate_key_update(bumped))
+    elif conn.execute(update(table).where(_version_key(user_id, collection)).values(bumped)).rowcount == 0:
+        conn.execute(insert(table).values(values))
+
+    return conn.execute(select(table.c.version).where(_version_key(user_id, collection))).scalar_one()
+
+
+def record_changes(session: Session, user_id: int, collection: str, changed=None, deleted=()) -> int:
+    """Bumps the version, stamps the rows matching the `changed` clause and
+    writes tombstones for the `deleted` row ids. Returns the new version."""
+    version = bump_version(session, user_id, collection)
+    conn = session.connection()
+    if changed is not None:
+        table = COLLECTIONS[collection].__table__
+        conn.execute(update(table).where(table.c.user_id == user_id, changed).values(version=version))
+    if deleted:
+        conn.execute(insert(Tombstone.__table__), [
+            {"user_id": user_id, "collection": collection, "row_id": row_id, "version": version}
+            for row_id in deleted
+        ])
+    return version
+
+
+@event.listens_for(Session, "before_flush")
+def _track_changes(session, flush_context, instances):
+    changed = defaultdict(list)   # (user_id, collection) -> rows to stamp
+    deleted = defaultdict(list)   # (user_id, collection) -> deleted row ids
+    indirect = defaultdict(list)  # (user_id, collection) -> clauses for rows changed as a side effect
+    parent_ids = set()            # tasks whose subtasks changed
+
+    def subtask_parent(subtask):
+        # TaskResponse embeds subtasks, so a subtask write is a task write
+        task = subtask.__dict__.get("task")
+        if task is None:
+            parent_ids.add(subtask.task_id)
+        elif task not in session.new and task not in session.deleted:
+            changed[(task.user_id, "tasks")].append(task)
+
+    for obj in session.new:
+        if type(obj) in _TRACKED:
+            changed[(obj.user_id, _TRACKED[type(obj)])].append(obj)
+        elif isinstance(obj, Subtask):
+            subtask_parent(obj)
+
+    for obj in session.dirty:
+        if not session.is_modified(obj):
+            continue
+        if type(obj) in _TRACKED:
+            changed[(obj.user_id, _TRACKED[type(obj)])].append(obj)
+        elif isinstance(obj, Subtask):
+            subtask_parent(obj)
+        elif isinstance(obj, Category):
+            indirect[(obj.user_id, "tasks")].append(Task.category_id == obj.id)
+
+    for obj in session.deleted:
+        if type(obj) in _TRACKED:
+            deleted[(obj.user_id, _TRACKED[type(obj)])].append(obj.id)
+        if isinstance(obj, Subtask):
+            subtask_parent(obj)
+        elif isinstance(obj, Category):
+            # Deleting a category or event clears the reference on its rows
+            indirect[(obj.user_id, "tasks")].append(Task.category_id == obj.id)
+            indirect[(obj.user_id, "notes")].append(Note.category_id == obj.id)
+        elif isinstance(obj, Event):
+            indirect[(obj.user_id, "notes")].append(Note.event_id == obj.id)
+
+    deleted_tasks = {obj.id for obj in session.deleted if isinstance(obj, Task)}
+    parent_ids -= deleted_tasks | {None}
+    if parent_ids:
+        rows = session.connection().execute(select(Task.id, Task.user_id).where(Task.id.in_(parent_ids)))
+        for task_id, user_id in rows:
+            indirect[(user_id, "tasks")].append(Task.id == task_id)
+
+    for key in set(changed) | set(deleted) | set(indirect):
+        user_id, collection = key
+        clauses = indirect.get(key)
+        version = record_changes(session, user_id, collection, or_(*clauses) if clauses else None, deleted.get(key, ()))
+        for obj in changed.get(key, ()):
+            obj.version = version
+
+
+async def current_version(db, user_id: int, collection: str):
+    """(version, updated_at) of a collection; (0, None) before the first write."""
+    row = (await db.execute(
+        select(CollectionVersion.version, CollectionVersion.updated_at).where(_version_key(user_id, collection))
+    )).first()
+    return tuple(row) if row else (0, None)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check: "*" or any listed tag equal to `etag`, weak (W/)
+    or not."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    weak = lambda tag: tag.strip().removeprefix("W/")
+    return weak(etag) in {weak(tag) for tag in if_none_match.split(",")}
+
+
+async def not_modified(db, request: Request, response: Response, user_id: int, collection: str) -> Optional[Response]:
+    """Sets the validator headers on `response` and returns a 304 response if the
+    client's If-None-Match matches the current collection version. Must run
+    before the rows are read."""
+    version, updated_at = await current_version(db, user_id, collection)
+    etag = f'"{collection}-{user_id}-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", VERSION_HEADER: str(version)}
+    if updated_at is not None:
+        headers["Last-Modified"] = format_datetime(updated_at.replace(tzinfo=timezone.utc), usegmt=True)
+    response.headers.update(headers)
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return None
+
+
+async def changes_since(db, user_id: int, collection: str, since: int, stmt=None) -> dict:
+    """Rows changed and ids deleted after version `since`.
+
+    `stmt` is the collection's select() (with its loader options); rows come
+    back in version order.
+    """
+    model = COLLECTIONS[collection]
+    version, _ = await current_version(db, user_id, collection)
+    if since > version:
+        raise HTTPException(status_code=409, detail="'since' is newer than the current version; do a full sync.")
+
+    stmt = select(model) if stmt is None else stmt
+    changed = (await db.scalars(
+        stmt.where(model.user_id == user_id, model.version > since).order_by(model.version, model.id)
+    )).all()
+    deleted = await db.scalars(
+        select(Tombstone.row_id)
+        .where(Tombstone.user_id == user_id, Tombstone.collection == collection, Tombstone.version > since)
+        .order_by(Tombstone.version)
+    )
+    # SQLite may reuse the id of a deleted last row; the live row wins
+    live = {row.id for row in changed}
+    return {"version": version, "changed": changed, "deleted": list(dict.fromkeys(i for i in deleted if i not in live))}
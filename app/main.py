@@ -1,13 +1,53 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.db.database import engine, Base
-from app.routers import auth, tasks, ai, events, notes, categories
+from starlette.concurrency import run_in_threadpool
+from app.core import metrics
+from app.core.config import settings
+from app.core.lookups import lookup_cache
+from app.core.reminders import ReminderScheduler, make_sink
+from app.db import database
+from app.db.migrations import MIGRATIONS, migrate, pending_migrations
+from app.db.pagination import NEXT_CURSOR_HEADER
+from app.db.search import TRUNCATED_HEADER
+from app.db.versioning import VERSION_HEADER
+from app.routers import auth, tasks, ai, events, notes, categories, lookups, search, stats, workspace
 from app.models import user, task, category, event, note
 
-# Veritabanı tablolarını oluştur
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+def prepare_database(engine):
+    """Startup check: the schema must be current (migrations run once, out of
+    band: python -m app.db.migrations), then the lookup tables are cached."""
+    pending = pending_migrations(engine)
+    if pending:
+        if not settings.AUTO_MIGRATE:
+            raise RuntimeError(
+                f"Database schema is at version {pending[0][0] - 1}, this code needs {MIGRATIONS[-1][0]}. "
+                "Run `python -m app.db.migrations` first (or set AUTO_MIGRATE=true)."
+            )
+        migrate(engine)
+    lookup_cache.load(engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nothing touches the database at import time; app.state.engine points the
+    # check at another database (benchmarks, explain_check)
+    engine = getattr(app.state, "engine", None) or database.engine
+    await run_in_threadpool(prepare_database, engine)
+    scheduler = None
+    if settings.REMINDERS_ENABLED:
+        scheduler = app.state.reminders = ReminderScheduler(engine, make_sink())
+        scheduler.start()
+    yield
+    if scheduler is not None:
+        await scheduler.stop()
+    if database.async_engine is not None:
+        await database.async_engine.dispose()
+    database.engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS Originleri buraya eklenecek.
 origins = [
@@ -24,7 +64,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, VERSION_HEADER, TRUNCATED_HEADER, "ETag", "Last-Modified", "Server-Timing"],
 )
+# Outermost, so its timings include everything below it
+app.add_middleware(metrics.MetricsMiddleware)
 
 # Routerları ekle
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
@@ -33,6 +76,14 @@ app.include_router(events.router, prefix="/events", tags=["Events"])
 app.include_router(notes.router, prefix="/notes", tags=["Notes"])
 app.include_router(categories.router, prefix="/categories", tags=["Categories"])
 app.include_router(ai.router, prefix="/ai", tags=["AI"])
+app.include_router(lookups.router, prefix="/lookups", tags=["Lookups"])
+app.include_router(search.router, prefix="/search", tags=["Search"])
+app.include_router(stats.router, prefix="/stats", tags=["Stats"])
+app.include_router(workspace.router, prefix="/workspace", tags=["Workspace"])
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 @app.get("/")
 def root():
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
@@ -11,4 +11,8 @@ class Category(Base):
 
     owner = relationship("User", back_populates="categories")
     tasks = relationship("Task", back_populates="category")
-    notes = relationship("Note", back_populates="category")
\ No newline at end of file
+    notes = relationship("Note", back_populates="category")
+
+    __table_args__ = (
+        Index("ix_categories_user_id", "user_id"),
+    )
\ No newline at end of file
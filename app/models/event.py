@@ -1,7 +1,21 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, SmallInteger, String, ForeignKey, DateTime, Index, event, func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
+# Events are bucketed by duration: bucket b holds events lasting at most
+# 2**b minutes. A range query can then bound start_time per bucket instead of
+# scanning everything that started before the window. The last bucket is
+# open-ended (anything longer than ~2 years).
+MAX_DURATION_BUCKET = 20
+
+
+def duration_bucket(start_time, end_time) -> int:
+    minutes = -int((start_time - end_time).total_seconds() // 60)  # rounded up
+    if minutes <= 1:
+        return 0
+    return min((minutes - 1).bit_length(), MAX_DURATION_BUCKET)
+
+
 class Event(Base):
     __tablename__ = "events"
     id = Column(Integer, primary_key=True)
@@ -11,6 +25,22 @@ class Event(Base):
     end_time = Column(DateTime, nullable=False)
     location = Column(String(255))
     color_code = Column(String(7))
+    duration_bucket = Column(SmallInteger, nullable=False, default=0, server_default="0")
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
     owner = relationship("User", back_populates="events")
-    notes = relationship("Note", back_populates="event")
\ No newline at end of file
+    notes = relationship("Note", back_populates="event")
+
+    __table_args__ = (
+        Index("ix_events_user_id_version", "user_id", "version"),
+        Index("ix_events_user_id_start_time_end_time", "user_id", "start_time", "end_time"),
+        Index("ix_events_user_id_duration_bucket_start_time", "user_id", "duration_bucket", "start_time"),
+        Index("ix_events_start_time", "start_time"),  # reminder scheduler
+    )
+
+
+@event.listens_for(Event, "before_insert")
+@event.listens_for(Event, "before_update")
+def _set_duration_bucket(mapper, connection, target):
+    target.duration_bucket = duration_bucket(target.start_time, target.end_time)
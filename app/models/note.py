@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, func
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Index, func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
@@ -12,7 +12,17 @@ class Note(Base):
     content = Column(Text, nullable=False)
     color_code = Column(String(7))
     created_at = Column(DateTime, server_default=func.now())
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
     category = relationship("Category", back_populates="notes")
     event = relationship("Event", back_populates="notes")
-    owner = relationship("User", back_populates="notes")
\ No newline at end of file
+    owner = relationship("User", back_populates="notes")
+
+    __table_args__ = (
+        Index("ix_notes_user_id_version", "user_id", "version"),
+        Index("ix_notes_user_id_event_id", "user_id", "event_id"),
+        # Deleting an event/category loads its notes by these FKs alone
+        Index("ix_notes_event_id", "event_id"),
+        Index("ix_notes_category_id", "category_id"),
+    )
\ No newline at end of file
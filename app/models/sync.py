@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, func
+from app.db.database import Base
+
+# Per-user version of each synced collection ("tasks", "events", "notes").
+# Bumped once per write; changed rows are stamped with the new value.
+class CollectionVersion(Base):
+    __tablename__ = "collection_versions"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    collection = Column(String(20), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        # Versions bumped since a point in time (the reminder scheduler's sync)
+        Index("ix_collection_versions_updated_at", "updated_at"),
+    )
+
+# Deleted rows, so delta sync can tell clients what to drop.
+class Tombstone(Base):
+    __tablename__ = "tombstones"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    collection = Column(String(20), nullable=False)
+    row_id = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_tombstones_user_id_collection_version", "user_id", "collection", "version"),
+    )
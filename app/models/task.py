@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Date, ForeignKey, Enum, Boolean, func
+from sqlalchemy import Column, Integer, String, Text, DateTime, Date, ForeignKey, Enum, Boolean, Index, func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 from app.models.lookups import TaskStatus, PriorityLevel, RecurrenceType
@@ -17,15 +17,33 @@ class Task(Base):
     recurrence_end_date = Column(Date)
     color_code = Column(String(7))
     created_at = Column(DateTime, server_default=func.now())
+    # Collection version of the last write that touched this row (see app.db.versioning)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
     owner = relationship("User", back_populates="tasks")
     category = relationship("Category", back_populates="tasks")
-    subtasks = relationship("Subtask", back_populates="task", cascade="all, delete-orphan")
+    # Ordered like the list fast path (app.db.projections); the subtasks index
+    # starts with (task_id, is_completed), so without this they come back
+    # completed-last on SQLite
+    subtasks = relationship("Subtask", back_populates="task", cascade="all, delete-orphan", order_by="Subtask.id")
 
     priority = relationship("PriorityLevel")
     status = relationship("TaskStatus")
     recurrence_type = relationship("RecurrenceType")
 
+    __table_args__ = (
+        Index("ix_tasks_user_id_version", "user_id", "version"),
+        Index("ix_tasks_user_id_due_date", "user_id", "due_date"),
+        # All users' next due dates, for the reminder scheduler (app.core.reminders)
+        Index("ix_tasks_due_date", "due_date"),
+        Index("ix_tasks_category_id", "category_id"),
+        Index("ix_tasks_user_id_recurrence_type_id", "user_id", "recurrence_type_id"),
+        # Covers the dashboard GROUP BY (app.routers.stats)
+        Index("ix_tasks_user_id_status_id_priority_id_category_id_due_date",
+              "user_id", "status_id", "priority_id", "category_id", "due_date"),
+    )
+
 class Subtask(Base):
     __tablename__ = "subtasks"
     id = Column(Integer, primary_key=True)
@@ -36,3 +54,8 @@ class Subtask(Base):
 
     task = relationship("Task", back_populates="subtasks")
 
+    __table_args__ = (
+        # is_completed too, so the dashboard's completion counts stay in the index
+        Index("ix_subtasks_task_id_is_completed", "task_id", "is_completed"),
+    )
+
@@ -1,34 +1,187 @@
-import json
-from fastapi import APIRouter, Depends
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from google import genai
-from datetime import datetime
+from typing import List
 from sqlalchemy.orm import Session
 from app.db.database import get_db
-from app.models.task import Task
+from app.models.task import Task, Subtask
 from app.models.event import Event
-from app.schemas.ai import AIRequest
+from app.models.note import Note
+from app.schemas.ai import AIPersistResponse
+from app.core import gemini
+from app.core.ai_batch import batcher, parse_many, parse_one, valid_result
+from app.core.ai_cache import parse_cache
+from app.core.ai_persist import persist_parsed
 from app.core.config import settings
 from app.core.constants import get_prompt
+from app.core.fastjson import dumps
+from app.core.json_stream import SECTIONS, ResultStreamParser
+from app.core.metrics import TimedRoute
+from app.routers.tasks import task_select
 
-client = genai.Client(api_key=settings.GOOGLE_API_KEY)
+router = APIRouter(route_class=TimedRoute)
 
-router = APIRouter()
+INVALID_JSON = "Gemini invalid JSON döndürdü."
 
 class AIParseRequest(BaseModel):
     text: str
 
-@router.post("/parse")
-def parse_text(req: AIParseRequest):
-    prompt = get_prompt(req)
-    response = client.models.generate_content(model="gemini-2.5-flash", contents=prompt)
 
-    try:
-        parsed = json.loads(response.text)
-    except Exception:
+class AIParseBatchRequest(BaseModel):
+    texts: List[str]
+
+
+async def cached_result(text: str):
+    # A cache file may still hold answers stored before they were shape-checked
+    cached = await parse_cache.get(text)
+    return cached if cached is not None and valid_result(cached) else None
+
+
+async def parse(req: AIParseRequest):
+    """Returns (parsed dict or None, raw model output)."""
+    cached = await cached_result(req.text)
+    if cached is not None:
+        return cached, None
+
+    if settings.AI_BATCH_ENABLED:
+        parsed, text = await batcher.parse(req.text)
+    else:
+        parsed, text = await parse_one(req.text)
+    if parsed is None:
+        return None, text
+
+    parse_cache.set(req.text, parsed)
+    return parsed, text
+
+
+@router.post("/parse")
+async def parse_text(req: AIParseRequest):
+    parsed, raw_output = await parse(req)
+    if parsed is None:
         return {
-            "error": "Gemini invalid JSON döndürdü.",
-            "raw_output": response.text
+            "error": INVALID_JSON,
+            "raw_output": raw_output
         }
+    return parsed
+
+
+@router.post("/parse-batch")
+async def parse_text_batch(req: AIParseBatchRequest):
+    """One result per text, in order: {index, ok, result} or {index, ok, error[, raw_output]}."""
+    if len(req.texts) > settings.AI_PARSE_BATCH_LIMIT:
+        raise HTTPException(status_code=413, detail=f"At most {settings.AI_PARSE_BATCH_LIMIT} texts per batch.")
+
+    results = [None] * len(req.texts)
+    todo = {}  # uncached text -> indexes
+    for index, text in enumerate(req.texts):
+        cached = await cached_result(text)
+        if cached is not None:
+            results[index] = {"index": index, "ok": True, "result": cached}
+        else:
+            todo.setdefault(text, []).append(index)
+
+    texts = list(todo)
+    chunks = [texts[i:i + settings.AI_BATCH_MAX_SIZE] for i in range(0, len(texts), settings.AI_BATCH_MAX_SIZE)]
+    outcomes = await asyncio.gather(*(parse_many(chunk) for chunk in chunks), return_exceptions=True)
+    for chunk, outcome in zip(chunks, outcomes):
+        for text, result in zip(chunk, outcome if isinstance(outcome, list) else [outcome] * len(chunk)):
+            if isinstance(result, HTTPException):
+                item = {"ok": False, "error": result.detail}
+            elif isinstance(result, BaseException):
+                raise result
+            elif result[0] is None:
+                item = {"ok": False, "error": INVALID_JSON, "raw_output": result[1]}
+            else:
+                parse_cache.set(text, result[0])
+                item = {"ok": True, "result": result[0]}
+            for index in todo[text]:
+                results[index] = {"index": index, **item}
+    return {"results": results}
+
+
+async def _cached_events(parsed: dict):
+    for section in SECTIONS:
+        for index, item in enumerate(parsed.get(section) or []):
+            yield "item", {"section": section, "index": index, "item": item}
+    yield "done", {"complete": True, "cached": True, "counts": {s: len(parsed.get(s) or []) for s in SECTIONS}}
+
+
+async def _stream_events(text: str, first: str, chunks):
+    """Items as their closing brace arrives, then any errors and a summary. Only
+    the item being read is buffered; the result is cached if it came out whole."""
+    parser = ResultStreamParser()
+    result = {section: [] for section in SECTIONS}
+
+    def completed(chunk):
+        for section, item in parser.feed(chunk):
+            yield "item", {"section": section, "index": len(result[section]), "item": item}
+            result[section].append(item)
+
+    try:
+        for event in completed(first):
+            yield event
+        async for chunk in chunks:
+            for event in completed(chunk):
+                yield event
+    except HTTPException as exc:  # mid-stream: the status line has gone out already
+        parser.errors.append((None, exc.detail))
+    finally:
+        await chunks.aclose()
+
+    errors = parser.close()
+    for section, detail in errors:
+        yield "error", {"section": section, "detail": detail}
+    if not errors:
+        parse_cache.set(text, result)
+    yield "done", {"complete": not errors, "cached": False, "counts": {s: len(result[s]) for s in SECTIONS}}
+
+
+def _ndjson(event: str, data: dict) -> bytes:
+    return dumps({"event": event, **data}) + b"\n"
+
+
+def _sse(event: str, data: dict) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+@router.post("/parse-stream", response_class=StreamingResponse)
+async def parse_text_stream(req: AIParseRequest, request: Request):
+    """Streams the parse result item by item: NDJSON ({"event": "item" | "error" | "done", ...}),
+    or server-sent events when the client accepts text/event-stream."""
+    cached = await cached_result(req.text)
+    if cached is not None:
+        events = _cached_events(cached)
+    else:
+        chunks = gemini.generate_stream(get_prompt(req))
+        # Waiting for the first chunk here lets 429/503 go out as real status codes
+        first = await anext(chunks, "")
+        events = _stream_events(req.text, first, chunks)
+
+    sse = "text/event-stream" in request.headers.get("accept", "")
+    encode = _sse if sse else _ndjson
+    return StreamingResponse(
+        (encode(event, data) async for event, data in events),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def save_parsed(db: Session, user_id: int, parsed: dict) -> AIPersistResponse:
+    created = persist_parsed(db, user_id, parsed)
+    return AIPersistResponse(
+        tasks=db.scalars(task_select().where(Task.id.in_(created["tasks"])).order_by(Task.id)).all(),
+        events=db.query(Event).filter(Event.id.in_(created["events"])).order_by(Event.id).all(),
+        notes=db.query(Note).filter(Note.id.in_(created["notes"])).order_by(Note.id).all(),
+        subtasks=db.query(Subtask).filter(Subtask.id.in_(created["subtasks"])).order_by(Subtask.id).all(),
+    )
+
 
-    return parsed
\ No newline at end of file
+@router.post("/parse-and-save", response_model=AIPersistResponse)
+async def parse_and_save(req: AIParseRequest, user_id: int, db: Session = Depends(get_db)):
+    parsed, raw_output = await parse(req)
+    if parsed is None:
+        raise HTTPException(status_code=502, detail={"error": INVALID_JSON, "raw_output": raw_output})
+    # DB work stays off the event loop
+    return await run_in_threadpool(save_parsed, db, user_id, parsed)
@@ -1,38 +1,49 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.core.metrics import TimedRoute
 from app.models.category import Category
 from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
-from app.db.database import get_db
+from app.db.database import get_async_db
+from app.db.pagination import paginate, page_rows, MAX_PAGE_SIZE
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/", response_model=CategoryResponse)
-def create_category(category: CategoryCreate, user_id: int, db: Session = Depends(get_db)):
+async def create_category(category: CategoryCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
     new_category = Category(**category.model_dump(), user_id=user_id)
     db.add(new_category)
-    db.commit()
-    db.refresh(new_category)
+    await db.commit()
+    await db.refresh(new_category)
     return new_category
 
 
 @router.get("/", response_model=List[CategoryResponse])
-def get_categories(user_id: int, db: Session = Depends(get_db)):
-    categories = db.query(Category).filter(Category.user_id == user_id).all()
-    return categories
+async def get_categories(
+    user_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    stmt = select(Category).where(Category.user_id == user_id)
+    columns = [Category.id]
+    categories = await db.scalars(paginate(stmt, columns, cursor, limit))
+    return page_rows(categories, response, columns, limit)
 
 
 @router.get("/{category_id}", response_model=CategoryResponse)
-def get_category(category_id: int, user_id: int, db: Session = Depends(get_db)):
-    category = db.query(Category).filter(Category.id == category_id, Category.user_id == user_id).first()
+async def get_category(category_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    category = (await db.scalars(select(Category).where(Category.id == category_id, Category.user_id == user_id))).first()
     if not category:
         raise HTTPException(status_code=404, detail="Category not found.")
     return category
 
 
 @router.put("/{category_id}", response_model=CategoryResponse)
-def update_category(category_id: int, category_update: CategoryUpdate, user_id: int, db: Session = Depends(get_db)):
-    category = db.query(Category).filter(Category.id == category_id, Category.user_id == user_id).first()
+async def update_category(category_id: int, category_update: CategoryUpdate, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    category = (await db.scalars(select(Category).where(Category.id == category_id, Category.user_id == user_id))).first()
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
 
@@ -40,17 +51,17 @@ def update_category(category_id: int, category_update: CategoryUpdate, user_id:
     for field, value in update_data.items():
         setattr(category, field, value)
 
-    db.commit()
-    db.refresh(category)
+    await db.commit()
+    await db.refresh(category)
     return category
 
 
 @router.delete("/{category_id}")
-def delete_category(category_id: int, user_id: int, db: Session = Depends(get_db)):
-    category = db.query(Category).filter(Category.id == category_id, Category.user_id == user_id).first()
+async def delete_category(category_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    category = (await db.scalars(select(Category).where(Category.id == category_id, Category.user_id == user_id))).first()
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
 
-    db.delete(category)
-    db.commit()
-    return {"detail": "Category deleted"}
\ No newline at end of file
+    await db.delete(category)
+    await db.commit()
+    return {"detail": "Category deleted"}
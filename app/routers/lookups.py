@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Request, Response
+from app.core.lookups import lookup_cache
+from app.core.metrics import TimedRoute
+from app.db.versioning import etag_matches
+from app.schemas.todo import LookupsResponse
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get("/", response_model=LookupsResponse)
+def get_lookups(request: Request):
+    # Served from the in-memory snapshot; the pre-encoded body and its ETag
+    # only change when the cache is invalidated.
+    snapshot = lookup_cache.snapshot()
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
@@ -1,56 +1,87 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from app.db.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.core.fastjson import FastJSONResponse
+from app.core.metrics import TimedRoute
+from app.db.database import get_async_db
+from app.db.pagination import paginate, page_rows, MAX_PAGE_SIZE
+from app.db.projections import NOTE
+from app.db.versioning import changes_since, not_modified
 from app.models.note import Note
-from app.schemas.note import NoteCreate, NoteResponse, NoteUpdate
+from app.schemas.note import NoteChanges, NoteCreate, NoteResponse, NoteUpdate
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/", response_model=NoteResponse)
-def create_note(note: NoteCreate, user_id: int, db: Session = Depends(get_db)):
+async def create_note(note: NoteCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
     db_note = Note(**note.model_dump(), user_id=user_id)
     db.add(db_note)
-    db.commit()
-    db.refresh(db_note)
+    await db.commit()
+    await db.refresh(db_note)
     return db_note
 
 
 @router.get("/", response_model=List[NoteResponse])
-def get_notes(user_id: int, db: Session = Depends(get_db)):
-    notes = db.query(Note).filter(Note.user_id == user_id).all()
-    return notes
+async def get_notes(
+    user_id: int,
+    request: Request,
+    response: Response,
+    category_id: Optional[int] = None,
+    event_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    cached = await not_modified(db, request, response, user_id, "notes")
+    if cached:
+        return cached
+
+    stmt = select(*NOTE.columns).where(Note.user_id == user_id)
+    if category_id is not None:
+        stmt = stmt.where(Note.category_id == category_id)
+    if event_id is not None:
+        stmt = stmt.where(Note.event_id == event_id)
+
+    columns = [Note.id]
+    rows = page_rows(await db.execute(paginate(stmt, columns, cursor, limit)), response, columns, limit)
+    return FastJSONResponse(NOTE.rows(rows), headers=response.headers)
+
+
+@router.get("/changes", response_model=NoteChanges)
+async def get_note_changes(user_id: int, since: int = Query(..., ge=0), db: AsyncSession = Depends(get_async_db)):
+    return await changes_since(db, user_id, "notes", since)
 
 
 @router.get("/{note_id}", response_model=NoteResponse)
-def get_note(note_id: int, user_id: int, db: Session = Depends(get_db)):
-    note = db.query(Note).filter(Note.id == note_id, Note.user_id == user_id).first()
+async def get_note(note_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    note = (await db.scalars(select(Note).where(Note.id == note_id, Note.user_id == user_id))).first()
     if not note:
         raise HTTPException(status_code=404, detail="Note not found.")
     return note
 
 
 @router.put("/{note_id}", response_model=NoteResponse)
-def update_note(note_id: int, note_update: NoteUpdate, user_id: int, db: Session = Depends(get_db)):
-    note = db.query(Note).filter(Note.id == note_id, Note.user_id == user_id).first()
+async def update_note(note_id: int, note_update: NoteUpdate, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    note = (await db.scalars(select(Note).where(Note.id == note_id, Note.user_id == user_id))).first()
     if not note:
         raise HTTPException(status_code=404, detail="Note not found.")
-    
+
     update_data = note_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(note, field, value)
 
-    db.commit()
-    db.refresh(note)
+    await db.commit()
+    await db.refresh(note)
     return note
 
 
 @router.delete("/{note_id}")
-def delete_note(note_id: int, db: Session = Depends(get_db)):
-    note = db.query(Note).filter(Note.id == note_id).first()
+async def delete_note(note_id: int, db: AsyncSession = Depends(get_async_db)):
+    note = (await db.scalars(select(Note).where(Note.id == note_id))).first()
     if not note:
         raise HTTPException(status_code=404, detail="Note not found.")
-    
-    db.delete(note)
-    db.commit()
-    return {"message": "Note deleted."}
\ No newline at end of file
+
+    await db.delete(note)
+    await db.commit()
+    return {"message": "Note deleted."}
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.core.metrics import TimedRoute
+from app.db.database import get_async_db
+from app.db.pagination import decode_offset, offset_page
+from app.db.search import SEARCH_KINDS, TRUNCATED_HEADER, search
+from app.schemas.search import SearchHit
+
+router = APIRouter(route_class=TimedRoute)
+
+MAX_SEARCH_RESULTS = 100
+
+
+@router.get("/", response_model=List[SearchHit])
+async def search_notes_and_tasks(
+    user_id: int,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    kinds: List[str] = Query(list(SEARCH_KINDS)),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_RESULTS),
+    db: AsyncSession = Depends(get_async_db),
+):
+    unknown = set(kinds) - set(SEARCH_KINDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown kinds: {', '.join(sorted(unknown))}.")
+
+    offset = decode_offset(cursor)
+    hits, truncated = await search(db, user_id, q, list(dict.fromkeys(kinds)), limit + 1, offset)
+    if truncated:
+        response.headers[TRUNCATED_HEADER] = "true"
+    return offset_page(hits, response, offset, limit)
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.lookups import lookup_cache
+from app.core.metrics import TimedRoute
+from app.core.stats import stats_cache
+from app.db.database import get_async_db
+from app.db.versioning import etag_matches
+from app.models.category import Category
+from app.models.event import Event
+from app.models.sync import CollectionVersion
+from app.models.task import Task, Subtask
+from app.routers.events import overlapping_events
+from app.schemas.stats import DashboardStats
+
+router = APIRouter(route_class=TimedRoute)
+
+STATS_COLLECTIONS = ("tasks", "events")
+
+
+def _lookup_counts(rows, counts: dict, order: str) -> list:
+    return [
+        {"id": row["id"], "code": row["code"], "label": row["label"], "count": counts.get(row["id"], 0)}
+        for row in sorted(rows.values(), key=lambda row: row[order])
+    ]
+
+
+async def compute_stats(db, user_id: int, now: datetime, week_start: datetime) -> DashboardStats:
+    snapshot = lookup_cache.snapshot()
+    final_ids = {row["id"] for row in snapshot.rows("statuses").values() if row["is_final"]}
+
+    # One pass over the covering (user_id, status_id, priority_id, category_id,
+    # due_date) index, grouped in index order; everything else is folded here
+    overdue = func.sum(case((Task.due_date < now, 1), else_=0))
+    groups = (await db.execute(
+        select(Task.status_id, Task.priority_id, Task.category_id, func.count(), overdue)
+        .where(Task.user_id == user_id)
+        .group_by(Task.status_id, Task.priority_id, Task.category_id)
+    )).all()
+    by_status, by_priority, by_category = {}, {}, {}
+    totals = {"tasks_total": 0, "tasks_completed": 0, "overdue": 0}
+    for status_id, priority_id, category_id, count, past_due in groups:
+        done = status_id in final_ids
+        by_status[status_id] = by_status.get(status_id, 0) + count
+        by_priority[priority_id] = by_priority.get(priority_id, 0) + count
+        category = by_category.setdefault(category_id, {"count": 0, "completed": 0})
+        category["count"] += count
+        totals["tasks_total"] += count
+        if done:
+            category["completed"] += count
+            totals["tasks_completed"] += count
+        else:
+            totals["overdue"] += past_due or 0
+
+    names = {}
+    if set(by_category) - {None}:
+        names = {row.id: row for row in await db.execute(
+            select(Category.id, Category.name, Category.color_code)
+            .where(Category.user_id == user_id, Category.id.in_(set(by_category) - {None}))
+        )}
+    categories = [
+        {"id": category_id, "name": names[category_id].name if category_id in names else None,
+         "color_code": names[category_id].color_code if category_id in names else None, **counts}
+        for category_id, counts in by_category.items()
+    ]
+    categories.sort(key=lambda c: (-c["count"], c["name"] is None, c["name"] or ""))
+
+    per_task = (
+        select(func.count().label("total"), func.sum(case((Subtask.is_completed, 1), else_=0)).label("done"))
+        .join(Task, Task.id == Subtask.task_id)
+        .where(Task.user_id == user_id)
+        .group_by(Task.version, Task.id)  # the order tasks come off their (user_id, version) index
+        .subquery()
+    )
+    tasks_with_subtasks, subtasks_total, subtasks_done, tasks_all_completed = (await db.execute(select(
+        func.count(), func.sum(per_task.c.total), func.sum(per_task.c.done),
+        func.sum(case((per_task.c.done == per_task.c.total, 1), else_=0)),
+    ))).one()
+    subtasks_total, subtasks_done = subtasks_total or 0, subtasks_done or 0
+
+    events_this_week = await db.scalar(
+        select(func.count()).select_from(
+            overlapping_events(user_id, week_start, week_start + timedelta(days=7), Event.id).order_by(None).subquery()
+        )
+    )
+
+    return DashboardStats(
+        as_of=now,
+        week_start=week_start,
+        **totals,
+        by_status=_lookup_counts(snapshot.rows("statuses"), by_status, "id"),
+        by_priority=_lookup_counts(snapshot.rows("priorities"), by_priority, "sort_order"),
+        by_category=categories,
+        subtasks={
+            "total": subtasks_total,
+            "completed": subtasks_done,
+            "completion_ratio": subtasks_done / subtasks_total if subtasks_total else 0.0,
+            "tasks_with_subtasks": tasks_with_subtasks,
+            "tasks_all_completed": tasks_all_completed or 0,
+        },
+        events_this_week=events_this_week,
+    )
+
+
+@router.get("/", response_model=DashboardStats)
+async def get_stats(
+    user_id: int,
+    request: Request,
+    now: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    # `now` is the client's wall-clock time (stored times are naive); it picks
+    # the week and what counts as overdue. To the minute, so requests within
+    # one minute can share a cache entry.
+    now = (now or datetime.now(timezone.utc)).replace(tzinfo=None, second=0, microsecond=0)
+    week_start = datetime.combine(now.date() - timedelta(days=now.weekday()), datetime.min.time())
+
+    versions = dict((await db.execute(
+        select(CollectionVersion.collection, CollectionVersion.version)
+        .where(CollectionVersion.user_id == user_id, CollectionVersion.collection.in_(STATS_COLLECTIONS))
+    )).all())
+    key = (tuple(versions.get(c, 0) for c in STATS_COLLECTIONS), now)
+    cached = stats_cache.get(user_id, key)
+    if cached is None:
+        stats = await compute_stats(db, user_id, now, week_start)
+        cached = stats_cache.set(user_id, key, stats.model_dump_json().encode())
+    body, etag = cached
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,100 +1,351 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from app.db.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
+from typing import List, Optional
+from datetime import datetime
+from itertools import islice
+from app.core.fastjson import FastJSONResponse
+from app.db.database import get_async_db
+from app.db.pagination import paginate, page_rows, MAX_PAGE_SIZE
+from app.db.projections import task_row_select, task_rows
+from app.db.versioning import bump_version, changes_since, not_modified, record_changes
+from app.core import recurrence
+from app.core.metrics import TimedRoute
+from app.core.times import naive_utc
 from app.models.task import Task, Subtask
-from app.schemas.todo import TaskCreate, TaskResponse, TaskUpdate, SubTaskCreate, SubTaskResponse, SubTaskUpdate
+from app.schemas.todo import (
+    TaskCreate, TaskResponse, TaskUpdate, TaskChanges, SubTaskCreate, SubTaskResponse, SubTaskUpdate, AgendaItem,
+    TaskBatchUpdate, SubTaskBatchCreate, SubTaskBatchUpdate, BatchDelete, BatchItemResult, BatchResult,
+)
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+MAX_BATCH_SIZE = 1000
+
+# TaskResponse reads category and subtasks; load them up front so serialization
+# doesn't lazy-load per row (tasks+categories in one query, subtasks in one more).
+def task_select():
+    return select(Task).options(joinedload(Task.category), selectinload(Task.subtasks))
+
+
+def stored_due_date(data: dict) -> dict:
+    """`data` with its due date as naive UTC, the way it is stored and compared."""
+    if data.get("due_date") is not None:
+        data["due_date"] = naive_utc(data["due_date"])
+    return data
+
+
+async def load_task(db: AsyncSession, task_id: int):
+    return (await db.scalars(task_select().where(Task.id == task_id).execution_options(populate_existing=True))).first()
 
 # --- TASK ROUTERS ---
 
 @router.post("/", response_model=TaskResponse)
-def create_task(task: TaskCreate, user_id: int, db: Session = Depends(get_db)):
+async def create_task(task: TaskCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
     # user_id normalde otomatiktir ama şimdilik query parameter olarak alalım
-    new_task = Task(**task.model_dump(), user_id=user_id)
+    new_task = Task(**stored_due_date(task.model_dump()), user_id=user_id)
     db.add(new_task)
-    db.commit()
-    db.refresh(new_task)
-    return new_task
+    await db.commit()
+    return await load_task(db, new_task.id)
 
 
 @router.get("/", response_model=List[TaskResponse])
-def get_tasks(user_id: int, db: Session = Depends(get_db)):
-    tasks = db.query(Task).filter(Task.user_id == user_id).all()
-    return tasks
+async def get_tasks(
+    user_id: int,
+    request: Request,
+    response: Response,
+    status_id: Optional[int] = None,
+    priority_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    due_from: Optional[datetime] = None,
+    due_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    cached = await not_modified(db, request, response, user_id, "tasks")
+    if cached:
+        return cached
+
+    stmt = task_row_select().where(Task.user_id == user_id)
+    if status_id is not None:
+        stmt = stmt.where(Task.status_id == status_id)
+    if priority_id is not None:
+        stmt = stmt.where(Task.priority_id == priority_id)
+    if category_id is not None:
+        stmt = stmt.where(Task.category_id == category_id)
+    if due_from is not None:
+        stmt = stmt.where(Task.due_date >= naive_utc(due_from))
+    if due_to is not None:
+        stmt = stmt.where(Task.due_date < naive_utc(due_to))
+
+    columns = [Task.due_date, Task.id]
+    stmt = paginate(stmt, columns, cursor, limit)
+    rows = page_rows(await db.execute(stmt), response, columns, limit)
+    return FastJSONResponse(await task_rows(db, rows, stmt), headers=response.headers)
+
+
+@router.get("/changes", response_model=TaskChanges)
+async def get_task_changes(user_id: int, since: int = Query(..., ge=0), db: AsyncSession = Depends(get_async_db)):
+    return await changes_since(db, user_id, "tasks", since, task_select())
+
+
+@router.get("/agenda", response_model=List[AgendaItem])
+async def get_agenda(
+    user_id: int,
+    window_start: datetime = Query(..., alias="from"),
+    window_end: datetime = Query(..., alias="to"),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+):
+    window_start, window_end = naive_utc(window_start), naive_utc(window_end)
+    if window_end <= window_start:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'.")
+
+    one_off = await db.scalars(
+        select(Task)
+        .where(
+            Task.user_id == user_id,
+            Task.recurrence_type_id == recurrence.NONE,
+            Task.due_date >= window_start,
+            Task.due_date < window_end,
+        )
+        .order_by(Task.due_date, Task.id)
+    )
+    recurring = await db.scalars(select(Task).where(
+        Task.user_id == user_id,
+        Task.recurrence_type_id.in_([recurrence.DAILY, recurrence.WEEKLY, recurrence.WEEKDAYS, recurrence.WEEKENDS]),
+        Task.due_date < window_end,
+        (Task.recurrence_end_date.is_(None)) | (Task.recurrence_end_date >= window_start.date()),
+    ))
+
+    series = [(task, iter([task.due_date])) for task in one_off]
+    series += [
+        (task, recurrence.occurrences(task.due_date, task.recurrence_type_id, task.recurrence_end_date, window_start, window_end))
+        for task in recurring
+    ]
+    merged = islice(recurrence.merge_occurrences(series), limit)
+    return [
+        AgendaItem(
+            task_id=task.id,
+            title=task.title,
+            occurrence=when,
+            is_recurring=task.recurrence_type_id != recurrence.NONE,
+            priority_id=task.priority_id,
+            status_id=task.status_id,
+            category_id=task.category_id,
+            color_code=task.color_code,
+        )
+        for when, task in merged
+    ]
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
-def get_task(task_id: int, user_id: int, db: Session = Depends(get_db)):
-    task = db.query(Task).filter(Task.id == task_id, Task.user_id == user_id).first()
+async def get_task(task_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    task = (await db.scalars(task_select().where(Task.id == task_id, Task.user_id == user_id))).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found.")
     return task
 
 
 @router.put("/{task_id}", response_model=TaskResponse)
-def update_task(task_id: int, task_update: TaskUpdate, user_id: int, db: Session = Depends(get_db)):
-    task = db.query(Task).filter(Task.id == task_id, Task.user_id == user_id).first()
+async def update_task(task_id: int, task_update: TaskUpdate, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    task = (await db.scalars(select(Task).where(Task.id == task_id, Task.user_id == user_id))).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found.")
-    
-    update_data = task_update.model_dump(exclude_unset=True)
+
+    update_data = stored_due_date(task_update.model_dump(exclude_unset=True))
     for field, value in update_data.items():
         setattr(task, field, value)
 
-    db.commit()
-    db.refresh(task)
-    return task
+    await db.commit()
+    return await load_task(db, task.id)
 
 
 @router.delete("/{task_id}")
-def delete_task(task_id: int, user_id: int, db: Session = Depends(get_db)):
-    task = db.query(Task).filter(Task.id == task_id, Task.user_id == user_id).first()
+async def delete_task(task_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    task = (await db.scalars(select(Task).where(Task.id == task_id, Task.user_id == user_id))).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found.")
-    
-    db.delete(task)
-    db.commit()
+
+    await db.delete(task)
+    await db.commit()
     return {"detail": "Task deleted successfully."}
 
+# --- BATCH ROUTES ---
+# One transaction per request, set-based statements instead of one commit per item.
+# Items that don't exist or belong to another user are reported per item.
+
+def check_batch_size(items):
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SIZE} items per batch.")
+
+
+def owned_subtask_ids(user_id: int):
+    return select(Subtask.id).join(Task, Subtask.task_id == Task.id).where(Task.user_id == user_id)
+
+
+def owned_subtask(subtask_id: int, user_id: int):
+    # Joined to its own parent: a primary key lookup on each table. The parent
+    # comes back loaded, so the version bump on flush needs no query of its own.
+    return (
+        select(Subtask)
+        .join(Subtask.task)
+        .where(Subtask.id == subtask_id, Task.user_id == user_id)
+        .options(contains_eager(Subtask.task))
+    )
+
+
+def parent_task_ids(subtask_ids):
+    return select(Subtask.task_id).where(Subtask.id.in_(subtask_ids))
+
+
+async def batch_update(db: AsyncSession, model, owned_ids: set, items, record, stored=lambda data: data) -> BatchResult:
+    results, groups, seen = [], {}, set()
+    for index, item in enumerate(items):
+        if item.id in seen:
+            results.append(BatchItemResult(index=index, id=item.id, ok=False, detail="Duplicate id in batch."))
+            continue
+        seen.add(item.id)
+        if item.id not in owned_ids:
+            results.append(BatchItemResult(index=index, id=item.id, ok=False, detail="Not found."))
+            continue
+        # Items with identical changes share one UPDATE ... WHERE id IN (...)
+        values = tuple(sorted(stored(item.model_dump(exclude_unset=True, exclude={"id"})).items()))
+        groups.setdefault(values, []).append(item.id)
+        results.append(BatchItemResult(index=index, id=item.id))
+
+    changed = []
+    for values, ids in groups.items():
+        if values:
+            await db.execute(update(model).where(model.id.in_(ids)).values(dict(values)).execution_options(synchronize_session=False))
+            changed += ids
+    if changed:
+        await record(changed)
+    await db.commit()
+    return BatchResult(results=results)
+
+
+async def batch_delete(db: AsyncSession, owned_ids: set, ids: List[int], statements, record) -> BatchResult:
+    results = [
+        BatchItemResult(index=index, id=item_id, ok=item_id in owned_ids, detail=None if item_id in owned_ids else "Not found.")
+        for index, item_id in enumerate(ids)
+    ]
+    if owned_ids:
+        await record(list(owned_ids))
+        for stmt in statements(list(owned_ids)):
+            await db.execute(stmt.execution_options(synchronize_session=False))
+    await db.commit()
+    return BatchResult(results=results)
+
+
+@router.post("/batch", response_model=BatchResult)
+async def create_tasks(tasks: List[TaskCreate], user_id: int, db: AsyncSession = Depends(get_async_db)):
+    check_batch_size(tasks)
+    if not tasks:
+        return BatchResult(results=[])
+    version = await db.run_sync(bump_version, user_id, "tasks")
+    rows = [{**stored_due_date(task.model_dump()), "user_id": user_id, "version": version} for task in tasks]
+    ids = (await db.scalars(insert(Task).returning(Task.id, sort_by_parameter_order=True), rows)).all()
+    await db.commit()
+    return BatchResult(results=[BatchItemResult(index=index, id=task_id) for index, task_id in enumerate(ids)])
+
+
+@router.patch("/batch", response_model=BatchResult)
+async def update_tasks(tasks: List[TaskBatchUpdate], user_id: int, db: AsyncSession = Depends(get_async_db)):
+    check_batch_size(tasks)
+    owned = set(await db.scalars(select(Task.id).where(Task.user_id == user_id, Task.id.in_({t.id for t in tasks}))))
+    return await batch_update(db, Task, owned, tasks, lambda ids: db.run_sync(record_changes, user_id, "tasks", Task.id.in_(ids)),
+                              stored_due_date)
+
+
+@router.post("/batch/delete", response_model=BatchResult)
+async def delete_tasks(batch: BatchDelete, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    check_batch_size(batch.ids)
+    owned = set(await db.scalars(select(Task.id).where(Task.user_id == user_id, Task.id.in_(batch.ids))))
+
+    def statements(ids):
+        # SQLite doesn't enforce ON DELETE CASCADE unless foreign keys are enabled
+        return [delete(Subtask).where(Subtask.task_id.in_(ids)), delete(Task).where(Task.id.in_(ids))]
+
+    return await batch_delete(db, owned, batch.ids, statements, lambda ids: db.run_sync(record_changes, user_id, "tasks", deleted=ids))
+
+
+@router.post("/subtasks/batch", response_model=BatchResult)
+async def create_subtasks(subtasks: List[SubTaskBatchCreate], user_id: int, db: AsyncSession = Depends(get_async_db)):
+    check_batch_size(subtasks)
+    owned_tasks = set(await db.scalars(select(Task.id).where(Task.user_id == user_id, Task.id.in_({s.task_id for s in subtasks}))))
+    valid = [(index, s) for index, s in enumerate(subtasks) if s.task_id in owned_tasks]
+
+    ids = []
+    if valid:
+        rows = [{"task_id": s.task_id, "title": s.title, "is_completed": s.is_completed} for _, s in valid]
+        ids = (await db.scalars(insert(Subtask).returning(Subtask.id, sort_by_parameter_order=True), rows)).all()
+        await db.run_sync(record_changes, user_id, "tasks", Task.id.in_({s.task_id for _, s in valid}))
+    await db.commit()
+
+    created = {index: subtask_id for (index, _), subtask_id in zip(valid, ids)}
+    return BatchResult(results=[
+        BatchItemResult(index=index, id=created[index]) if index in created
+        else BatchItemResult(index=index, ok=False, detail="Task not found.")
+        for index in range(len(subtasks))
+    ])
+
+
+@router.patch("/subtasks/batch", response_model=BatchResult)
+async def update_subtasks(subtasks: List[SubTaskBatchUpdate], user_id: int, db: AsyncSession = Depends(get_async_db)):
+    check_batch_size(subtasks)
+    owned = set(await db.scalars(owned_subtask_ids(user_id).where(Subtask.id.in_({s.id for s in subtasks}))))
+    return await batch_update(db, Subtask, owned, subtasks, lambda ids: db.run_sync(record_changes, user_id, "tasks", Task.id.in_(parent_task_ids(ids))))
+
+
+@router.post("/subtasks/batch/delete", response_model=BatchResult)
+async def delete_subtasks(batch: BatchDelete, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    check_batch_size(batch.ids)
+    owned = set(await db.scalars(owned_subtask_ids(user_id).where(Subtask.id.in_(batch.ids))))
+
+    def statements(ids):
+        return [delete(Subtask).where(Subtask.id.in_(ids))]
+
+    return await batch_delete(db, owned, batch.ids, statements, lambda ids: db.run_sync(record_changes, user_id, "tasks", Task.id.in_(parent_task_ids(ids))))
+
 # --- SUBTASK ROUTES ---
 
 @router.post("/{task_id}/subtasks/", response_model=SubTaskResponse)
-def create_subtask(task_id: int, subtask: SubTaskCreate, user_id: int, db: Session = Depends(get_db)):
-    task = db.query(Task).filter(Task.id == task_id, Task.user_id == user_id).first()
+async def create_subtask(task_id: int, subtask: SubTaskCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    task = (await db.scalars(select(Task).where(Task.id == task_id, Task.user_id == user_id))).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found.")
-    
-    new_subtask = Subtask(title=subtask.title, is_completed=subtask.is_completed, task_id=task_id) 
+
+    new_subtask = Subtask(title=subtask.title, is_completed=subtask.is_completed, task_id=task_id)
     db.add(new_subtask)
-    db.commit()
-    db.refresh(new_subtask)
+    await db.commit()
+    await db.refresh(new_subtask)
     return new_subtask
 
 
 @router.put("/subtasks/{subtask_id}", response_model=SubTaskResponse)
-def update_subtask(subtask_id: int, subtask_update: SubTaskUpdate, user_id: int, db: Session = Depends(get_db)):
-    subtask = db.query(Subtask).filter(Subtask.id == subtask_id, Task.user_id == user_id).first()
+async def update_subtask(subtask_id: int, subtask_update: SubTaskUpdate, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    subtask = (await db.scalars(owned_subtask(subtask_id, user_id))).first()
     if not subtask:
         raise HTTPException(status_code=404, detail="Subtask not found.")
-    
+
     update_data = subtask_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(subtask, field, value)
 
-    db.commit()
-    db.refresh(subtask)
+    await db.commit()
+    await db.refresh(subtask)
     return subtask
 
 
 @router.delete("/subtasks/{subtask_id}")
-def delete_subtask(subtask_id: int, user_id: int, db: Session = Depends(get_db)):
-    subtask = db.query(Subtask).filter(Subtask.id == subtask_id, Task.user_id == user_id).first()
+async def delete_subtask(subtask_id: int, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    subtask = (await db.scalars(owned_subtask(subtask_id, user_id))).first()
     if not subtask:
         raise HTTPException(status_code=404, detail="Subtask not found.")
-    
-    db.delete(subtask)
-    db.commit()
-    return {"detail": "Subtask deleted successfully."}
 
+    await db.delete(subtask)
+    await db.commit()
+    return {"detail": "Subtask deleted successfully."}
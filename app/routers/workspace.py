@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.metrics import TimedRoute
+from app.core.workspace import export_lines, gzipped, import_lines
+from app.db.database import get_async_db
+from app.schemas.workspace import ImportResult
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_workspace(user_id: int, gzip: bool = False, db: AsyncSession = Depends(get_async_db)):
+    chunks = export_lines(db, user_id)
+    filename = f"workspace-{user_id}.ndjson"
+    if gzip:
+        chunks, filename = gzipped(chunks), filename + ".gz"
+    return StreamingResponse(
+        chunks,
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/import", response_model=ImportResult)
+async def import_workspace(user_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    # Body: an export, as NDJSON or gzip; read as it arrives
+    counts = await import_lines(db, user_id, request.stream())
+    await db.commit()
+    return counts
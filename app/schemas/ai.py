@@ -1,5 +1,15 @@
 from pydantic import BaseModel
+from typing import List
+from app.schemas.event import EventResponse
+from app.schemas.note import NoteResponse
+from app.schemas.todo import TaskResponse, SubTaskResponse
 
 class AIRequest(BaseModel):
     prompt: str
-    user_id: int 
\ No newline at end of file
+    user_id: int 
+
+class AIPersistResponse(BaseModel):
+    tasks: List[TaskResponse] = []
+    events: List[EventResponse] = []
+    notes: List[NoteResponse] = []
+    subtasks: List[SubTaskResponse] = []
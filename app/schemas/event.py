@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class EventBase(BaseModel):
     title: str
@@ -23,4 +23,36 @@ class EventUpdate(BaseModel):
 class EventResponse(EventBase):
     id: int
     user_id: int
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class EventChanges(BaseModel):
+    version: int
+    changed: List[EventResponse]
+    deleted: List[int]
+
+class EventConflict(BaseModel):
+    id: int
+    title: str
+    start_time: datetime
+    end_time: datetime
+    model_config = ConfigDict(from_attributes=True)
+
+class EventWriteResponse(EventResponse):
+    # Only present when the write asked for check_conflicts
+    conflicts: Optional[List[EventConflict]] = None
+
+class BusyInterval(BaseModel):
+    start: datetime
+    end: datetime
+    events: int
+
+class FreeSlot(BaseModel):
+    start: datetime
+    end: datetime
+    minutes: int
+
+class FreeBusy(BaseModel):
+    window_start: datetime
+    window_end: datetime
+    busy: List[BusyInterval]
+    free: List[FreeSlot]
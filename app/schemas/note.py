@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class NoteBase(BaseModel):
     title: str
@@ -23,4 +23,9 @@ class NoteResponse(NoteBase):
     user_id: int
     color_code: Optional[str] = None
     created_at: datetime
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class NoteChanges(BaseModel):
+    version: int
+    changed: List[NoteResponse]
+    deleted: List[int]
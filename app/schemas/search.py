@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+from typing import Literal
+
+class SearchHit(BaseModel):
+    kind: Literal["notes", "tasks"]
+    id: int
+    title: str
+    snippet: str      # HTML-escaped, matches wrapped in <mark>
+    score: float      # higher is better; only comparable within one response
@@ -0,0 +1,36 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+
+class LookupCount(BaseModel):
+    id: int
+    code: str
+    label: str
+    count: int
+
+class CategoryCount(BaseModel):
+    # id/name are null for tasks without a category
+    id: Optional[int] = None
+    name: Optional[str] = None
+    color_code: Optional[str] = None
+    count: int
+    completed: int
+
+class SubtaskStats(BaseModel):
+    total: int
+    completed: int
+    completion_ratio: float
+    tasks_with_subtasks: int
+    tasks_all_completed: int
+
+class DashboardStats(BaseModel):
+    as_of: datetime
+    week_start: datetime
+    tasks_total: int
+    tasks_completed: int
+    overdue: int
+    by_status: List[LookupCount]
+    by_priority: List[LookupCount]
+    by_category: List[CategoryCount]
+    subtasks: SubtaskStats
+    events_this_week: int
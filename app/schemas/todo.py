@@ -1,7 +1,8 @@
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import Optional, List
 from datetime import datetime, date
 from app.core.enums import task_status, priority_level, recurrence_type as rec_type
+from app.core.lookups import lookup_cache
 from app.schemas.category import CategoryResponse
 
 # --- SUBTASK SCHEMAS ---
@@ -20,6 +21,14 @@ class SubTaskResponse(SubTaskCreate):
     model_config = ConfigDict(from_attributes=True)
 
 # --- TASK SCHEMAS ---
+LOOKUP_FIELDS = {"priority_id": "priorities", "status_id": "statuses", "recurrence_type_id": "recurrence_types"}
+
+def check_lookup_id(value, info):
+    # Checked against the in-memory lookup snapshot, not the database
+    if value is not None and not lookup_cache.snapshot().has(LOOKUP_FIELDS[info.field_name], value):
+        raise ValueError(f"Unknown {info.field_name} {value}.")
+    return value
+
 class TaskBase(BaseModel):
     title: str
     description: Optional[str] = None
@@ -33,6 +42,8 @@ class TaskCreate(TaskBase):
     recurrence_type_id: int = 1
     recurrence_end_date : Optional[date] = None
 
+    _check_lookups = field_validator(*LOOKUP_FIELDS)(check_lookup_id)
+
 class TaskUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
@@ -45,6 +56,8 @@ class TaskUpdate(BaseModel):
     color_code: Optional[str] = None
     model_config = ConfigDict(extra="ignore")
 
+    _check_lookups = field_validator(*LOOKUP_FIELDS)(check_lookup_id)
+
 class TaskResponse(TaskBase):
     id: int
     user_id: int
@@ -56,8 +69,56 @@ class TaskResponse(TaskBase):
     subtasks: List[SubTaskResponse] = Field(default_factory=list)  
     model_config = ConfigDict(from_attributes=True)
 
+class TaskChanges(BaseModel):
+    version: int
+    changed: List[TaskResponse]
+    deleted: List[int]
+
+class AgendaItem(BaseModel):
+    task_id: int
+    title: str
+    occurrence: datetime
+    is_recurring: bool
+    priority_id: int
+    status_id: int
+    category_id: Optional[int] = None
+    color_code: Optional[str] = None
+
+# --- BATCH SCHEMAS ---
+class TaskBatchUpdate(TaskUpdate):
+    id: int
+
+class SubTaskBatchCreate(SubTaskCreate):
+    task_id: int
+
+class SubTaskBatchUpdate(SubTaskUpdate):
+    id: int
+
+class BatchDelete(BaseModel):
+    ids: List[int]
+
+class BatchItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    ok: bool = True
+    detail: Optional[str] = None
+
+class BatchResult(BaseModel):
+    results: List[BatchItemResult]
+
 class LookupBase(BaseModel):
     id: int
     code: str
     label: str
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class PriorityLevelResponse(LookupBase):
+    sort_order: int
+
+class TaskStatusResponse(LookupBase):
+    is_final: bool
+
+class LookupsResponse(BaseModel):
+    priorities: List[PriorityLevelResponse]
+    statuses: List[TaskStatusResponse]
+    recurrence_types: List[LookupBase]
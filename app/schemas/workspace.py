@@ -0,0 +1,36 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from app.schemas.category import CategoryCreate
+from app.schemas.event import EventCreate
+from app.schemas.note import NoteCreate
+from app.schemas.todo import SubTaskCreate, TaskCreate
+
+# One line of a workspace export. `id` (and task_id, category_id, event_id)
+# are the ids in the exporting database; import maps them to new ones.
+class CategoryRecord(CategoryCreate):
+    id: int
+
+class EventRecord(EventCreate):
+    id: int
+
+class TaskRecord(TaskCreate):
+    id: int
+    created_at: Optional[datetime] = None
+
+class SubtaskRecord(SubTaskCreate):
+    id: int
+    task_id: int
+    created_at: Optional[datetime] = None
+
+class NoteRecord(NoteCreate):
+    id: int
+    color_code: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class ImportResult(BaseModel):
+    categories: int = 0
+    events: int = 0
+    tasks: int = 0
+    subtasks: int = 0
+    notes: int = 0
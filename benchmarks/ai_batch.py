@@ -0,0 +1,101 @@
+"""/ai/parse under a burst of concurrent requests with and without
+micro-batching (AI_BATCH_ENABLED), and /ai/parse-batch for the same texts.
+
+    python -m benchmarks.ai_batch --requests 200 --latency 0.3
+
+Gemini is the fake client: every call takes --latency seconds whatever its
+size, so this shows Gemini calls, limiter rejections (429) and the latency
+the window adds, not how much longer a real model takes to answer a batch.
+The parse cache is cleared before each run.
+
+Then checks that empty answers (text None, as when Gemini blocks a response)
+and JSON that isn't a result object (a list, a number, a non-list section)
+come back as the invalid-JSON error on every route, batched or not, rather
+than a 500; exits non-zero if not.
+"""
+import argparse
+import asyncio
+import sys
+import time
+import httpx
+from app.core import gemini
+from app.core.ai_cache import parse_cache
+from app.routers.ai import INVALID_JSON
+from app.core.config import settings
+from app.main import app
+from benchmarks.common import temp_app
+
+
+async def burst(client, texts: list) -> tuple:
+    """(status codes, seconds per request)."""
+    async def one(text):
+        t0 = time.perf_counter()
+        response = await client.post("/ai/parse", json={"text": text})
+        return response.status_code, time.perf_counter() - t0
+
+    return tuple(zip(*await asyncio.gather(*(one(text) for text in texts))))
+
+
+async def run(args):
+    texts = [f"Read chapter {i} before Friday" for i in range(args.requests)]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        print(f"{'mode':<26}{'gemini calls':>13}{'ok':>6}{'429':>6}{'p50 ms':>9}{'p95 ms':>9}{'wall ms':>9}")
+        for name, batching in (("/ai/parse", False), ("/ai/parse, batched", True)):
+            settings.AI_BATCH_ENABLED = batching
+            parse_cache.clear()
+            gemini.client = gemini.FakeGeminiClient(latency=args.latency)
+            t0 = time.perf_counter()
+            statuses, seconds = await burst(client, texts)
+            wall = time.perf_counter() - t0
+            ok = sorted(s for status, s in zip(statuses, seconds) if status == 200)
+            p50, p95 = (ok[int(len(ok) * q)] * 1000 if ok else 0.0 for q in (0.5, 0.95))
+            print(f"{name:<26}{gemini.client.calls:>13}{statuses.count(200):>6}{statuses.count(429):>6}"
+                  f"{p50:>9.0f}{p95:>9.0f}{wall * 1000:>9.0f}")
+
+        parse_cache.clear()
+        gemini.client = gemini.FakeGeminiClient(latency=args.latency)
+        t0 = time.perf_counter()
+        for start in range(0, len(texts), settings.AI_PARSE_BATCH_LIMIT):
+            response = await client.post("/ai/parse-batch", json={"texts": texts[start:start + settings.AI_PARSE_BATCH_LIMIT]})
+            assert response.status_code == 200, response.text
+        wall = (time.perf_counter() - t0) * 1000
+        print(f"{'/ai/parse-batch':<26}{gemini.client.calls:>13}{len(texts):>6}{0:>6}{'':>9}{'':>9}{wall:>9.0f}")
+
+        ok = await bad_answers(client, texts[:8])
+        print(f"empty and non-object answers give the invalid-JSON error on every route: {ok}")
+        return ok
+
+
+async def bad_answers(client, texts: list) -> bool:
+    """No text at all, and JSON that isn't a result object."""
+    ok = True
+    user_id = (await client.post("/auth/register", json={"username": "bad", "email": "bad@example.com", "password": "x"})).json()["id"]
+    for fake in (gemini.FakeGeminiClient(latency=0.01, empty=True), gemini.FakeGeminiClient(latency=0.01, answer="[1, 2]"),
+                 gemini.FakeGeminiClient(latency=0.01, answer="42"), gemini.FakeGeminiClient(latency=0.01, answer='{"tasks": 1}')):
+        gemini.client = fake
+        for batching in (False, True):
+            settings.AI_BATCH_ENABLED = batching
+            parse_cache.clear()
+            responses = await asyncio.gather(*(client.post("/ai/parse", json={"text": text}) for text in texts))
+            ok &= all(r.status_code == 200 and r.json().get("error") == INVALID_JSON for r in responses)
+        response = await client.post("/ai/parse-batch", json={"texts": texts})
+        ok &= response.status_code == 200 and all(item.get("error") == INVALID_JSON for item in response.json()["results"])
+        response = await client.post("/ai/parse-and-save", params={"user_id": user_id}, json={"text": texts[0]})
+        ok &= response.status_code == 502 and response.json()["detail"]["error"] == INVALID_JSON
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200, help="concurrent /ai/parse requests")
+    parser.add_argument("--latency", type=float, default=0.3, help="fake Gemini latency in seconds")
+    args = parser.parse_args()
+    print(f"limiter {gemini.limiter.limit} slots, window {settings.AI_BATCH_WINDOW_MS:g} ms, up to {settings.AI_BATCH_MAX_SIZE} texts per call")
+    with temp_app():
+        ok = asyncio.run(run(args))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
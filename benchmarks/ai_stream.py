@@ -0,0 +1,119 @@
+"""Time to the first parsed item: /ai/parse-stream vs waiting for /ai/parse,
+for a dictation of --items sentences (one task each from the fake client,
+whose answer streams in --chunk-chars pieces over --latency seconds). Also
+checks ResultStreamParser against json.loads over random chunkings and
+truncations, and times it.
+
+    python -m benchmarks.ai_stream --items 5 20 80 --latency 2
+
+Exits non-zero if the incremental parser disagrees with json.loads.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from app.core import gemini
+from app.core.ai_cache import parse_cache
+from app.core.json_stream import SECTIONS, ResultStreamParser
+from app.main import app
+from benchmarks.common import temp_app
+
+
+async def post(path: str, payload: dict) -> tuple:
+    """(seconds to the first item, seconds to the end of the body), straight over ASGI."""
+    body = json.dumps(payload).encode()
+    first_item, pending = None, [body]
+    start = time.perf_counter()
+
+    async def receive():
+        if pending:
+            return {"type": "http.request", "body": pending.pop(), "more_body": False}
+        await asyncio.Event().wait()  # no disconnect; the response's listener is cancelled at the end
+
+    async def send(message):
+        nonlocal first_item
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message
+        elif message["type"] == "http.response.body" and first_item is None and b'"item"' in message.get("body", b""):
+            first_item = time.perf_counter() - start
+
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+             "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+             "headers": [(b"content-type", b"application/json")], "client": ("127.0.0.1", 1), "server": ("bench", 80)}
+    await app(scope, receive, send)
+    done = time.perf_counter() - start
+    return first_item if first_item is not None else done, done
+
+
+async def end_to_end(args):
+    print(f"{'items':>6}{'parse ms':>11}{'stream first ms':>17}{'stream done ms':>16}")
+    for n in args.items:
+        text = " ".join(f"Finish exercise {i} of the problem set." for i in range(n))
+        timings = {}
+        for path in ("/ai/parse", "/ai/parse-stream"):
+            parse_cache.clear()
+            gemini.client = gemini.FakeGeminiClient(latency=args.latency, chunk_chars=args.chunk_chars)
+            timings[path] = await post(path, {"text": text})
+        print(f"{n:>6}{timings['/ai/parse'][1] * 1000:>11.0f}{timings['/ai/parse-stream'][0] * 1000:>17.0f}"
+              f"{timings['/ai/parse-stream'][1] * 1000:>16.0f}")
+
+
+def parser_check(rounds: int) -> bool:
+    rng = random.Random(0)
+    fake = gemini.FakeGeminiClient
+    ok = True
+    for r in range(rounds):
+        doc = fake.result(" ".join(f'Step {i}: "quote" \\ {{brace}} [bracket] ünïcode.' for i in range(rng.randint(0, 30))))
+        doc["events"] = [{"title": f"Event {i}", "nested": {"tasks": [1, 2]}} for i in range(rng.randint(0, 5))]
+        text = "```json\n" + json.dumps(doc, indent=rng.choice([None, 2]), ensure_ascii=rng.random() < 0.5) + "\n```"
+        cut = len(text) if r % 4 else rng.randrange(len(text))  # every 4th answer is truncated
+        parser, got, i = ResultStreamParser(), {s: [] for s in SECTIONS}, 0
+        while i < cut:
+            step = rng.randint(1, 80)
+            for section, item in parser.feed(text[i:min(i + step, cut)]):
+                got[section].append(item)
+            i += step
+        errors = parser.close()
+        if cut == len(text):
+            ok &= got == {s: doc[s] for s in SECTIONS} and not errors
+        else:  # whatever came out must be a prefix of the real sections, and the tail reported
+            ok &= all(got[s] == doc[s][:len(got[s])] for s in SECTIONS) and bool(errors)
+    return ok
+
+
+def parser_speed() -> tuple:
+    """(incremental MB/s in 64-char chunks, json.loads MB/s on the whole text)."""
+    text = json.dumps(gemini.FakeGeminiClient.result(" ".join(f"Sentence number {i}." for i in range(5000))), indent=2)
+    chunks = [text[i:i + 64] for i in range(0, len(text), 64)]
+    t0 = time.perf_counter()
+    parser = ResultStreamParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    incremental = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    json.loads(text)
+    whole = time.perf_counter() - t0
+    return len(text) / incremental / 1e6, len(text) / whole / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, nargs="+", default=[5, 20, 80])
+    parser.add_argument("--latency", type=float, default=2.0, help="fake Gemini time for the whole answer, seconds")
+    parser.add_argument("--chunk-chars", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=500, help="random documents for the parser check")
+    args = parser.parse_args()
+
+    with temp_app():
+        asyncio.run(end_to_end(args))
+    ok = parser_check(args.rounds)
+    incremental, whole = parser_speed()
+    print(f"parser matches json.loads over {args.rounds} random chunkings/truncations: {ok}")
+    print(f"parser {incremental:.1f} MB/s in 64-char chunks (json.loads on the whole text: {whole:.0f} MB/s)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
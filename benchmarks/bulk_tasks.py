@@ -0,0 +1,47 @@
+"""Per-item task/subtask endpoints vs the /tasks/batch endpoints.
+
+    python -m benchmarks.bulk_tasks --items 1000
+"""
+import argparse
+from app.models.user import User
+from benchmarks.common import temp_app, timed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1000)
+    args = parser.parse_args()
+    n = args.items
+
+    with temp_app() as (client, Session, _):
+        with Session() as db:
+            users = [User(username=name, email=f"{name}@example.com", password_hash="x") for name in ("single", "batch")]
+            db.add_all(users)
+            db.commit()
+            single, batch = {"user_id": users[0].id}, {"user_id": users[1].id}
+
+        payload = [{"title": f"Task {i}", "due_date": "2025-01-10T10:00:00"} for i in range(n)]
+
+        task_ids, single_create = timed(lambda: [client.post("/tasks/", params=single, json=t).json()["id"] for t in payload])
+        _, single_update = timed(lambda: [client.put(f"/tasks/{i}", params=single, json={"status_id": 2}) for i in task_ids])
+        subtask_ids, single_sub = timed(lambda: [client.post(f"/tasks/{i}/subtasks/", params=single, json={"title": "Step"}).json()["id"] for i in task_ids])
+        _, single_delete = timed(lambda: [client.delete(f"/tasks/{i}", params=single) for i in task_ids])
+
+        result, batch_create = timed(lambda: client.post("/tasks/batch", params=batch, json=payload).json())
+        batch_ids = [r["id"] for r in result["results"]]
+        _, batch_update = timed(lambda: client.patch("/tasks/batch", params=batch, json=[{"id": i, "status_id": 2} for i in batch_ids]))
+        _, batch_sub = timed(lambda: client.post("/tasks/subtasks/batch", params=batch, json=[{"task_id": i, "title": "Step"} for i in batch_ids]))
+        _, batch_delete = timed(lambda: client.post("/tasks/batch/delete", params=batch, json={"ids": batch_ids}))
+
+    print(f"{'operation':<18}{'per-item ms':>14}{'batch ms':>12}{'speedup':>10}")
+    for name, a, b in [
+        ("create tasks", single_create, batch_create),
+        ("complete tasks", single_update, batch_update),
+        ("create subtasks", single_sub, batch_sub),
+        ("delete tasks", single_delete, batch_delete),
+    ]:
+        print(f"{name:<18}{a:>14.1f}{b:>12.1f}{a / b:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.database import build_async_engine, build_engine, get_async_db, get_db
+from app.db.migrations import migrate
+
+
+@contextmanager
+def temp_app():
+    """Yields (TestClient, sessionmaker, engines) for the app wired to a throwaway
+    SQLite file. engines holds the sync engine and the async engine's sync core,
+    for attaching event hooks."""
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = build_engine(url)
+        async_engine = build_async_engine(url)
+        migrate(engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+        def override_get_db():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        async def override_get_async_db():
+            async with AsyncSession() as db:
+                yield db
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        app.state.engine = engine  # the lifespan checks and loads this one
+        try:
+            with TestClient(app) as client:
+                try:
+                    yield client, Session, (engine, async_engine.sync_engine)
+                finally:
+                    client.portal.call(async_engine.dispose)
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            app.dependency_overrides.pop(get_async_db, None)
+            del app.state.engine
+            engine.dispose()
+
+
+def timed(fn, repeat: int = 1):
+    """Returns (last result, median milliseconds)."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return result, samples[len(samples) // 2] * 1000
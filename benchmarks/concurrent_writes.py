@@ -0,0 +1,91 @@
+"""Concurrent writer stress test for the SQLite engine configuration.
+
+Runs many threads that insert, read-modify-write and list tasks at the same
+time against one database file and counts the writes that failed (e.g.
+"database is locked"). --legacy uses the engine setup this app had before
+build_engine() for comparison.
+
+    python -m benchmarks.concurrent_writes --threads 16 --ops 200
+    python -m benchmarks.concurrent_writes --threads 16 --ops 200 --legacy
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.db.database import build_engine
+from app.db.migrations import migrate
+from app.models.task import Task
+from app.models.user import User
+
+
+def worker(Session, user_id: int, ops: int, failures: list, barrier: threading.Barrier):
+    barrier.wait()
+    for i in range(ops):
+        db = Session()
+        try:
+            task = Task(user_id=user_id, title=f"Task {i}")
+            db.add(task)
+            db.commit()
+            # Read-modify-write while other threads are committing
+            row = db.query(Task).filter(Task.id == task.id).first()
+            row.status_id = 2
+            db.query(Task).filter(Task.user_id == user_id).all()
+            db.commit()
+        except OperationalError as exc:
+            db.rollback()
+            failures.append(str(exc.orig))
+        finally:
+            db.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=200, help="write cycles per thread")
+    parser.add_argument("--legacy", action="store_true", help="old engine: no WAL, default timeouts")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'stress.db')}"
+        if args.legacy:
+            engine = create_engine(url, connect_args={"check_same_thread": False})
+        else:
+            engine = build_engine(url)
+        migrate(engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        with Session() as db:
+            users = [User(username=f"u{i}", email=f"u{i}@example.com", password_hash="x") for i in range(args.threads)]
+            db.add_all(users)
+            db.commit()
+            user_ids = [u.id for u in users]
+
+        failures = []
+        barrier = threading.Barrier(args.threads)
+        threads = [threading.Thread(target=worker, args=(Session, uid, args.ops, failures, barrier)) for uid in user_ids]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+
+        with Session() as db:
+            written = db.query(Task).count()
+        engine.dispose()
+
+    total = args.threads * args.ops
+    print(f"engine={'legacy' if args.legacy else 'build_engine'} threads={args.threads} cycles={total} "
+          f"failed={len(failures)} tasks_written={written} elapsed={elapsed:.2f}s ({total / elapsed:.0f} cycles/s)")
+    for message in sorted(set(failures))[:5]:
+        print(f"  {message}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
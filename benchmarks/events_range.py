@@ -0,0 +1,57 @@
+"""GET /events/range vs GET /events/ for a user with a long calendar history.
+
+    python -m benchmarks.events_range --events 20000
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from app.models.event import Event
+from app.models.user import User
+from benchmarks.common import temp_app, timed
+
+
+def seed(db, n_events: int):
+    rng = random.Random(42)
+    user = User(username="bench", email="bench@example.com", password_hash="x")
+    db.add(user)
+    db.flush()
+    start = datetime(2020, 1, 1)
+    span_minutes = 6 * 365 * 24 * 60
+    for i in range(n_events):
+        begins = start + timedelta(minutes=rng.randrange(span_minutes))
+        # Mostly short meetings, some all-day and a few multi-week events
+        length = rng.choice([30, 60, 90, 24 * 60]) if i % 50 else rng.randrange(1, 60) * 24 * 60
+        db.add(Event(user_id=user.id, title=f"Event {i}", start_time=begins, end_time=begins + timedelta(minutes=length)))
+    db.commit()
+    return user.id
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with temp_app() as (client, Session, _):
+        with Session() as db:
+            user_id = seed(db, args.events)
+
+        window_start, window_end = datetime(2024, 3, 4), datetime(2024, 3, 11)
+        everything, full_ms = timed(lambda: client.get("/events/", params={"user_id": user_id}).json(), args.repeat)
+        in_range, range_ms = timed(lambda: client.get("/events/range", params={
+            "user_id": user_id, "from": window_start.isoformat(), "to": window_end.isoformat(),
+        }).json(), args.repeat)
+
+    expected = sorted(
+        e["id"] for e in everything
+        if datetime.fromisoformat(e["start_time"]) < window_end and datetime.fromisoformat(e["end_time"]) > window_start
+    )
+    assert sorted(e["id"] for e in in_range) == expected, "range endpoint disagrees with the full list"
+
+    print(f"events={args.events} window={window_start:%Y-%m-%d}..{window_end:%Y-%m-%d} matches={len(in_range)}")
+    print(f"full list + client filter: {full_ms:8.2f} ms (median of {args.repeat})")
+    print(f"/events/range:             {range_ms:8.2f} ms (median of {args.repeat})")
+
+
+if __name__ == "__main__":
+    main()
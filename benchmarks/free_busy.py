@@ -0,0 +1,87 @@
+"""GET /events/free-busy and conflict checks on create, for a dense calendar.
+
+    python -m benchmarks.free_busy --events 10000 50000
+
+Events are spread over two years (about 70 a day at 50000): mostly meetings,
+some all-day and a few multi-week ones. "client" is what the calendar had to
+do before: fetch /events/range and merge in the browser (here in Python).
+"scan" is the same merge over a plain (user_id, start_time) range read, which
+touches every event that started before the window ends.
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from operator import itemgetter
+from sqlalchemy import insert, select
+from app.core.freebusy import busy_intervals, free_slots
+from app.models.event import Event, duration_bucket
+from app.models.user import User
+from benchmarks.common import temp_app, timed
+
+START = datetime(2023, 1, 1)
+SPAN_MINUTES = 2 * 365 * 24 * 60
+
+
+def seed(Session, n: int) -> int:
+    rng = random.Random(n)
+    with Session() as db:
+        user = User(username=f"busy{n}", email=f"busy{n}@example.com", password_hash="x")
+        db.add(user)
+        db.flush()
+        rows = []
+        for i in range(n):
+            begins = START + timedelta(minutes=rng.randrange(SPAN_MINUTES) // 15 * 15)
+            length = rng.choice([15, 30, 30, 60, 60, 90, 24 * 60]) if i % 200 else rng.randrange(1, 30) * 24 * 60
+            ends = begins + timedelta(minutes=length)
+            rows.append({"user_id": user.id, "title": f"Event {i}", "start_time": begins, "end_time": ends,
+                         "duration_bucket": duration_bucket(begins, ends)})
+        db.execute(insert(Event.__table__), rows)
+        db.commit()
+        return user.id
+
+
+def merged(rows, window_start, window_end) -> tuple:
+    busy = busy_intervals(sorted(rows, key=itemgetter(0)), window_start, window_end)
+    return len(busy), len(free_slots(busy, window_start, window_end, timedelta(minutes=30)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    windows = [("week", datetime(2024, 6, 3), datetime(2024, 6, 10)), ("year", datetime(2024, 1, 1), datetime(2024, 12, 31))]
+    with temp_app() as (client, Session, _):
+        print(f"{'events':>7}{'window':>8}{'busy':>7}{'free':>7}{'free-busy ms':>14}{'client ms':>11}{'scan ms':>9}  match")
+        for n in args.events:
+            user_id = seed(Session, n)
+            for name, window_start, window_end in windows:
+                params = {"user_id": user_id, "from": window_start.isoformat(), "to": window_end.isoformat()}
+                result, route_ms = timed(lambda: client.get("/events/free-busy", params=params).json(), args.repeat)
+
+                def client_side():
+                    events = client.get("/events/range", params=params).json()
+                    return merged(((datetime.fromisoformat(e["start_time"]), datetime.fromisoformat(e["end_time"])) for e in events),
+                                  window_start, window_end)
+
+                expected, client_ms = timed(client_side, args.repeat)
+
+                def scan():
+                    with Session() as db:
+                        rows = db.execute(select(Event.start_time, Event.end_time).where(
+                            Event.user_id == user_id, Event.start_time < window_end, Event.end_time > window_start)).all()
+                        return merged(rows, window_start, window_end)
+
+                scanned, scan_ms = timed(scan, args.repeat)
+                match = (len(result["busy"]), len(result["free"])) == expected == scanned
+                print(f"{n:>7}{name:>8}{len(result['busy']):>7}{len(result['free']):>7}{route_ms:>14.2f}{client_ms:>11.2f}{scan_ms:>9.2f}  {match}")
+
+            body = {"title": "New", "start_time": "2024-06-05T10:00:00", "end_time": "2024-06-05T11:00:00"}
+            _, plain_ms = timed(lambda: client.post("/events/", params={"user_id": user_id}, json=body), args.repeat)
+            created, checked_ms = timed(lambda: client.post("/events/", params={"user_id": user_id, "check_conflicts": True}, json=body).json(), args.repeat)
+            print(f"{'':>7} create {plain_ms:.2f} ms, with check_conflicts {checked_ms:.2f} ms ({len(created['conflicts'])} conflicts)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Large list responses: the column-tuple + FastJSONResponse path vs the
+ORM + response_model path it replaced. Also checks the bytes are identical.
+
+    python -m benchmarks.list_json --rows 10000
+
+Exits non-zero if a route's bytes differ.
+"""
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta
+from typing import List
+from fastapi import APIRouter, Depends
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core import fastjson
+from app.db.database import get_async_db
+from app.db.pagination import paginate
+from app.main import app
+from app.models.category import Category
+from app.models.event import Event, duration_bucket
+from app.models.note import Note
+from app.models.task import Task, Subtask
+from app.models.user import User
+from app.routers.tasks import task_select
+from app.schemas.event import EventResponse
+from app.schemas.note import NoteResponse
+from app.schemas.todo import TaskResponse
+from benchmarks.common import temp_app, timed
+
+BASE = datetime(2025, 1, 1, 9, 0)
+
+# The list routes as they were before the fast path
+orm = APIRouter()
+
+
+@orm.get("/tasks/", response_model=List[TaskResponse])
+async def orm_tasks(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(paginate(task_select().where(Task.user_id == user_id), [Task.due_date, Task.id]))).all()
+
+
+@orm.get("/events/", response_model=List[EventResponse])
+async def orm_events(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(paginate(select(Event).where(Event.user_id == user_id), [Event.start_time, Event.id]))).all()
+
+
+@orm.get("/notes/", response_model=List[NoteResponse])
+async def orm_notes(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    return (await db.scalars(paginate(select(Note).where(Note.user_id == user_id), [Note.id]))).all()
+
+
+def seed(Session, n: int, subtasks: int) -> int:
+    rng = random.Random(7)
+    words = ["Ödev", "exam", "çalış", "review", "naïve", "<b>bold</b>", 'quote "x"', "emoji 📚", "tab\there"]
+
+    def title():
+        return " ".join(rng.choices(words, k=3))
+
+    def when():
+        return BASE + timedelta(minutes=rng.randrange(-500000, 500000), microseconds=rng.choice([0, 0, 250000, 1]))
+
+    with Session() as db:
+        user = User(username="lists", email="lists@example.com", password_hash="x")
+        db.add(user)
+        db.flush()
+        category_ids = db.scalars(insert(Category).returning(Category.id, sort_by_parameter_order=True), [
+            {"user_id": user.id, "name": f"Category {i} {title()}", "color_code": "#3498db"} for i in range(20)
+        ]).all()
+        task_ids = db.scalars(insert(Task).returning(Task.id, sort_by_parameter_order=True), [
+            {"user_id": user.id, "title": title(), "description": title() if rng.random() < 0.7 else None,
+             "category_id": rng.choice(category_ids) if rng.random() < 0.6 else None,
+             "priority_id": rng.randint(1, 3), "status_id": rng.randint(1, 2), "recurrence_type_id": 1,
+             "due_date": when() if rng.random() < 0.9 else None, "color_code": rng.choice(["#3498db", None]),
+             "created_at": when()}
+            for _ in range(n)
+        ]).all()
+        db.execute(insert(Subtask), [
+            {"task_id": task_id, "title": title(), "is_completed": rng.random() < 0.5}
+            for task_id in task_ids for _ in range(rng.randint(0, subtasks))
+        ])
+        events = []
+        for _ in range(n):
+            start = when()
+            end = start + timedelta(minutes=rng.choice([30, 60, 90]))
+            events.append({"user_id": user.id, "title": title(), "start_time": start, "end_time": end,
+                           "location": rng.choice([None, "B101", "Kütüphane"]), "duration_bucket": duration_bucket(start, end)})
+        db.execute(insert(Event), events)
+        db.execute(insert(Note), [
+            {"user_id": user.id, "title": title(), "content": title() * 5, "created_at": when(),
+             "category_id": rng.choice(category_ids) if rng.random() < 0.5 else None}
+            for _ in range(n)
+        ])
+        db.commit()
+        return user.id
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000, help="tasks, events and notes each")
+    parser.add_argument("--subtasks", type=int, default=3, help="max subtasks per task")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app.include_router(orm, prefix="/_orm")
+    with temp_app() as (client, Session, _):
+        params = {"user_id": seed(Session, args.rows, args.subtasks)}
+        print(f"rows={args.rows} encoder={'orjson' if fastjson.orjson else 'json'}")
+        print(f"{'route':<10}{'orm ms':>10}{'fast ms':>10}{'speedup':>10}  identical")
+        ok = True
+        for route in ("tasks", "events", "notes"):
+            before, orm_ms = timed(lambda: client.get(f"/_orm/{route}/", params=params).content, args.repeat)
+            after, fast_ms = timed(lambda: client.get(f"/{route}/", params=params).content, args.repeat)
+            print(f"{route:<10}{orm_ms:>10.1f}{fast_ms:>10.1f}{orm_ms / fast_ms:>9.1f}x  {before == after}")
+            ok &= before == after
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Cost of the request instrumentation (app/core/metrics.py): the same
+requests with it on and off, alternating request by request to even out drift.
+
+    python -m benchmarks.metrics_overhead --requests 5000
+
+"Off" bypasses the middleware and detaches the engine hooks. End to end the
+difference is often within noise, so the middleware (around a no-op app) and
+the engine hooks are also timed on their own.
+"""
+import argparse
+import asyncio
+import re
+import time
+from types import SimpleNamespace
+import httpx
+from sqlalchemy import event
+from app.core import metrics
+from app.main import app
+from app.models.task import Task
+from app.models.user import User
+from benchmarks.common import temp_app
+
+HOOKS = (("before_cursor_execute", metrics._before_cursor_execute), ("after_cursor_execute", metrics._after_cursor_execute))
+
+
+def set_enabled(engines, on: bool):
+    metrics.enabled = on
+    for engine in engines:
+        for name, hook in HOOKS:
+            if on and not event.contains(engine, name, hook):
+                event.listen(engine, name, hook)
+            elif not on and event.contains(engine, name, hook):
+                event.remove(engine, name, hook)
+
+
+async def run(args, engines, routes):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'route':<24}{'off us':>9}{'on us':>9}{'overhead':>11}")
+        for name, path, params in routes:
+            samples = {True: [], False: []}
+            for i in range(args.requests * 2):
+                on = i % 2 == 1
+                set_enabled(engines, on)
+                t0 = time.perf_counter()
+                response = await client.get(path, params=params)
+                samples[on].append(time.perf_counter() - t0)
+                assert response.status_code == 200, response.text
+            off, on = (sorted(samples[k])[len(samples[k]) // 2] * 1e6 for k in (False, True))
+            print(f"{name:<24}{off:>9.0f}{on:>9.0f}{on - off:>+9.0f}us")
+    set_enabled(engines, True)
+
+
+async def isolated_us(n: int = 50000) -> tuple:
+    """(middleware us per request, engine hooks us per query)."""
+    route = SimpleNamespace(path="/{task_id}", path_regex=re.compile("^/(?P<task_id>[^/]+)$"))
+
+    async def endpoint(scope, receive, send):
+        scope["route"] = route
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def send(message):
+        pass
+
+    timings = {}
+    for name, asgi in (("bare", endpoint), ("instrumented", metrics.MetricsMiddleware(endpoint))):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            await asgi({"type": "http", "method": "GET", "path": "/tasks/5"}, None, send)
+        timings[name] = (time.perf_counter() - t0) / n * 1e6
+
+    context = SimpleNamespace()
+    token = metrics.current.set(metrics.RequestTimings())
+    t0 = time.perf_counter()
+    for _ in range(n):
+        metrics._before_cursor_execute(None, None, "", None, context, False)
+        metrics._after_cursor_execute(None, None, "", None, context, False)
+    hooks = (time.perf_counter() - t0) / n * 1e6
+    metrics.current.reset(token)
+    return timings["instrumented"] - timings["bare"], hooks
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000, help="per route and setting")
+    args = parser.parse_args()
+
+    with temp_app() as (_, Session, engines):
+        with Session() as db:
+            user = User(username="metrics", email="metrics@example.com", password_hash="x")
+            db.add(user)
+            db.flush()
+            db.add_all([Task(user_id=user.id, title=f"Task {i}") for i in range(50)])
+            db.commit()
+            task_id = db.query(Task.id).filter(Task.user_id == user.id).first()[0]
+            params = {"user_id": user.id}
+        routes = [
+            ("lookups (no SQL)", "/lookups/", {}),
+            ("tasks/{id} (2 queries)", f"/tasks/{task_id}", params),
+            ("tasks list (50 rows)", "/tasks/", params),
+        ]
+        asyncio.run(run(args, engines, routes))
+    middleware, hooks = asyncio.run(isolated_us())
+    print(f"in isolation: middleware {middleware:.1f}us per request, engine hooks {hooks:.1f}us per query")
+
+
+if __name__ == "__main__":
+    main()
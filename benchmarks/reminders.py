@@ -0,0 +1,152 @@
+"""The reminder scheduler with --pending reminders due over the next --seconds
+(REMINDER_LEAD_MINUTES 0), while --edits tasks are moved, completed or
+deleted through the ORM (so their collection versions are bumped as the
+routes would).
+
+    python -m benchmarks.reminders --pending 100000 --seconds 20 --edits 500
+
+Reports dispatch lag (when a reminder came off the sink queue minus when it
+was due), the scheduler's queries and heap size, and what one "poll" costs: a
+read of every upcoming reminder, which a scheduler without the heap would
+repeat every sync interval. Exits non-zero unless exactly the reminders left
+in the database at the end were sent, once each, at their final times.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import timedelta
+from sqlalchemy import insert, select
+from app.core.reminders import QueueSink, ReminderScheduler, utcnow
+from app.models.event import Event, duration_bucket
+from app.models.task import Task
+from app.models.user import User
+from benchmarks.common import temp_app
+
+USERS = 1000
+
+
+def seed(Session, pending: int, start, seconds: float) -> dict:
+    """Tasks (and one event in ten) due in [start, start + seconds); returns
+    {(kind, id): due} for everything that should be sent."""
+    rng = random.Random(pending)
+    with Session() as db:
+        db.execute(insert(User.__table__), [
+            {"username": f"remind{i}", "email": f"remind{i}@example.com", "password_hash": "x"} for i in range(USERS)])
+        user_ids = db.scalars(select(User.id)).all()
+        tasks, events = [], []
+        for i in range(pending):
+            due = start + timedelta(seconds=rng.uniform(0, seconds))
+            if i % 10:
+                tasks.append({"user_id": rng.choice(user_ids), "title": f"Task {i}", "due_date": due})
+            else:
+                end = due + timedelta(hours=1)
+                events.append({"user_id": rng.choice(user_ids), "title": f"Event {i}", "start_time": due, "end_time": end,
+                               "duration_bucket": duration_bucket(due, end)})
+        db.execute(insert(Task.__table__), tasks)
+        db.execute(insert(Event.__table__), events)
+        db.commit()
+        expected = {("task", i): due for i, due in db.execute(select(Task.id, Task.due_date))}
+        expected.update({("event", i): due for i, due in db.execute(select(Event.id, Event.start_time))})
+        return expected
+
+
+def edit(Session, expected: dict, rng, end) -> str:
+    """Moves, completes or deletes one task that is at least 3 s from due."""
+    now = utcnow()
+    with Session() as db:
+        task = db.scalars(select(Task).where(Task.due_date > now + timedelta(seconds=3)).offset(rng.randrange(50)).limit(1)).first()
+        if task is None:
+            return "none"
+        op = rng.choice(["later", "earlier", "complete", "delete"])
+        if op == "delete":
+            db.delete(task)
+            expected.pop(("task", task.id))
+        elif op == "complete":
+            task.status_id = 2
+            expected.pop(("task", task.id))
+        else:
+            lo, hi = (now + timedelta(seconds=3), task.due_date) if op == "earlier" else (task.due_date, end)
+            task.due_date = lo + (hi - lo) * rng.random()
+            expected[("task", task.id)] = task.due_date
+        db.commit()
+        return op
+
+
+async def run(engine, Session, expected: dict, args, end) -> tuple:
+    sink = QueueSink(maxsize=0)
+    scheduler = ReminderScheduler(engine, sink, lead=timedelta(0), sync_seconds=args.sync_seconds)
+    received, max_heap = [], 0
+
+    async def consume():
+        while True:
+            reminder = await sink.queue.get()
+            received.append((reminder, (utcnow() - reminder.remind_at).total_seconds()))
+
+    async def edits():
+        rng = random.Random(0)
+        ops = []
+        for _ in range(args.edits):
+            await asyncio.sleep(args.seconds / 2 / args.edits)
+            ops.append(await asyncio.to_thread(edit, Session, expected, rng, end))
+        return ops
+
+    started = utcnow()
+    t0 = time.perf_counter()
+    await scheduler.tick()
+    first_tick = time.perf_counter() - t0
+    # Reminders due before the scheduler started are not sent (by design)
+    late = [key for key, due in expected.items() if due <= started]
+    for key in late:
+        del expected[key]
+    scheduler.start()
+    consumer = asyncio.create_task(consume())
+    ops = await edits()
+    while utcnow() < end + timedelta(seconds=args.sync_seconds + 1):
+        max_heap = max(max_heap, len(scheduler._heap))
+        await asyncio.sleep(0.05)
+    await scheduler.stop()
+    consumer.cancel()
+    return received, scheduler, first_tick, max_heap, ops, len(late)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pending", type=int, default=100000)
+    parser.add_argument("--seconds", type=float, default=20.0, help="reminders come due over this many seconds")
+    parser.add_argument("--edits", type=int, default=500)
+    parser.add_argument("--sync-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with temp_app() as (client, Session, (engine, _)):
+        start = utcnow() + timedelta(seconds=5 + args.pending / 10000)  # time to seed
+        end = start + timedelta(seconds=args.seconds)
+        expected = seed(Session, args.pending, start, args.seconds)
+
+        with engine.connect() as conn:
+            t0 = time.perf_counter()
+            upcoming = len(conn.execute(select(Task.id, Task.user_id, Task.title, Task.due_date).where(Task.due_date > start)).all())
+            upcoming += len(conn.execute(select(Event.id, Event.user_id, Event.title, Event.start_time).where(Event.start_time > start)).all())
+            poll_ms = (time.perf_counter() - t0) * 1000
+        print(f"{args.pending} pending reminders over {args.seconds:g} s, {USERS} users, {args.edits} edits, sync every {args.sync_seconds:g} s")
+        print(f"one poll of all upcoming reminders: {upcoming} rows, {poll_ms:.0f} ms (x{args.seconds / args.sync_seconds:.0f} syncs)")
+
+        while utcnow() < start - timedelta(seconds=1):
+            time.sleep(0.05)
+        received, scheduler, first_tick, max_heap, ops, late = asyncio.run(run(engine, Session, expected, args, end))
+
+        sent = {(r.kind, r.id): r.due_at for r, _ in received}
+        lags = sorted(lag for _, lag in received)
+        pct = lambda q: lags[min(int(len(lags) * q), len(lags) - 1)] * 1000 if lags else 0.0
+        ok = len(sent) == len(received) and sent == expected
+        print(f"first tick {first_tick * 1000:.0f} ms; {scheduler.queries} queries in all; heap at most {max_heap} entries")
+        print(f"edits: " + ", ".join(f"{op} {ops.count(op)}" for op in sorted(set(ops))))
+        print(f"sent {len(received)} (expected {len(expected)}, distinct {len(sent)}; {late} came due before the start); "
+              f"lag p50 {pct(0.5):.1f} ms, p99 {pct(0.99):.1f} ms, max {pct(1):.1f} ms")
+        print(f"sent exactly the reminders left in the database, at their final times: {ok}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""GET /search latency for a user with many notes.
+
+    python -m benchmarks.search --notes 100000
+"""
+import argparse
+import random
+from sqlalchemy import insert
+from app.db.search import TRUNCATED_HEADER
+from app.models.note import Note
+from app.models.task import Task
+from app.models.user import User
+from benchmarks.common import temp_app, timed
+
+# Zipf-ish vocabulary: a few words appear in most notes, most words are rare
+VOCABULARY = [f"{a}{b}" for a in ("al", "be", "co", "de", "ex", "fo", "gr", "hi", "in", "jo")
+              for b in ("gebra", "ta", "mpile", "sign", "am", "rmula", "aph", "story", "dex", "urnal",
+                        "rk", "ld", "ver", "lta", "port", "cus", "ove", "nt", "put", "in")]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+
+def text(rng, words: int) -> str:
+    return " ".join(rng.choices(VOCABULARY, WEIGHTS, k=words))
+
+
+def seed(Session, n_notes: int, n_tasks: int, other_users: int) -> int:
+    rng = random.Random(42)
+    with Session() as db:
+        users = [User(username=f"u{i}", email=f"u{i}@example.com", password_hash="x") for i in range(other_users + 1)]
+        db.add_all(users)
+        db.flush()
+        for user in users:
+            db.execute(insert(Note), [
+                {"user_id": user.id, "title": text(rng, 3), "content": text(rng, 40)} for _ in range(n_notes)
+            ])
+            db.execute(insert(Task), [
+                {"user_id": user.id, "title": text(rng, 4), "description": text(rng, 12)} for _ in range(n_tasks)
+            ])
+        db.commit()
+        return users[0].id
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", type=int, default=100000)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--other-users", type=int, default=1, help="users with the same amount of data")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    queries = {
+        "rare word": VOCABULARY[-1],
+        "common word": VOCABULARY[0],
+        "prefix": VOCABULARY[37][:3],
+        "two words": f"{VOCABULARY[5]} {VOCABULARY[80]}",
+        "no match": "zzzz",
+    }
+    with temp_app() as (client, Session, _):
+        user_id = seed(Session, args.notes, args.tasks, args.other_users)
+        print(f"notes={args.notes} tasks={args.tasks} per user, users={args.other_users + 1}")
+        for name, q in queries.items():
+            response, ms = timed(lambda: client.get("/search/", params={"user_id": user_id, "q": q, "limit": 20}), args.repeat)
+            truncated = response.headers.get(TRUNCATED_HEADER) == "true"
+            print(f"{name:<12} q={q!r:<22} hits={len(response.json()):>3}  {ms:8.2f} ms (median of {args.repeat})"
+                  f"{'  truncated' if truncated else ''}")
+
+
+if __name__ == "__main__":
+    main()
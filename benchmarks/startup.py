@@ -0,0 +1,164 @@
+"""Cold start of one worker process: import app.main, run the lifespan
+startup, serve the first and a second request. Each run is a fresh
+interpreter against the same (already migrated) SQLite file; "ready ms" is
+from spawning it to its first response.
+
+    python -m benchmarks.startup --runs 5 --importtime
+    python -m benchmarks.startup --compare HEAD~1
+
+--compare runs the same measurement on another commit (checked out with git
+archive into a temp dir) for a before/after. --importtime prints where import
+time goes, summed per top-level package. "genai ms" is what the first AI
+request pays now that the SDK is imported on demand (0 if it was already
+loaded at startup).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from app.db.database import build_engine
+from app.db.migrations import migrate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r'''
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+from app.main import app
+t1 = time.perf_counter()
+print("-- app.main imported", file=sys.stderr, flush=True)
+
+
+async def main():
+    shutdown = asyncio.Event()
+    started = asyncio.get_running_loop().create_future()
+    queue = [{"type": "lifespan.startup"}]
+
+    async def receive():
+        if queue:
+            return queue.pop(0)
+        await shutdown.wait()
+        return {"type": "lifespan.shutdown"}
+
+    async def send(message):
+        if message["type"].startswith("lifespan.startup") and not started.done():
+            started.set_result(message)
+
+    lifespan = asyncio.create_task(app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, receive, send))
+    message = await started
+    if message["type"] != "lifespan.startup.complete":
+        sys.exit(message.get("message", "startup failed"))
+    t2 = time.perf_counter()
+
+    async def request(path, query):
+        status = []
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+                 "path": path, "raw_path": path.encode(), "query_string": query, "root_path": "", "headers": [],
+                 "client": ("127.0.0.1", 1), "server": ("bench", 80)}
+        started = time.perf_counter()
+        await app(scope, receive, send)
+        assert status == [200], status
+        return time.perf_counter() - started
+
+    first = await request("/tasks/", b"user_id=1")
+    served = time.time()
+    second = await request("/tasks/", b"user_id=1")
+    genai = 0.0
+    if "google.genai" not in sys.modules:
+        t = time.perf_counter()
+        from google import genai as sdk
+        sdk.Client(api_key="startup-benchmark")
+        genai = time.perf_counter() - t
+    shutdown.set()
+    await lifespan
+    return t2 - t1, first, served, second, genai
+
+
+startup, first, served, second, genai = asyncio.run(main())
+print(json.dumps({"served_at": served, "import_ms": (t1 - t0) * 1000, "startup_ms": startup * 1000, "first_ms": first * 1000,
+                  "second_ms": second * 1000, "genai_ms": genai * 1000}))
+'''
+
+COLUMNS = ("ready_ms", "import_ms", "startup_ms", "first_ms", "second_ms", "genai_ms")
+
+
+def run_child(tree: str, env: dict, importtime: bool = False):
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", CHILD]
+    spawned = time.time()
+    done = subprocess.run(command, cwd=tree, env={**env, "PYTHONPATH": tree}, capture_output=True, text=True)
+    if done.returncode != 0:
+        sys.exit(f"worker in {tree} failed:\n{done.stderr[-2000:]}")
+    result = json.loads(done.stdout.strip().splitlines()[-1])
+    result["ready_ms"] = (result.pop("served_at") - spawned) * 1000  # spawn to first response, interpreter start included
+    return result, done.stderr
+
+
+def measure(label: str, tree: str, env: dict, runs: int):
+    samples = [run_child(tree, env)[0] for _ in range(runs)]
+    medians = {c: sorted(s[c] for s in samples)[len(samples) // 2] for c in COLUMNS}
+    print(f"{label:<10}" + "".join(f"{medians[c]:>12.1f}" for c in COLUMNS))
+    return medians
+
+
+def import_profile(label: str, tree: str, env: dict, top: int):
+    """Self import time per top-level package, from python -X importtime."""
+    _, stderr = run_child(tree, env, importtime=True)
+    per_package = {}
+    for line in stderr.split("-- app.main imported")[0].splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if not fields[0].strip().isdigit():
+            continue  # header
+        package = fields[2].strip().split(".")[0]
+        per_package[package] = per_package.get(package, 0) + int(fields[0])
+    total = sum(per_package.values())
+    print(f"\n{label}: import time {total / 1000:.0f} ms, by top-level package")
+    for package, us in sorted(per_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {package:<24}{us / 1000:>8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per tree (median reported)")
+    parser.add_argument("--compare", metavar="GIT_REF", help="also measure this commit")
+    parser.add_argument("--importtime", action="store_true")
+    parser.add_argument("--top", type=int, default=12)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+        engine = build_engine(url)
+        migrate(engine)  # the one-off step; workers only check the version
+        engine.dispose()
+        env = {**os.environ, "DATABASE_URL": url, "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY") or "startup-benchmark"}
+
+        trees = [("current", ROOT)]
+        if args.compare:
+            other = os.path.join(tmp, "tree")
+            os.mkdir(other)
+            archive = subprocess.run(["git", "-C", ROOT, "archive", args.compare], check=True, capture_output=True).stdout
+            subprocess.run(["tar", "-x", "-C", other], input=archive, check=True)
+            trees.insert(0, (args.compare, other))
+
+        print(f"{'tree':<10}" + "".join(f"{c:>12}" for c in COLUMNS))
+        for label, tree in trees:
+            measure(label, tree, env, args.runs)
+        if args.importtime:
+            for label, tree in trees:
+                import_profile(label, tree, env, args.top)
+
+
+if __name__ == "__main__":
+    main()
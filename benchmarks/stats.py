@@ -0,0 +1,104 @@
+"""GET /stats vs aggregating on the client from /tasks and /events/range, as
+the dashboard did before, at growing task volumes.
+
+    python -m benchmarks.stats --tasks 1000 10000 100000
+
+"cold" clears the stats cache before every request; "cached" is the normal
+repeat request (a version check plus the cached body).
+"""
+import argparse
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select
+from app.core.stats import stats_cache
+from app.models.category import Category
+from app.models.event import Event, duration_bucket
+from app.models.task import Task, Subtask
+from app.models.user import User
+from benchmarks.common import temp_app, timed
+
+NOW = datetime(2025, 3, 5, 12, 0)
+WEEK_START = datetime(2025, 3, 3)
+
+
+def seed(Session, n: int) -> int:
+    """n tasks (one subtask each on average), n // 5 events, 10 categories."""
+    rng = random.Random(n)
+    with Session() as db:
+        user = User(username=f"stats{n}", email=f"stats{n}@example.com", password_hash="x")
+        db.add(user)
+        db.flush()
+        category_ids = db.scalars(insert(Category).returning(Category.id, sort_by_parameter_order=True), [
+            {"user_id": user.id, "name": f"Category {i}"} for i in range(10)
+        ]).all()
+        db.execute(insert(Task), [
+            {"user_id": user.id, "title": f"Task {i}", "status_id": rng.randint(1, 2), "priority_id": rng.randint(1, 3),
+             "category_id": rng.choice(category_ids + [None]),
+             "due_date": NOW + timedelta(hours=rng.randrange(-2000, 2000)) if rng.random() < 0.8 else None}
+            for i in range(n)
+        ])
+        task_ids = db.scalars(select(Task.id).where(Task.user_id == user.id)).all()
+        db.execute(insert(Subtask), [
+            {"task_id": rng.choice(task_ids), "title": f"Step {i}", "is_completed": rng.random() < 0.5} for i in range(n)
+        ])
+        events = []
+        for i in range(n // 5):
+            start = NOW + timedelta(minutes=rng.randrange(-500000, 500000))
+            end = start + timedelta(minutes=rng.choice([30, 60, 90]))
+            events.append({"user_id": user.id, "title": f"Event {i}", "start_time": start, "end_time": end,
+                           "duration_bucket": duration_bucket(start, end)})
+        db.execute(insert(Event), events)
+        db.commit()
+        return user.id
+
+
+def client_side(client, user_id: int) -> dict:
+    """What the dashboard computed from the full lists."""
+    tasks = client.get("/tasks/", params={"user_id": user_id}).json()
+    events = client.get("/events/range", params={
+        "user_id": user_id, "from": WEEK_START.isoformat(), "to": (WEEK_START + timedelta(days=7)).isoformat(),
+    }).json()
+    subtasks = [s for t in tasks for s in t["subtasks"]]
+    return {
+        "by_status": Counter(t["status_id"] for t in tasks),
+        "by_priority": Counter(t["priority_id"] for t in tasks),
+        "by_category": Counter(t["category"]["id"] if t["category"] else None for t in tasks),
+        "overdue": sum(1 for t in tasks if t["status_id"] == 1 and t["due_date"] and t["due_date"] < NOW.isoformat()),
+        "subtasks_completed": sum(s["is_completed"] for s in subtasks),
+        "events_this_week": len(events),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with temp_app() as (client, Session, _):
+        print(f"{'tasks':>8}{'client ms':>11}{'cold ms':>10}{'cached ms':>11}  match")
+        for n in args.tasks:
+            user_id = seed(Session, n)
+            params = {"user_id": user_id, "now": NOW.isoformat()}
+            expected, client_ms = timed(lambda: client_side(client, user_id), args.repeat)
+
+            def cold():
+                stats_cache.invalidate(user_id)
+                return client.get("/stats/", params=params).json()
+
+            stats, cold_ms = timed(cold, args.repeat)
+            _, cached_ms = timed(lambda: client.get("/stats/", params=params).json(), args.repeat * 10)
+            match = (
+                {row["id"]: row["count"] for row in stats["by_status"] if row["count"]} == expected["by_status"]
+                and {row["id"]: row["count"] for row in stats["by_priority"] if row["count"]} == expected["by_priority"]
+                and {row["id"]: row["count"] for row in stats["by_category"]} == expected["by_category"]
+                and stats["overdue"] == expected["overdue"]
+                and stats["subtasks"]["completed"] == expected["subtasks_completed"]
+                and stats["events_this_week"] == expected["events_this_week"]
+            )
+            print(f"{n:>8}{client_ms:>11.1f}{cold_ms:>10.1f}{cached_ms:>11.2f}  {match}")
+
+
+if __name__ == "__main__":
+    main()
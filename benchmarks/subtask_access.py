@@ -0,0 +1,92 @@
+"""PUT/DELETE /tasks/subtasks/{id} as the number of tasks grows, next to the
+ownership query they used before (subtask and task filtered without a join
+condition, so every task the user owns was read), plus the cross-user check
+that query got wrong: any user with a task could reach any subtask.
+
+    python -m benchmarks.subtask_access --tasks 1000 10000 100000
+
+Exits non-zero if another user's subtask can be updated or deleted, or if
+the ownership query stops being a primary key lookup on both tables.
+"""
+import argparse
+import sys
+import warnings
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SAWarning
+from app.models.task import Task, Subtask
+from app.models.user import User
+from app.routers.tasks import owned_subtask
+from benchmarks.common import temp_app, timed
+
+
+def legacy_query(subtask_id: int, user_id: int):
+    return select(Subtask).where(Subtask.id == subtask_id, Task.user_id == user_id)
+
+
+def add_tasks(db, user_id: int, start: int, stop: int) -> list:
+    db.execute(insert(Task.__table__), [{"user_id": user_id, "title": f"Task {i}"} for i in range(start, stop)])
+    return db.scalars(select(Task.id).where(Task.user_id == user_id).order_by(Task.id.desc()).limit(1)).all()
+
+
+def add_subtasks(db, task_id: int, n: int) -> list:
+    return db.scalars(insert(Subtask).returning(Subtask.id, sort_by_parameter_order=True),
+                      [{"task_id": task_id, "title": f"Step {i}"} for i in range(n)]).all()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, nargs="+", default=[1000, 10000, 100000], help="per user (two users)")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    ok = True
+
+    with temp_app() as (client, Session, (engine, _)):
+        with Session() as db:
+            users = [User(username=name, email=f"{name}@example.com", password_hash="x") for name in ("owner", "other")]
+            db.add_all(users)
+            db.commit()
+            owner, other = users[0].id, users[1].id
+
+        plan = [row[-1] for row in engine.connect().exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + str(owned_subtask(1, 1).compile(engine, compile_kwargs={"literal_binds": True})))]
+        print("plan:", "; ".join(plan))
+        if not all("PRIMARY KEY" in detail for detail in plan):
+            ok = False
+
+        print(f"{'tasks/user':>11}{'old query ms':>14}{'new query ms':>14}{'PUT ms':>9}{'DELETE ms':>11}")
+        have = 0
+        for n in args.tasks:
+            with Session() as db:
+                (owner_task,), (other_task,) = add_tasks(db, owner, have, n), add_tasks(db, other, have, n)
+                to_update = add_subtasks(db, owner_task, 1)[0]
+                to_delete = add_subtasks(db, owner_task, args.repeat)
+                foreign = add_subtasks(db, other_task, 1)[0]
+                db.commit()
+            have = n
+
+            with Session() as db, warnings.catch_warnings():
+                warnings.simplefilter("ignore", SAWarning)  # the cross join is the point
+                _, old_ms = timed(lambda: db.scalars(legacy_query(to_update, owner)).first(), args.repeat)
+                _, new_ms = timed(lambda: db.scalars(owned_subtask(to_update, owner)).first(), args.repeat)
+                leaked = db.scalars(legacy_query(foreign, owner)).first() is not None
+            params = {"user_id": owner}
+            _, put_ms = timed(lambda: client.put(f"/tasks/subtasks/{to_update}", params=params, json={"is_completed": True}), args.repeat)
+            pending = list(to_delete)
+            _, delete_ms = timed(lambda: client.delete(f"/tasks/subtasks/{pending.pop()}", params=params), args.repeat)
+            print(f"{n:>11}{old_ms:>14.3f}{new_ms:>14.3f}{put_ms:>9.2f}{delete_ms:>11.2f}")
+
+            statuses = (
+                client.put(f"/tasks/subtasks/{foreign}", params=params, json={"title": "hijacked"}).status_code,
+                client.delete(f"/tasks/subtasks/{foreign}", params=params).status_code,
+            )
+            with Session() as db:
+                untouched = db.get(Subtask, foreign).title == "Step 0"
+            if statuses != (404, 404) or not untouched:
+                ok = False
+            print(f"{'':>11}other user's subtask: PUT/DELETE -> {statuses}, unchanged {untouched} (old query leaked it: {leaked})")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""Latency / throughput benchmark for every router, run in-process against the ASGI app.
+
+Seeds synthetic users into a throwaway SQLite database, replays a fixed mix of
+requests per scenario and writes p50/p95/p99 latency, throughput and SQL
+queries per request as JSON. Gemini is replaced by the local fake client.
+Deletes and workspace imports work on a separate scratch user, so the seeded
+users' data is the same for every scenario.
+
+    python -m benchmarks.suite --users 3 --tasks 2000 --out bench.json
+    python -m benchmarks.suite --out new.json --compare bench.json
+"""
+import argparse
+import asyncio
+import contextvars
+import itertools
+import json
+import math
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+import httpx
+import sqlalchemy
+from sqlalchemy import event, insert
+from app.main import app
+from app.core import gemini
+from app.core.ai_cache import parse_cache
+from app.core.lookups import lookup_cache
+from app.models.category import Category
+from app.models.event import Event, duration_bucket
+from app.models.note import Note
+from app.models.task import Task, Subtask
+from app.models.user import User
+from app.models.sync import CollectionVersion
+from app.db.versioning import bump_version
+from benchmarks.common import temp_app
+
+# Per-request SQL counter; set by the driver, read by the engine hook. Context
+# variables follow the request into async routes and into the threadpool that
+# runs the remaining sync routes.
+_query_counter = contextvars.ContextVar("query_counter", default=None)
+
+BASE_DATE = datetime(2025, 1, 1)
+
+
+def seed(Session, args) -> list:
+    """Bulk-inserts args.users users with the configured row counts; returns their ids."""
+    rng = random.Random(args.seed)
+    user_ids = []
+    with Session() as db:
+        for u in range(args.users):
+            user = User(username=f"user{u}", email=f"user{u}@example.com", password_hash="x")
+            db.add(user)
+            db.flush()
+            user_ids.append(user.id)
+
+            category_ids = db.scalars(insert(Category).returning(Category.id, sort_by_parameter_order=True), [
+                {"user_id": user.id, "name": f"Category {i}", "color_code": "#3498db"} for i in range(args.categories)
+            ]).all()
+            # Core inserts skip the versioning hook, so stamp the rows here
+            versions = {name: bump_version(db, user.id, name) for name in ("tasks", "events", "notes")}
+            tasks = []
+            for i in range(args.tasks):
+                tasks.append({
+                    "user_id": user.id,
+                    "category_id": rng.choice(category_ids) if category_ids and rng.random() < 0.7 else None,
+                    "title": f"Task {i}",
+                    "description": "Synthetic task",
+                    "priority_id": rng.randint(1, 3),
+                    "status_id": rng.randint(1, 2),
+                    "recurrence_type_id": 1 if rng.random() < 0.9 else rng.randint(2, 5),
+                    "due_date": BASE_DATE + timedelta(hours=rng.randrange(-24 * 365, 24 * 365)) if rng.random() < 0.9 else None,
+                    "color_code": "#3498db",
+                    "version": versions["tasks"],
+                })
+            task_ids = db.scalars(insert(Task).returning(Task.id, sort_by_parameter_order=True), tasks).all() if tasks else []
+            subtasks = [
+                {"task_id": task_id, "title": f"Step {j}", "is_completed": rng.random() < 0.5}
+                for task_id in task_ids for j in range(args.subtasks)
+            ]
+            if subtasks:
+                db.execute(insert(Subtask), subtasks)
+
+            events = []
+            for i in range(args.events):
+                start = BASE_DATE + timedelta(minutes=rng.randrange(-365 * 24 * 60, 365 * 24 * 60))
+                end = start + timedelta(minutes=rng.choice([30, 60, 120, 24 * 60]))
+                # Core inserts skip the mapper hook that fills duration_bucket
+                events.append({"user_id": user.id, "title": f"Event {i}", "start_time": start, "end_time": end,
+                               "location": None, "color_code": "#3498db", "duration_bucket": duration_bucket(start, end),
+                               "version": versions["events"]})
+            event_ids = db.scalars(insert(Event).returning(Event.id, sort_by_parameter_order=True), events).all() if events else []
+            notes = [
+                {"user_id": user.id, "title": f"Note {i}", "content": "Synthetic note " * 10,
+                 "event_id": rng.choice(event_ids) if event_ids and rng.random() < 0.3 else None,
+                 "category_id": rng.choice(category_ids) if category_ids and rng.random() < 0.5 else None,
+                 "version": versions["notes"]}
+                for i in range(args.notes)
+            ]
+            if notes:
+                db.execute(insert(Note), notes)
+        db.commit()
+    return user_ids
+
+
+BATCH_DELETE_SIZE = 5
+
+
+def seed_scratch(Session, n: int) -> tuple:
+    """A user with n rows of each kind to delete (BATCH_DELETE_SIZE times that
+    for the batch deletes); returns (user_id, {kind: iterator over ids}). The
+    iterators are shared by warmup and the measured run, so no id is deleted
+    twice."""
+    with Session() as db:
+        user = User(username="scratch", email="scratch@example.com", password_hash="x")
+        db.add(user)
+        db.flush()
+
+        def add(model, rows):
+            return db.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), rows).all()
+
+        tasks = add(Task, [{"user_id": user.id, "title": f"Scratch {i}"} for i in range(n * (1 + BATCH_DELETE_SIZE) + 1)])
+        parent, tasks = tasks[0], tasks[1:]
+        subtasks = add(Subtask, [{"task_id": parent, "title": f"Step {i}"} for i in range(n * (1 + BATCH_DELETE_SIZE))])
+        start, end = BASE_DATE, BASE_DATE + timedelta(hours=1)
+        pools = {
+            "tasks": tasks[:n], "tasks.batch": tasks[n:],
+            "subtasks": subtasks[:n], "subtasks.batch": subtasks[n:],
+            "events": add(Event, [{"user_id": user.id, "title": f"Scratch {i}", "start_time": start, "end_time": end,
+                                   "duration_bucket": duration_bucket(start, end)} for i in range(n)]),
+            "notes": add(Note, [{"user_id": user.id, "title": f"Scratch {i}", "content": "x"} for i in range(n)]),
+            "categories": add(Category, [{"user_id": user.id, "name": f"Scratch {i}"} for i in range(n)]),
+        }
+        db.commit()
+        return user.id, {kind: iter(ids) for kind, ids in pools.items()}
+
+
+def workspace_body(rows: int) -> bytes:
+    """A small export (rows of each kind) to import."""
+    lines = [{"type": "workspace", "format": 1, "exported_at": "2025-01-01T00:00:00Z"},
+             {"type": "category", "id": 1, "name": "Imported", "color_code": "#3498db"}]
+    lines += [{"type": "event", "id": i, "title": f"Event {i}", "start_time": (BASE_DATE + timedelta(hours=i)).isoformat(),
+               "end_time": (BASE_DATE + timedelta(hours=i, minutes=30)).isoformat()} for i in range(1, rows + 1)]
+    lines += [{"type": "task", "id": i, "category_id": 1, "title": f"Task {i}", "due_date": (BASE_DATE + timedelta(days=i)).isoformat()}
+              for i in range(1, rows + 1)]
+    lines += [{"type": "subtask", "id": i, "task_id": i, "title": f"Step {i}"} for i in range(1, rows + 1)]
+    lines += [{"type": "note", "id": i, "category_id": 1, "event_id": i, "title": f"Note {i}", "content": "Imported note"}
+              for i in range(1, rows + 1)]
+    return "".join(json.dumps(line) + "\n" for line in lines).encode()
+
+
+def scenarios(user_ids: list, Session, scratch: tuple) -> dict:
+    """name -> callable(index) returning (method, url, params, body[, headers]);
+    a bytes body is sent as is, anything else as JSON."""
+    with Session() as db:
+        sample = {
+            uid: {
+                "task": db.query(Task.id).filter(Task.user_id == uid).order_by(Task.id).first()[0],
+                "event": db.query(Event.id).filter(Event.user_id == uid).order_by(Event.id).first()[0],
+                "note": db.query(Note.id).filter(Note.user_id == uid).order_by(Note.id).first()[0],
+                "category": db.query(Category.id).filter(Category.user_id == uid).order_by(Category.id).first()[0],
+                "subtask": db.query(Subtask.id).join(Task).filter(Task.user_id == uid).order_by(Subtask.id).first()[0],
+                "tasks_version": db.query(CollectionVersion.version).filter(CollectionVersion.user_id == uid, CollectionVersion.collection == "tasks").scalar(),
+            }
+            for uid in user_ids
+        }
+    counter = itertools.count()
+
+    def user(i):
+        return user_ids[i % len(user_ids)]
+
+    def ids(i):
+        return sample[user(i)]
+
+    week = {"from": "2025-03-03T00:00:00", "to": "2025-03-10T00:00:00"}
+    scratch_user, pool = scratch
+    owner = {"user_id": scratch_user}
+    import_body = workspace_body(20)
+    return {
+        "auth.register": lambda i: ("POST", "/auth/register", None, {"username": "u", "email": f"bench{next(counter)}@example.com", "password": "x"}),
+        "auth.login": lambda i: ("POST", "/auth/login", None, {"email": f"user{i % len(user_ids)}@example.com", "password": "x"}),
+        "tasks.list": lambda i: ("GET", "/tasks/", {"user_id": user(i)}, None),
+        "tasks.list_page": lambda i: ("GET", "/tasks/", {"user_id": user(i), "limit": 50, "status_id": 1}, None),
+        # A client polling with the ETag / version it got after seeding; runs before the write scenarios
+        "tasks.list_not_modified": lambda i: ("GET", "/tasks/", {"user_id": user(i)}, None, {"If-None-Match": f'"tasks-{user(i)}-{ids(i)["tasks_version"]}"'}),
+        "tasks.changes": lambda i: ("GET", "/tasks/changes", {"user_id": user(i), "since": ids(i)["tasks_version"]}, None),
+        "tasks.get": lambda i: ("GET", f"/tasks/{ids(i)['task']}", {"user_id": user(i)}, None),
+        "tasks.agenda": lambda i: ("GET", "/tasks/agenda", {"user_id": user(i), **week}, None),
+        "tasks.create": lambda i: ("POST", "/tasks/", {"user_id": user(i)}, {"title": f"Bench {i}", "due_date": "2025-02-01T10:00:00"}),
+        "tasks.update": lambda i: ("PUT", f"/tasks/{ids(i)['task']}", {"user_id": user(i)}, {"priority_id": 1 + i % 3}),
+        "tasks.batch_create": lambda i: ("POST", "/tasks/batch", {"user_id": user(i)}, [{"title": f"Bench {i}.{j}"} for j in range(10)]),
+        "tasks.batch_update": lambda i: ("PATCH", "/tasks/batch", {"user_id": user(i)}, [{"id": ids(i)["task"], "status_id": 1 + i % 2}]),
+        "subtasks.create": lambda i: ("POST", f"/tasks/{ids(i)['task']}/subtasks/", {"user_id": user(i)}, {"title": "Bench step"}),
+        "subtasks.update": lambda i: ("PUT", f"/tasks/subtasks/{ids(i)['subtask']}", {"user_id": user(i)}, {"is_completed": i % 2 == 0}),
+        "subtasks.batch_create": lambda i: ("POST", "/tasks/subtasks/batch", {"user_id": user(i)}, [{"task_id": ids(i)["task"], "title": f"Bench step {j}"} for j in range(10)]),
+        "subtasks.batch_update": lambda i: ("PATCH", "/tasks/subtasks/batch", {"user_id": user(i)}, [{"id": ids(i)["subtask"], "is_completed": i % 2 == 1}]),
+        "events.list": lambda i: ("GET", "/events/", {"user_id": user(i)}, None),
+        "events.changes": lambda i: ("GET", "/events/changes", {"user_id": user(i), "since": 0}, None),
+        "events.range": lambda i: ("GET", "/events/range", {"user_id": user(i), **week}, None),
+        "events.free_busy": lambda i: ("GET", "/events/free-busy", {"user_id": user(i), **week}, None),
+        "events.get": lambda i: ("GET", f"/events/{ids(i)['event']}", {"user_id": user(i)}, None),
+        "events.create": lambda i: ("POST", "/events/", {"user_id": user(i)}, {"title": "Bench", "start_time": "2025-02-01T09:00:00", "end_time": "2025-02-01T10:00:00"}),
+        "events.update": lambda i: ("PUT", f"/events/{ids(i)['event']}", {"user_id": user(i)}, {"location": f"Room {i}"}),
+        "notes.list": lambda i: ("GET", "/notes/", {"user_id": user(i)}, None),
+        "notes.changes": lambda i: ("GET", "/notes/changes", {"user_id": user(i), "since": 0}, None),
+        "notes.get": lambda i: ("GET", f"/notes/{ids(i)['note']}", {"user_id": user(i)}, None),
+        "notes.create": lambda i: ("POST", "/notes/", {"user_id": user(i)}, {"title": "Bench", "content": "Bench note"}),
+        "notes.update": lambda i: ("PUT", f"/notes/{ids(i)['note']}", {"user_id": user(i)}, {"content": f"Edit {i}"}),
+        "search.common": lambda i: ("GET", "/search/", {"user_id": user(i), "q": "synthetic"}, None),
+        "search.prefix": lambda i: ("GET", "/search/", {"user_id": user(i), "q": "note synth"}, None),
+        "stats": lambda i: ("GET", "/stats/", {"user_id": user(i), "now": "2025-03-05T12:00:00"}, None),
+        "lookups": lambda i: ("GET", "/lookups/", None, None),
+        "lookups.not_modified": lambda i: ("GET", "/lookups/", None, None, {"If-None-Match": lookup_cache.snapshot().etag}),
+        "categories.create": lambda i: ("POST", "/categories/", {"user_id": user(i)}, {"name": f"Bench {i}"}),
+        "categories.list": lambda i: ("GET", "/categories/", {"user_id": user(i)}, None),
+        "categories.get": lambda i: ("GET", f"/categories/{ids(i)['category']}", {"user_id": user(i)}, None),
+        "categories.update": lambda i: ("PUT", f"/categories/{ids(i)['category']}", {"user_id": user(i)}, {"name": f"Renamed {i}"}),
+        "ai.parse": lambda i: ("POST", "/ai/parse", None, {"text": f"Study chapter {next(counter)} tomorrow"}),
+        "ai.parse_and_save": lambda i: ("POST", "/ai/parse-and-save", {"user_id": user(i)}, {"text": f"Buy item {next(counter)}"}),
+        "ai.parse_batch": lambda i: ("POST", "/ai/parse-batch", None, {"texts": [f"Read page {next(counter)}" for _ in range(8)]}),
+        "ai.parse_stream": lambda i: ("POST", "/ai/parse-stream", None, {"text": f"Call office {next(counter)} at noon"}),
+        "workspace.export": lambda i: ("GET", "/workspace/export", {"user_id": user(i)}, None),
+        "workspace.import": lambda i: ("POST", "/workspace/import", owner, import_body),
+        "tasks.delete": lambda i: ("DELETE", f"/tasks/{next(pool['tasks'])}", owner, None),
+        "tasks.batch_delete": lambda i: ("POST", "/tasks/batch/delete", owner, {"ids": [next(pool["tasks.batch"]) for _ in range(BATCH_DELETE_SIZE)]}),
+        "subtasks.delete": lambda i: ("DELETE", f"/tasks/subtasks/{next(pool['subtasks'])}", owner, None),
+        "subtasks.batch_delete": lambda i: ("POST", "/tasks/subtasks/batch/delete", owner, {"ids": [next(pool["subtasks.batch"]) for _ in range(BATCH_DELETE_SIZE)]}),
+        "events.delete": lambda i: ("DELETE", f"/events/{next(pool['events'])}", owner, None),
+        "notes.delete": lambda i: ("DELETE", f"/notes/{next(pool['notes'])}", owner, None),
+        "categories.delete": lambda i: ("DELETE", f"/categories/{next(pool['categories'])}", owner, None),
+    }
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+async def run_scenario(client: httpx.AsyncClient, build, requests: int, concurrency: int) -> dict:
+    latencies, queries, errors = [], [], 0
+    next_index = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        for i in iter(lambda: next(next_index), None):
+            if i >= requests:
+                return
+            method, url, params, body, *headers = build(i)
+            counter = [0]
+            token = _query_counter.set(counter)
+            t0 = time.perf_counter()
+            content = {"content": body} if isinstance(body, bytes) else {"json": body}
+            try:
+                response = await client.request(method, url, params=params, headers=headers[0] if headers else None, **content)
+            finally:
+                _query_counter.reset(token)
+            latencies.append(time.perf_counter() - t0)
+            queries.append(counter[0])
+            if response.status_code >= 400:
+                errors += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - t0
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "throughput_rps": round(requests / wall, 1),
+        "queries_per_request": round(sum(queries) / len(queries), 2),
+    }
+
+
+async def run(args) -> dict:
+    # Stubbed Gemini: no network, no latency, never throttled by the limiter
+    gemini.client = gemini.FakeGeminiClient(latency=args.ai_latency)
+    gemini.limiter = gemini.ConcurrencyLimiter(max(args.concurrency, gemini.limiter.limit))
+    parse_cache.clear()
+
+    with temp_app() as (_, Session, engines):
+        user_ids = seed(Session, args)
+
+        def count_query(*_):
+            counter = _query_counter.get()
+            if counter is not None:
+                counter[0] += 1
+
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", count_query)
+
+        selected = scenarios(user_ids, Session, seed_scratch(Session, args.requests + args.warmup))
+        if args.only:
+            selected = {name: build for name, build in selected.items() if any(name.startswith(p) for p in args.only)}
+
+        results = {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, build in selected.items():
+                if args.warmup:
+                    await run_scenario(client, build, args.warmup, 1)
+                results[name] = await run_scenario(client, build, args.requests, args.concurrency)
+                print(f"{name:<24} p50 {results[name]['p50_ms']:8.2f} ms  p95 {results[name]['p95_ms']:8.2f} ms  "
+                      f"p99 {results[name]['p99_ms']:8.2f} ms  {results[name]['throughput_rps']:8.1f} req/s  "
+                      f"{results[name]['queries_per_request']:5.1f} q/req  errors {results[name]['errors']}", file=sys.stderr)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        },
+        "scenarios": results,
+    }
+
+
+def compare(current: dict, baseline: dict):
+    print(f"\n{'scenario':<24}{'p50 Δ%':>10}{'p95 Δ%':>10}{'p99 Δ%':>10}{'q/req Δ':>10}")
+    for name, now in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            print(f"{name:<24}{'(new)':>10}")
+            continue
+
+        def pct(key):
+            return (now[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+
+        print(f"{name:<24}{pct('p50_ms'):>+10.1f}{pct('p95_ms'):>+10.1f}{pct('p99_ms'):>+10.1f}"
+              f"{now['queries_per_request'] - before['queries_per_request']:>+10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2)
+    parser.add_argument("--tasks", type=int, default=1000, help="tasks per user")
+    parser.add_argument("--subtasks", type=int, default=2, help="subtasks per task")
+    parser.add_argument("--events", type=int, default=1000, help="events per user")
+    parser.add_argument("--notes", type=int, default=1000, help="notes per user")
+    parser.add_argument("--categories", type=int, default=10, help="categories per user")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--ai-latency", type=float, default=0.0, help="fake Gemini latency in seconds")
+    parser.add_argument("--only", nargs="*", help="scenario name prefixes, e.g. tasks. events.range")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="write results JSON here (default: stdout)")
+    parser.add_argument("--compare", help="baseline results JSON to diff against")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    output = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""SQL statements per request for GET /tasks/ (whole list and one page) and
+GET /tasks/{id} as the number of tasks grows. Every task has a category and
+--subtasks subtasks, so a lazy load per row would show up as a count that
+grows with the list.
+
+    python -m benchmarks.task_queries --tasks 100 1000
+
+Exits non-zero if any route's statement count differs between sizes.
+"""
+import argparse
+import sys
+from sqlalchemy import event, insert, select
+from app.models.category import Category
+from app.models.task import Task, Subtask
+from app.models.user import User
+from benchmarks.common import temp_app, timed
+
+
+def seed(db, user_id: int, category_id: int, start: int, stop: int, subtasks: int) -> int:
+    """Adds tasks [start, stop) with their subtasks; returns the last task id."""
+    ids = db.scalars(insert(Task).returning(Task.id, sort_by_parameter_order=True), [
+        {"user_id": user_id, "category_id": category_id, "title": f"Task {i}"} for i in range(start, stop)]).all()
+    db.execute(insert(Subtask.__table__), [
+        {"task_id": task_id, "title": f"Step {j}"} for task_id in ids for j in range(subtasks)])
+    return ids[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--subtasks", type=int, default=2, help="per task")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    statements = [0]
+
+    def count(*_):
+        statements[0] += 1
+
+    def measure(fn) -> tuple:
+        statements[0] = 0
+        response = fn()
+        queries = statements[0]
+        _, ms = timed(fn, args.repeat)
+        return response, queries, ms
+
+    with temp_app() as (client, Session, engines):
+        with Session() as db:
+            user = User(username="owner", email="owner@example.com", password_hash="x")
+            db.add(user)
+            db.flush()
+            category = Category(user_id=user.id, name="Work")
+            db.add(category)
+            db.commit()
+            user_id, category_id = user.id, category.id
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", count)
+
+        params = {"user_id": user_id}
+        routes = {
+            "GET /tasks/": lambda task_id: client.get("/tasks/", params=params),
+            "GET /tasks/?limit=50": lambda task_id: client.get("/tasks/", params={**params, "limit": 50}),
+            "GET /tasks/{id}": lambda task_id: client.get(f"/tasks/{task_id}", params=params),
+        }
+        counts = {name: set() for name in routes}
+        print(f"{'tasks':>7}{'route':>22}{'statements':>12}{'ms':>9}")
+        have = 0
+        for n in args.tasks:
+            with Session() as db:
+                task_id = seed(db, user_id, category_id, have, n, args.subtasks)
+                db.commit()
+            have = n
+            for name, route in routes.items():
+                response, queries, ms = measure(lambda: route(task_id))
+                body = response.json()
+                rows = body if isinstance(body, list) else [body]
+                if response.status_code != 200 or any(
+                        len(row["subtasks"]) != args.subtasks or row["category"]["id"] != category_id for row in rows):
+                    counts[name].add(None)
+                counts[name].add(queries)
+                print(f"{n:>7}{name:>22}{queries:>12}{ms:>9.2f}")
+
+    ok = all(len(seen) == 1 and None not in seen for seen in counts.values())
+    print(f"statement counts independent of the number of tasks: {ok}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
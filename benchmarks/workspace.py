@@ -0,0 +1,170 @@
+"""Workspace export/import throughput and memory for one big user.
+
+    python -m benchmarks.workspace --rows 1000000
+
+Seeds `rows` rows for one user, exports them (plain and gzip) to a temp file,
+then imports the gzip file into a second user. Requests go straight to the
+ASGI app so the test client doesn't buffer bodies. Memory is the peak growth
+of the process' anonymous RSS during each phase (Linux; SQLite's mmap'd file
+pages are not included, its page cache is).
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+import anyio
+from sqlalchemy import insert, select
+from app.main import app
+from app.models.category import Category
+from app.models.event import Event, duration_bucket
+from app.models.note import Note
+from app.models.task import Task, Subtask
+from app.models.user import User
+from benchmarks.common import temp_app
+
+BASE = datetime(2025, 1, 1, 9, 0)
+SEED_BATCH = 5000
+READ_SIZE = 64 * 1024
+
+
+def anon_rss_mb() -> float:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class PeakRss:
+    """Samples anonymous RSS every 10 ms; .growth is peak minus the value at start."""
+
+    def __enter__(self):
+        self.start = self.peak = anon_rss_mb()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._done.wait(0.01):
+            self.peak = max(self.peak, anon_rss_mb())
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self._thread.join()
+        self.growth = max(self.peak, anon_rss_mb()) - self.start
+
+
+def seed(Session, user_id: int, rows: int):
+    """Splits `rows` into categories 0.1%, events 20%, tasks 30%, subtasks 30%, notes ~20%."""
+    rng = random.Random(3)
+    counts = {"category": max(1, rows // 1000), "event": rows // 5, "task": rows * 3 // 10, "subtask": rows * 3 // 10}
+    counts["note"] = rows - sum(counts.values())
+    with Session() as db:
+        db.execute(insert(Category), [{"user_id": user_id, "name": f"Category {i}"} for i in range(counts["category"])])
+        category_ids = db.scalars(select(Category.id).where(Category.user_id == user_id)).all()
+
+        def batches(n, make):
+            for start in range(0, n, SEED_BATCH):
+                yield [make(i) for i in range(start, min(n, start + SEED_BATCH))]
+
+        def event(i):
+            start = BASE + timedelta(minutes=rng.randrange(-500000, 500000))
+            end = start + timedelta(minutes=rng.choice([30, 60, 90]))
+            return {"user_id": user_id, "title": f"Event {i}", "start_time": start, "end_time": end,
+                    "location": "B101", "duration_bucket": duration_bucket(start, end)}
+
+        for chunk in batches(counts["event"], event):
+            db.execute(insert(Event), chunk)
+        event_ids = db.scalars(select(Event.id).where(Event.user_id == user_id).limit(10000)).all()
+        for chunk in batches(counts["task"], lambda i: {
+            "user_id": user_id, "title": f"Task {i}", "description": "Read chapter and take notes",
+            "category_id": rng.choice(category_ids), "due_date": BASE + timedelta(hours=i % 5000),
+        }):
+            db.execute(insert(Task), chunk)
+        first_task = db.scalar(select(Task.id).where(Task.user_id == user_id).order_by(Task.id).limit(1))
+        for chunk in batches(counts["subtask"], lambda i: {
+            "task_id": first_task + i % counts["task"], "title": f"Step {i}", "is_completed": i % 3 == 0,
+        }):
+            db.execute(insert(Subtask), chunk)
+        for chunk in batches(counts["note"], lambda i: {
+            "user_id": user_id, "title": f"Note {i}", "content": "Lecture notes " * 8,
+            "category_id": rng.choice(category_ids), "event_id": rng.choice(event_ids) if event_ids and i % 2 else None,
+        }):
+            db.execute(insert(Note), chunk)
+        db.commit()
+    return counts
+
+
+async def call(method: str, path: str, params: dict, body_path: str = None, out_path: str = None):
+    """Runs one request against the ASGI app, streaming the body from/to files."""
+    body = open(body_path, "rb") if body_path else None
+    out = open(out_path, "wb") if out_path else None
+    state = {"status": None, "sent": False, "response": b""}
+
+    async def receive():
+        if state["sent"]:
+            await anyio.sleep_forever()  # nothing more to send; wait for cancellation
+        chunk = body.read(READ_SIZE) if body else b""
+        state["sent"] = not chunk
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunk)}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            state["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            if out:
+                out.write(message.get("body", b""))
+            else:
+                state["response"] += message.get("body", b"")
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method, "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": urlencode(params).encode(),
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    try:
+        await app(scope, receive, send)
+    finally:
+        for f in (body, out):
+            if f:
+                f.close()
+    return state["status"], state["response"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    with temp_app() as (client, Session, _), tempfile.TemporaryDirectory() as tmp:
+        with Session() as db:
+            users = [User(username=name, email=f"{name}@example.com", password_hash="x") for name in ("source", "target")]
+            db.add_all(users)
+            db.commit()
+            source, target = users[0].id, users[1].id
+        counts = seed(Session, source, args.rows)
+        print(f"rows={args.rows} " + " ".join(f"{k}={v}" for k, v in counts.items()))
+        print(f"{'phase':<14}{'seconds':>9}{'rows/s':>10}{'MB file':>9}{'RSS +MB':>9}")
+
+        for name, method, path, params, body, out in [
+            ("export", "GET", "/workspace/export", {"user_id": source}, None, "plain.ndjson"),
+            ("export gzip", "GET", "/workspace/export", {"user_id": source, "gzip": "true"}, None, "export.ndjson.gz"),
+            ("import gzip", "POST", "/workspace/import", {"user_id": target}, "export.ndjson.gz", None),
+        ]:
+            with PeakRss() as rss:
+                t0 = time.perf_counter()
+                status, response = client.portal.call(
+                    call, method, path, params, body and os.path.join(tmp, body), out and os.path.join(tmp, out))
+                seconds = time.perf_counter() - t0
+            size = os.path.getsize(os.path.join(tmp, out or body)) / 1e6
+            assert status == 200, (status, response[:500])
+            print(f"{name:<14}{seconds:>9.1f}{args.rows / seconds:>10.0f}{size:>9.1f}{rss.growth:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()